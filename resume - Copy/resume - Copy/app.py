@@ -1,7 +1,8 @@
 import streamlit as st
-from extract_utils import extract_text_from_file, extract_name_from_text
-from model import clean_resume, predict_category_and_conf
-from suggest import analyze_for_role, ALL_ROLES
+from extract_utils import extract_name_from_text
+from suggest import resolve_role, get_all_roles
+import ui_cache
+from uploads import UploadTooLarge
 
 st.set_page_config(page_title="AI Resume Analyzer", layout="wide")
 st.title("📄 AI Resume Analyzer")
@@ -9,7 +10,11 @@ st.title("📄 AI Resume Analyzer")
 uploaded_file = st.file_uploader("📤 Upload your resume (PDF, DOCX, TXT)", type=["pdf", "docx", "txt"])
 
 if uploaded_file:
-    resume_text = extract_text_from_file(uploaded_file)
+    try:
+        resume_text = ui_cache.extract_text(uploaded_file)
+    except UploadTooLarge as e:
+        st.error(str(e))
+        st.stop()
     if not resume_text:
         st.error("Couldn't read text from the file. Try another format.")
         st.stop()
@@ -22,19 +27,23 @@ if uploaded_file:
 
     # Auto-predict category
     st.subheader("🔍 Auto-Detect Role Category")
-    pred_category, confidence = predict_category_and_conf(resume_text)
+    pred_category, confidence = ui_cache.predict(resume_text)
     st.success(f"✅ Best Match Category: **{pred_category}**  (Confidence: {confidence:.2f}%)")
+    runners_up = ui_cache.top_categories(resume_text)[1:]
+    if runners_up:
+        st.caption("Also close: " + ", ".join(f"{t['category']} ({t['confidence']:.1f}%)" for t in runners_up))
 
     # Let user choose category
     st.markdown("### 🎯 Choose Your Target Role / Category")
-    roles = sorted(set(ALL_ROLES + [pred_category]))
+    roles = sorted(set(get_all_roles() + [pred_category]))
     default_idx = roles.index(pred_category) if pred_category in roles else 0
     chosen_category = st.selectbox("Pick or confirm a category:", roles, index=default_idx)
     st.session_state["chosen_category"] = chosen_category
+    st.caption(f"Skill table used: **{resolve_role(chosen_category)}**")
 
     # Analyze
     st.subheader("🧠 AI Suggestions for Your Resume")
-    result = analyze_for_role(resume_text, chosen_category)
+    result = ui_cache.analyze(resume_text, chosen_category)
 
     col1, col2 = st.columns(2)
     with col1:
@@ -45,6 +54,9 @@ if uploaded_file:
         st.markdown("#### 🧩 Missing / Important Skills")
         for s in result["missing_skills"]:
             st.write(f"- {s}") if result["missing_skills"] else st.write("No critical skill gaps found.")
+        if result.get("weak_skills"):
+            st.caption("Mentioned but thinly evidenced (add dated projects/experience):")
+            for s in result["weak_skills"]: st.write(f"- {s} ({result['skill_strength'][s]:.0%})")
 
     with col2:
         st.markdown("#### 💡 Projects to Add")
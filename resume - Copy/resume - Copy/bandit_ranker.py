@@ -0,0 +1,327 @@
+# ==================================================
+# bandit_ranker.py - LinUCB ranking of skill suggestions
+#
+#   python bandit_ranker.py replay [--alpha 0.5]   # offline evaluation on the logs
+#   python bandit_ranker.py rebuild                # fit state from the logs from scratch
+#
+# One arm per skill. The context of an arm is a small dense vector:
+# bias, the skill's evidence strength in this resume, the resume's coverage
+# of the role, a hashed role one-hot and (when available) a random projection
+# of the resume embedding. Each arm keeps A^-1 and b; a feedback event is a
+# Sherman-Morrison update (O(d^2)), and ranking k skills is a few einsums.
+# ==================================================
+import argparse
+import os
+import sys
+import threading
+import time
+import zlib
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+BANDIT_PATH = os.environ.get("RESUME_BANDIT_PATH", "bandit_state.npz")
+ALPHA = float(os.environ.get("RESUME_BANDIT_ALPHA", "0.5"))
+MIN_UPDATES = 20           # below this the heuristic order is served instead
+LOCK_WAIT_SECONDS = 10     # record_feedback gives up (feedback stays logged) after this
+LOCK_STALE_SECONDS = 60
+ROLE_BUCKETS = 16
+EMBED_DIMS = 16
+DIM = 3 + ROLE_BUCKETS + EMBED_DIMS
+
+
+# -------- Context features --------
+_PROJECTIONS: Dict[int, np.ndarray] = {}
+
+def _projection(n: int) -> np.ndarray:
+    # fixed seed: the same embedding always lands on the same features
+    p = _PROJECTIONS.get(n)
+    if p is None:
+        p = np.random.default_rng(0).standard_normal((n, EMBED_DIMS)) / np.sqrt(EMBED_DIMS)
+        _PROJECTIONS[n] = p
+    return p
+
+
+def role_bucket(role: str) -> int:
+    return zlib.crc32((role or "").encode("utf-8")) % ROLE_BUCKETS
+
+
+def contexts(role: str, skills: Sequence[str], strength: Dict[str, float],
+             coverage: float, embedding=None) -> np.ndarray:
+    """(len(skills), DIM) context matrix for ranking/updating these skills of one resume."""
+    base = np.zeros(DIM)
+    base[0] = 1.0
+    base[2] = coverage
+    base[3 + role_bucket(role)] = 1.0
+    if embedding is not None:
+        vec = np.asarray(embedding, dtype=np.float64).reshape(-1)
+        z = vec @ _projection(vec.shape[0])
+        norm = np.linalg.norm(z)
+        base[3 + ROLE_BUCKETS:] = z / norm if norm else z
+    X = np.tile(base, (len(skills), 1))
+    X[:, 1] = [strength.get(s, 0.0) for s in skills]
+    return X
+
+
+# -------- Learner --------
+class LinUCB:
+    """Disjoint LinUCB; arms are added on first sight of a skill."""
+
+    def __init__(self, dim: int = DIM, alpha: float = ALPHA):
+        self.dim = dim
+        self.alpha = alpha
+        self.arms: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.A_inv = np.zeros((0, dim, dim))
+        self.b = np.zeros((0, dim))
+        self.theta = np.zeros((0, dim))
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    @property
+    def updates(self) -> int:
+        return int(self.counts.sum())
+
+    def _arm(self, skill: str) -> int:
+        i = self.index.get(skill)
+        if i is None:
+            i = len(self.arms)
+            self.arms.append(skill)
+            self.index[skill] = i
+            self.A_inv = np.concatenate([self.A_inv, np.eye(self.dim)[None]])
+            self.b = np.concatenate([self.b, np.zeros((1, self.dim))])
+            self.theta = np.concatenate([self.theta, np.zeros((1, self.dim))])
+            self.counts = np.concatenate([self.counts, np.zeros(1, dtype=np.int64)])
+        return i
+
+    def scores(self, skills: Sequence[str], X: np.ndarray) -> np.ndarray:
+        """Upper confidence bound per skill; unseen skills get the prior (theta=0, A=I)."""
+        idx = np.array([self.index.get(s, -1) for s in skills], dtype=np.int64)
+        known = idx >= 0
+        mean = np.zeros(len(skills))
+        var = np.einsum("kd,kd->k", X, X)
+        if known.any():
+            Xk, ik = X[known], idx[known]
+            mean[known] = np.einsum("kd,kd->k", Xk, self.theta[ik])
+            var[known] = np.einsum("kd,kde,ke->k", Xk, self.A_inv[ik], Xk)
+        return mean + self.alpha * np.sqrt(np.maximum(var, 0.0))
+
+    def rank(self, skills: Sequence[str], X: np.ndarray) -> List[str]:
+        s = self.scores(skills, X)
+        order = sorted(range(len(skills)), key=lambda k: -s[k])  # stable: ties keep input order
+        return [skills[k] for k in order]
+
+    def update(self, skill: str, x: np.ndarray, reward: float):
+        """Sherman-Morrison rank-1 update of A^-1, then theta = A^-1 b."""
+        i = self._arm(skill)
+        A_inv = self.A_inv[i]
+        Ax = A_inv @ x
+        A_inv -= np.outer(Ax, Ax) / (1.0 + x @ Ax)
+        self.b[i] += reward * x
+        self.theta[i] = A_inv @ self.b[i]
+        self.counts[i] += 1
+
+    # -------- persistence --------
+    def save(self, path: str = BANDIT_PATH):
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, arms=np.array(self.arms, dtype=str), A_inv=self.A_inv.astype(np.float32),
+                 b=self.b.astype(np.float32), counts=self.counts,
+                 meta=np.array([self.dim, self.alpha]))
+        os.replace(tmp, path)  # readers never see a half-written file
+
+    @classmethod
+    def load(cls, path: str = BANDIT_PATH) -> "LinUCB":
+        with np.load(path) as z:
+            dim, alpha = z["meta"]
+            self = cls(int(dim), float(alpha))
+            self.arms = [str(a) for a in z["arms"]]
+            self.index = {a: i for i, a in enumerate(self.arms)}
+            self.A_inv = z["A_inv"].astype(np.float64)
+            self.b = z["b"].astype(np.float64)
+            self.counts = z["counts"].astype(np.int64)
+        self.theta = np.einsum("nde,ne->nd", self.A_inv, self.b)
+        return self
+
+
+def _binary(reward) -> float:
+    return 1.0 if reward > 0 else 0.0
+
+
+# -------- Shared instance (serving + feedback) --------
+class _StateLock:
+    """
+    Cross-process lock file around load -> update -> save, so feedback
+    handled by two app workers at once is not lost. Same O_EXCL lock file
+    as feedback_analytics' compaction lock, but waits for its turn.
+    """
+
+    def __init__(self, path: str = BANDIT_PATH):
+        self.path = path + ".lock"
+
+    def __enter__(self):
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                pass
+            try:
+                if time.time() - os.stat(self.path).st_mtime > LOCK_STALE_SECONDS:
+                    os.unlink(self.path)  # left behind by a crashed worker
+                    continue
+            except OSError:
+                continue  # released between the two calls
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"bandit state is locked ({self.path})")
+            time.sleep(0.01)
+
+    def __exit__(self, *exc):
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+_LOCK = threading.RLock()  # record_feedback holds it across the file lock
+_STATE = {"mtime": None, "ranker": None}
+
+def get_ranker(path: str = BANDIT_PATH):
+    """The persisted ranker (reloaded when the file changes), or None if there is none yet."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    if _STATE["mtime"] != mtime:
+        with _LOCK:
+            if _STATE["mtime"] != mtime:
+                _STATE["ranker"] = LinUCB.load(path)
+                _STATE["mtime"] = mtime
+    return _STATE["ranker"]
+
+
+def rank(role: str, skills: Sequence[str], strength: Dict[str, float], coverage: float,
+         embedding=None):
+    """Bandit order for these skills, or None while the bandit is still cold."""
+    ranker = get_ranker()
+    if ranker is None or ranker.updates < MIN_UPDATES or not skills:
+        return None
+    return ranker.rank(list(skills), contexts(role, skills, strength, coverage, embedding))
+
+
+def record_feedback(role: str, skills: Sequence[str], strength: Dict[str, float], coverage: float,
+                    reward: int, embedding=None, path: str = BANDIT_PATH) -> int:
+    """Apply one feedback event on the suggested skills and persist. Returns total updates."""
+    if not skills:
+        return 0
+    X = contexts(role, skills, strength, coverage, embedding)
+    with _LOCK, _StateLock(path):
+        # always the file as it is now (another worker may have saved since we last looked),
+        # and a fresh object, so threads serving from the cached ranker never see a half update
+        ranker = LinUCB.load(path) if os.path.exists(path) else LinUCB()
+        for s, x in zip(skills, X):
+            ranker.update(s, x, _binary(reward))
+        ranker.save(path)
+        _STATE["ranker"], _STATE["mtime"] = ranker, os.stat(path).st_mtime_ns
+        return ranker.updates
+
+
+# -------- Offline replay evaluation --------
+def _event_context(ev, kb, store, cache: dict):
+    """Resume evidence/embedding for a logged event when its resume_id is in the result store."""
+    key = ev.resume_id
+    if key not in cache:
+        strength, embedding = {}, None
+        rec = store.get(key) if store is not None and key else None
+        if rec is not None and rec.get("raw_text"):
+            import skill_evidence
+            strength = skill_evidence.analyze(rec["raw_text"], kb.matrix).strength
+            embedding = store.load_embedding(rec.get("embedding_ref"))
+        cache[key] = (strength, embedding)
+    return cache[key]
+
+
+def replay(events, alpha: float = ALPHA, store=None, seed: int = 0) -> dict:
+    """
+    Replay evaluation (Li et al., 2011): walk the log in order; at each event
+    the policy picks one skill from the role's table; only when it matches the
+    logged skill does the reward count and the policy learn from it. The
+    estimate is unbiased only to the extent the logged choices were random;
+    ties are broken randomly so a cold policy does not always pick the first skill.
+    """
+    import knowledge_base
+    kb = knowledge_base.current()
+    ranker = LinUCB(alpha=alpha)
+    rng = np.random.default_rng(seed)
+    cache = {}
+    total = matched = 0
+    logged_reward = policy_reward = 0.0
+    for ev in events:
+        role = kb.resolver.resolve(ev.role)
+        candidates = list(kb.role_skills.get(role, ()))
+        if ev.skill not in candidates:
+            continue
+        total += 1
+        logged_reward += _binary(ev.reward)
+        strength, embedding = _event_context(ev, kb, store, cache)
+        coverage = sum(1 for s in candidates if strength.get(s)) / len(candidates)
+        X = contexts(role, candidates, strength, coverage, embedding)
+        scores = ranker.scores(candidates, X)
+        best = np.flatnonzero(scores >= scores.max() - 1e-12)
+        choice = candidates[int(rng.choice(best))]
+        if choice == ev.skill:
+            matched += 1
+            policy_reward += _binary(ev.reward)
+            ranker.update(ev.skill, X[candidates.index(ev.skill)], _binary(ev.reward))
+    return {
+        "events": total,
+        "matched": matched,
+        "logged_reward_rate": round(logged_reward / total, 4) if total else None,
+        "policy_reward_rate": round(policy_reward / matched, 4) if matched else None,
+        "arms": len(ranker.arms),
+    }
+
+
+def rebuild(events, path: str = BANDIT_PATH, alpha: float = ALPHA, store=None) -> LinUCB:
+    """Fit a fresh ranker on every logged event (not only replay matches) and save it."""
+    import knowledge_base
+    kb = knowledge_base.current()
+    ranker = LinUCB(alpha=alpha)
+    cache = {}
+    for ev in events:
+        role = kb.resolver.resolve(ev.role)
+        candidates = list(kb.role_skills.get(role, ()))
+        strength, embedding = _event_context(ev, kb, store, cache)
+        coverage = sum(1 for s in candidates if strength.get(s)) / len(candidates) if candidates else 0.0
+        x = contexts(role, [ev.skill], strength, coverage, embedding)[0]
+        ranker.update(ev.skill, x, _binary(ev.reward))
+    with _StateLock(path):
+        ranker.save(path)
+    return ranker
+
+
+def main(argv=None):
+    from feedback_events import iter_events
+    ap = argparse.ArgumentParser(description="LinUCB skill-suggestion ranker: replay evaluation / rebuild.")
+    ap.add_argument("command", choices=("replay", "rebuild"))
+    ap.add_argument("--alpha", type=float, default=ALPHA)
+    ap.add_argument("--seed", type=int, default=0, help="replay tie-breaking seed")
+    ap.add_argument("--logs", nargs="*", default=None, help="feedback log files (default: the app's logs)")
+    ap.add_argument("--no-store", action="store_true", help="don't join events with stored resumes")
+    args = ap.parse_args(argv)
+
+    events = list(iter_events(args.logs) if args.logs else iter_events())
+    store = None
+    if not args.no_store:
+        from result_store import get_store
+        store = get_store()
+    if args.command == "replay":
+        for k, v in replay(events, args.alpha, store, args.seed).items():
+            print(f"{k:>20}: {v}")
+    else:
+        ranker = rebuild(events, BANDIT_PATH, args.alpha, store)
+        print(f"{ranker.updates} updates over {len(ranker.arms)} arms -> {BANDIT_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
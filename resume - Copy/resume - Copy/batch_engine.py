@@ -0,0 +1,160 @@
+# ==================================================
+# batch_engine.py - many resumes through the pipeline
+#   stage 1 (process pool, cached by content hash): extract + classify
+#   stage 2 (in-process, cheap): skill gap against a target role
+# ==================================================
+import hashlib
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from threading import Lock
+
+import budgets
+
+STAGE1_CACHE_SIZE = 5000
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+EXPORT_COLUMNS = ["name", "category", "confidence", "top_categories", "role", "coverage", "missing_count",
+                  "missing_skills", "error"]
+
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.sha1(raw).hexdigest()
+
+
+def process_upload(name: str, raw: bytes) -> dict:
+    """Stage 1 for a single upload. Runs inside a worker process; never raises."""
+    rec = {"hash": content_hash(raw), "name": name, "text": "", "category": None,
+           "confidence": None, "top_k": [], "degradations": [], "error": None}
+    with budgets.scope() as budget:  # one pathological file gets the same budget as a request
+        try:
+            from extract_utils import extract_text_from_bytes
+            from result_store import classify_with_store
+            # the persistent store is checked before extraction / model work
+            stored = classify_with_store(rec["hash"], name, lambda: extract_text_from_bytes(name, raw))
+            if not stored:
+                rec["error"] = "no text extracted"
+                return rec
+            rec.update(text=stored["raw_text"], category=stored["category"], confidence=stored["confidence"],
+                       top_k=stored["top_k"])
+        except Exception as e:  # one bad file must not fail the batch
+            rec["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            rec["degradations"] = list(budget.applied)
+    return rec
+
+
+def skill_gap(rec: dict, role: str) -> dict:
+    """Stage 2: merge a stage-1 record with its coverage for `role`."""
+    from suggest import role_coverage
+    row = {k: v for k, v in rec.items() if k != "text"}
+    if rec.get("text"):
+        cov = role_coverage(rec["text"], role)
+        row.update(role=cov["role"], coverage=cov["coverage"],
+                   missing_count=len(cov["missing_skills"]),
+                   missing_skills=", ".join(cov["missing_skills"]))
+    else:
+        row.update(role=role, coverage=None, missing_count=None, missing_skills="")
+    return row
+
+
+class BatchEngine:
+    """Process pool for stage 1 plus an LRU of stage-1 records keyed by content hash."""
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, cache_size: int = STAGE1_CACHE_SIZE):
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self._pool = None
+        self._cache = OrderedDict()
+        self._lock = Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def cached(self, h: str):
+        with self._lock:
+            rec = self._cache.get(h)
+            if rec is not None:
+                self._cache.move_to_end(h)
+            return rec
+
+    def _remember(self, rec: dict):
+        if rec.get("error") or rec.get("degradations"):
+            return  # let failed (or budget-degraded) files be retried
+        with self._lock:
+            self._cache[rec["hash"]] = rec
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def run(self, uploads, max_pending: int = None):
+        """
+        uploads: iterable of (name, raw_bytes), consumed lazily.
+        Yields stage-1 records as each one finishes (cache hits immediately).
+        At most `max_pending` uploads are in flight, so a long stream
+        (e.g. an archive) never sits in memory all at once.
+        """
+        window = max_pending or self.max_workers * 4
+        inflight = {}
+        duplicates = {}  # hash -> other names uploaded with identical bytes
+        for name, raw in uploads:
+            h = content_hash(raw)
+            rec = self.cached(h)
+            if rec is not None:
+                yield dict(rec, name=name)
+            elif h in duplicates:
+                duplicates[h].append(name)
+            else:
+                duplicates[h] = []
+                inflight[self._executor().submit(process_upload, name, raw)] = h
+                if len(inflight) >= window:
+                    yield from self._finish(inflight, duplicates)
+        while inflight:
+            yield from self._finish(inflight, duplicates)
+
+    def _finish(self, inflight, duplicates):
+        done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+        for fut in done:
+            h = inflight.pop(fut)
+            rec = fut.result()
+            budgets.record_remote(rec.get("degradations", ()))  # the worker's counters stay in the worker
+            self._remember(rec)
+            yield rec
+            for name in duplicates.pop(h):
+                yield dict(rec, name=name)
+
+    def rank(self, records, role: str, sort_by: str = "coverage", descending: bool = True):
+        """Stage 2 over already-extracted records; only this reruns when the role changes."""
+        rows = [skill_gap(r, role) for r in records]
+        missing = [r for r in rows if r.get(sort_by) is None]
+        present = sorted((r for r in rows if r.get(sort_by) is not None),
+                         key=lambda r: r[sort_by], reverse=descending)
+        return present + missing
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+# -------- Export --------
+def format_top_k(top_k) -> str:
+    """"Data Science (81.2%); Python Developer (9.5%)" for flat exports."""
+    return "; ".join(f"{t['category']} ({t['confidence']:.1f}%)" for t in top_k or [])
+
+
+def to_dataframe(rows):
+    import pandas as pd
+    rows = [dict(r, top_categories=format_top_k(r.get("top_k"))) for r in rows]
+    return pd.DataFrame(rows, columns=EXPORT_COLUMNS)
+
+
+def to_csv_bytes(rows) -> bytes:
+    return to_dataframe(rows).to_csv(index=False).encode("utf-8")
+
+
+def to_parquet_bytes(rows) -> bytes:
+    buf = io.BytesIO()
+    to_dataframe(rows).to_parquet(buf, index=False)  # needs pyarrow or fastparquet
+    return buf.getvalue()
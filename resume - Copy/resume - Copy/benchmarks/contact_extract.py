@@ -0,0 +1,120 @@
+# ==================================================
+# benchmarks/contact_extract.py - contact fields per resume:
+# the previous five separate extractors vs contact_fields
+#
+#   python benchmarks/contact_extract.py [--resumes 500] [--repeat 5]
+#
+# "legacy" is the old extract_utils code (one uncompiled re.search per
+# field over the whole text, name from the fully split text). Agreement is
+# reported per field against the first value the engine returns.
+# ==================================================
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import contact_fields  # noqa: E402
+
+
+# -------- the previous implementation --------
+def legacy_name(text, filename=""):
+    if not text:
+        return "Candidate"
+    text = re.sub(r"[\u00A0\u200B]+", " ", text)
+    lines = [l.strip() for l in text.splitlines() if l and l.strip()]
+    skip = contact_fields._SKIP_KEYWORDS
+
+    def _is_skip(line):
+        low = line.lower().strip().strip(":")
+        return any(k in low for k in skip)
+
+    top_lines = lines[:20]
+    for line in top_lines[:5]:
+        if line.isupper() and 1 < len(line.split()) <= 3 and not _is_skip(line):
+            return line.title()
+    for line in top_lines:
+        if _is_skip(line):
+            continue
+        if re.match(r"^[A-Z][a-z]+(\s[A-Z]\.)?(\s[A-Z][a-z]+){1,2}$", line):
+            return line
+    for line in top_lines:
+        if _is_skip(line):
+            continue
+        if not re.search(r"[\d@:/\\]", line):
+            words = line.split()
+            if 1 < len(words) <= 3 and sum(1 for w in words if w[0].isupper()) >= 2:
+                return line
+    return "Candidate"
+
+
+def legacy_fields(text):
+    m = re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text or "")
+    email = m.group(0) if m else "—"
+    m = re.search(r"(\+?\d{1,3}[- ]*)?(\d[ -]?){9,12}\d", text or "")
+    phone = m.group(0).strip() if m else "—"
+    m = re.search(r"(https?://)?(www\.)?linkedin\.com/[A-Za-z0-9_/.\-]+", text or "", re.IGNORECASE)
+    linkedin = m.group(0) if m else "—"
+    m = re.search(r"(https?://)?(www\.)?github\.com/[A-Za-z0-9_/.\-]+", text or "", re.IGNORECASE)
+    github = m.group(0) if m else "—"
+    return {"email": email, "phone": phone, "linkedin": linkedin, "github": github}
+
+
+def legacy(text):
+    return legacy_name(text), legacy_fields(text)
+
+
+def engine(text):
+    info = contact_fields.extract_contact_info(text)
+    return info.name, {f: info.first(f) for f in contact_fields.FIELDS}
+
+
+def _texts(n):
+    csv.field_size_limit(sys.maxsize)
+    with open(os.path.join(ROOT, "UpdatedResumeDataSet.csv"), encoding="utf-8", errors="ignore") as f:
+        texts = [row["Resume"] for row in csv.DictReader(f)]
+    # the dataset has lost its line breaks; add a contact header like a real upload has
+    out = []
+    for i in range(n):
+        body = texts[i % len(texts)]
+        out.append(f"Jane Candidate{i}\njane.c{i}@example.com | +91 98765 4{i % 10}210\n"
+                   f"linkedin.com/in/jane-{i}\n\n{body}")
+    return out
+
+
+def _time(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts) * 1e6
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Contact-field extraction: legacy vs contact_fields.")
+    ap.add_argument("--resumes", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    texts = _texts(args.resumes)
+    a, b = _time(legacy, texts, args.repeat), _time(engine, texts, args.repeat)
+    print(f"{len(texts)} resumes, mean {sum(map(len, texts)) / len(texts):.0f} chars")
+    print(f"{'legacy (5 calls)':>20} {a:>9.1f} us/resume")
+    print(f"{'contact_fields':>20} {b:>9.1f} us/resume   ({a / b:.1f}x)")
+
+    agree = {f: 0 for f in ("name",) + contact_fields.FIELDS}
+    for t in texts:
+        (ln, lf), (en, ef) = legacy(t), engine(t)
+        agree["name"] += ln == en
+        for f in contact_fields.FIELDS:
+            agree[f] += lf[f] == ef[f]
+    print("agreement: " + ", ".join(f"{k} {v}/{len(texts)}" for k, v in agree.items()))
+
+
+if __name__ == "__main__":
+    main()
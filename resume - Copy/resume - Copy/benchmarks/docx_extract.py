@@ -0,0 +1,46 @@
+# ==================================================
+# benchmarks/docx_extract.py - DOCX text: python-docx object
+# model vs docx_stream (iterparse of the XML parts)
+#
+#   python benchmarks/docx_extract.py [files.docx ...] [--repeat 20]
+# ==================================================
+import argparse
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import docx_stream  # noqa: E402
+import extract_utils  # noqa: E402
+
+
+def _ms(fn, raw: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(io.BytesIO(raw))
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="DOCX extraction: python-docx vs streaming.")
+    ap.add_argument("files", nargs="*", default=[os.path.join(ROOT, "resume_template.docx"),
+                                                 os.path.join(ROOT, "temp_resume.docx")])
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args(argv)
+    print(f"{'file':>24} {'python-docx':>12} {'stream':>9} {'speedup':>8}  same body text")
+    for path in args.files:
+        with open(path, "rb") as f:
+            raw = f.read()
+        a = _ms(extract_utils._docx_object_model_text, raw, args.repeat)
+        b = _ms(docx_stream.docx_text, raw, args.repeat)
+        old = extract_utils._docx_object_model_text(io.BytesIO(raw))
+        new = docx_stream.docx_text(io.BytesIO(raw))
+        print(f"{os.path.basename(path):>24} {a:>10.2f}ms {b:>7.2f}ms {a / b:>7.1f}x  {old in new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,496 @@
+# ==================================================
+# benchmarks/load_test.py - capacity test of the Flask API against a
+# local mock deployment
+#
+#   python benchmarks/load_test.py --concurrency 8 --duration 30
+#   python benchmarks/load_test.py --sweep 1,2,4,8,16,32 --duration 20 --slo-ms 2000
+#   python benchmarks/load_test.py --workers 4 --threads 4      # gunicorn, if installed
+#   python benchmarks/load_test.py --url http://127.0.0.1:5000   # an already running server
+#
+# The app is copied to a temp directory and started there (gunicorn with
+# --workers/--threads when installed, else Flask's threaded server), so
+# the result store, feedback logs and caches it writes never touch the
+# checkout. Closed-loop clients replay a weighted mix of /upload,
+# /analyze, /editor/recheck, /download and /feedback built from
+# UpdatedResumeDataSet.csv. Reported per interval: throughput, latency
+# percentiles, errors, budget degradations and server CPU / RSS; a sweep
+# runs one such test per concurrency level and names the saturation
+# point (the last level that still added throughput within the SLO).
+# ==================================================
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_MIX = "upload=3,analyze=4,recheck=1,download=1,feedback=1"
+OPS = ("upload", "analyze", "recheck", "download", "feedback")
+# not part of a deployment (or written by the server at run time)
+DEPLOY_IGNORE = ("__pycache__", "benchmarks", "ScreenShot", "serves", "*.sqlite3*", "embeddings",
+                 "ocr_cache", "feedback_analytics", ".git")
+TEMPLATE_COUNT = 50
+
+
+# -------- Corpus --------
+def _resumes(limit: int = None):
+    csv.field_size_limit(sys.maxsize)
+    with open(os.path.join(ROOT, "UpdatedResumeDataSet.csv"), encoding="utf-8", errors="ignore") as f:
+        rows = [(row["Category"], row["Resume"]) for row in csv.DictReader(f)]
+    return rows[:limit] if limit else rows
+
+
+def _with_header(i: int, body: str) -> str:
+    # the dataset has lost its line breaks and contact block; give each resume one like a real upload
+    return (f"Candidate {i}\ncandidate{i}@example.com | +91 98765 {i % 100000:05d}\n"
+            f"linkedin.com/in/candidate-{i}\n\n{body}")
+
+
+def _as_pdf(text: str) -> bytes:
+    from pdf_render import render_plain
+    return render_plain(text)
+
+
+def _as_docx(text: str) -> bytes:
+    from docx import Document
+    buf = io.BytesIO()
+    d = Document()
+    for para in text.splitlines():
+        d.add_paragraph(para)
+    d.save(buf)
+    return buf.getvalue()
+
+
+class Corpus:
+    """Resume texts (with their dataset category) and upload files in the requested formats."""
+
+    def __init__(self, size: int, formats, huge_ratio: float = 0.0, seed: int = 7):
+        rows = _resumes()
+        rng = random.Random(seed)
+        picked = [rows[rng.randrange(len(rows))] for _ in range(size)]
+        self.items = [(cat, _with_header(i, text)) for i, (cat, text) in enumerate(picked)]
+        self.categories = sorted({cat for cat, _ in rows})
+        self.huge_ratio = huge_ratio
+        self.uploads = []  # (filename, bytes, mimetype)
+        makers = {"txt": lambda t: t.encode("utf-8"), "pdf": _as_pdf, "docx": _as_docx}
+        for i, (_, text) in enumerate(self.items):
+            fmt = formats[i % len(formats)]
+            try:
+                data = makers[fmt](text)
+            except ImportError:  # reportlab / python-docx missing: fall back to plain text
+                fmt, data = "txt", text.encode("utf-8")
+            self.uploads.append((f"resume_{i}.{fmt}", data, "application/octet-stream"))
+
+    def text(self, rng: random.Random):
+        cat, text = self.items[rng.randrange(len(self.items))]
+        if self.huge_ratio and rng.random() < self.huge_ratio:
+            text = "\n".join([text] * 40)  # a giant paste into the editor
+        return cat, text
+
+
+# -------- Requests --------
+def _multipart(field: str, filename: str, data: bytes, mimetype: str, form: dict = None):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for k, v in (form or {}).items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode("utf-8"))
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                 f"Content-Type: {mimetype}\r\n\r\n".encode("utf-8") + data + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def build_request(op: str, corpus: Corpus, rng: random.Random):
+    """(method, path, body, content_type) for one operation of the mix."""
+    if op == "upload":
+        name, data, mimetype = corpus.uploads[rng.randrange(len(corpus.uploads))]
+        body, ctype = _multipart("file", name, data, mimetype)
+        return "POST", "/upload", body, ctype
+    cat, text = corpus.text(rng)
+    if op == "analyze":
+        obj = {"resume_text": text, "category": cat}
+        path = "/analyze"
+    elif op == "recheck":
+        obj = {"resume_text": text, "category": rng.choice(corpus.categories)}
+        path = "/editor/recheck"
+    elif op == "download":
+        obj = {"resume_text": text, "template_id": rng.randint(1, TEMPLATE_COUNT)}
+        path = "/download"
+    else:
+        obj = {"resume_text": text, "category": cat, "reward": rng.choice((1, -1)),
+               "resume_id": "session", "comments": "load test"}
+        path = "/feedback"
+    return "POST", path, json.dumps(obj).encode("utf-8"), "application/json"
+
+
+def parse_mix(spec: str):
+    weights = {}
+    for part in spec.split(","):
+        if part.strip():
+            op, _, w = part.partition("=")
+            if op.strip() not in OPS:
+                raise SystemExit(f"unknown operation '{op}' in --mix; choose from {', '.join(OPS)}")
+            weights[op.strip()] = float(w or 1)
+    return weights
+
+
+# -------- Local deployment --------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _has(module: str) -> bool:
+    import importlib.util
+    return importlib.util.find_spec(module) is not None
+
+
+class LocalServer:
+    """The app copied to a temp dir and served from there on a free port."""
+
+    def __init__(self, workers: int = 1, threads: int = 8, server: str = "auto", in_place: bool = False,
+                 env: dict = None):
+        if server == "auto":
+            server = "gunicorn" if _has("gunicorn") else "flask"
+        if server == "flask" and workers > 1:
+            print(f"note: gunicorn not installed; Flask's server runs 1 process x threads (--workers {workers} ignored)")
+            workers = 1
+        self.server, self.workers, self.threads = server, workers, threads
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._tmp = None if in_place else tempfile.mkdtemp(prefix="resume_load_")
+        self.cwd = ROOT if in_place else os.path.join(self._tmp, "app")
+        self.env = dict(os.environ, **(env or {}))
+        self.proc = None
+
+    def start(self, timeout: float = 120.0):
+        if self._tmp:
+            shutil.copytree(ROOT, self.cwd, ignore=shutil.ignore_patterns(*DEPLOY_IGNORE))
+        if self.server == "gunicorn":
+            cmd = [sys.executable, "-m", "gunicorn", "-w", str(self.workers), "--threads", str(self.threads),
+                   "-b", f"127.0.0.1:{self.port}", "--timeout", "120", "--log-level", "warning", "flask_app:app"]
+        else:
+            cmd = [sys.executable, "-c",
+                   "import flask_app; flask_app.app.run(host='127.0.0.1', port=%d, threaded=True, debug=False)"
+                   % self.port]
+        self.log = open(os.path.join(self._tmp or tempfile.gettempdir(), "server.log"), "wb")
+        self.proc = subprocess.Popen(cmd, cwd=self.cwd, env=self.env, stdout=self.log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"server exited with {self.proc.returncode}; see {self.log.name}")
+            try:
+                urllib.request.urlopen(self.url + "/", timeout=2).read()
+                return self
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.25)
+        raise RuntimeError(f"server did not answer within {timeout:g}s; see {self.log.name}")
+
+    def stop(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        if self.proc is not None:
+            self.log.close()
+        if self._tmp:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+
+
+# -------- Resource sampling --------
+class ResourceSampler:
+    """CPU % (of one core) and RSS of a process and its children: psutil, else /proc (Linux)."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self._last = None  # (wall, cpu seconds)
+        self._tick = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self._page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _pids(self):
+        try:
+            import psutil
+            proc = psutil.Process(self.pid)
+            return [proc] + proc.children(recursive=True)
+        except ImportError:
+            pass
+        pids, children = [self.pid], defaultdict(list)
+        for name in os.listdir("/proc"):
+            if name.isdigit():
+                try:
+                    with open(f"/proc/{name}/stat") as f:
+                        ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                    children[ppid].append(int(name))
+                except (OSError, IndexError, ValueError):
+                    continue
+        i = 0
+        while i < len(pids):
+            pids.extend(children.get(pids[i], ()))
+            i += 1
+        return pids
+
+    def _usage(self):
+        cpu, rss = 0.0, 0
+        for p in self._pids():
+            try:
+                if hasattr(p, "cpu_times"):
+                    t = p.cpu_times()
+                    cpu += t.user + t.system
+                    rss += p.memory_info().rss
+                    continue
+                with open(f"/proc/{p}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                cpu += (int(fields[11]) + int(fields[12])) / self._tick
+                with open(f"/proc/{p}/statm") as f:
+                    rss += int(f.read().split()[1]) * self._page
+            except Exception:  # a worker exited between listing and reading
+                continue
+        return cpu, rss
+
+    def sample(self):
+        """(cpu % since the previous sample, RSS MB), or (None, None) where unsupported."""
+        try:
+            cpu, rss = self._usage()
+        except OSError:
+            return None, None
+        now = time.monotonic()
+        pct = None
+        if self._last is not None and now > self._last[0]:
+            pct = (cpu - self._last[1]) / (now - self._last[0]) * 100.0
+        self._last = (now, cpu)
+        return pct, rss / (1024 * 1024)
+
+
+# -------- Load generation --------
+class Result:
+    __slots__ = ("end", "op", "ms", "status", "degraded")
+
+    def __init__(self, end, op, ms, status, degraded):
+        self.end, self.op, self.ms, self.status, self.degraded = end, op, ms, status, degraded
+
+
+def _send(base: str, method: str, path: str, body: bytes, ctype: str, timeout: float):
+    req = urllib.request.Request(base + path, data=body, method=method, headers={"Content-Type": ctype})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            return resp.status, resp.headers.get("X-Degradations")
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code, e.headers.get("X-Degradations")
+    except (urllib.error.URLError, OSError):
+        return 0, None  # connection refused / reset / timed out
+
+
+def run_load(base: str, corpus: Corpus, mix: dict, concurrency: int, duration: float,
+             warmup: float = 0.0, timeout: float = 60.0, seed: int = 11):
+    """
+    Closed loop: `concurrency` clients send back to back until the end of the
+    test. Returns (client threads, the growing list of results measured after
+    the warm-up, monotonic start of the measurement).
+    """
+    ops, weights = zip(*mix.items())
+    results = []  # appended to by every client (list.append is atomic), read live by measure()
+    start = time.monotonic()
+    measure_from, stop_at = start + warmup, start + warmup + duration
+
+    def client(n):
+        rng = random.Random(seed * 1000 + n)
+        while time.monotonic() < stop_at:
+            op = rng.choices(ops, weights)[0]
+            method, path, body, ctype = build_request(op, corpus, rng)
+            t = time.monotonic()
+            status, degraded = _send(base, method, path, body, ctype, timeout)
+            end = time.monotonic()
+            if t >= measure_from:
+                results.append(Result(end - measure_from, op, (end - t) * 1000.0, status, degraded))
+
+    threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(concurrency)]
+    for th in threads:
+        th.start()
+    return threads, results, measure_from
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(results, seconds: float) -> dict:
+    ms = sorted(r.ms for r in results)
+    errors = sum(1 for r in results if not 200 <= r.status < 400)
+    return {
+        "requests": len(results),
+        "rps": len(results) / seconds if seconds > 0 else 0.0,
+        "p50_ms": _percentile(ms, 0.50),
+        "p95_ms": _percentile(ms, 0.95),
+        "p99_ms": _percentile(ms, 0.99),
+        "max_ms": ms[-1] if ms else 0.0,
+        "error_rate": errors / len(results) if results else 0.0,
+        "degraded_rate": sum(1 for r in results if r.degraded) / len(results) if results else 0.0,
+    }
+
+
+def measure(base: str, corpus: Corpus, mix: dict, concurrency: int, duration: float, warmup: float,
+            interval: float, sampler: ResourceSampler = None, timeout: float = 60.0, quiet: bool = False):
+    """One load test: per-interval series plus overall and per-operation summaries."""
+    threads, results, t0 = run_load(base, corpus, mix, concurrency, duration, warmup, timeout)
+    series = []
+    if sampler:
+        sampler.sample()  # baseline for the first CPU reading
+    if not quiet:
+        print(f"{'t(s)':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'err %':>6} {'cpu %':>7} {'rss MB':>8}")
+    next_tick = t0 + interval
+    while any(th.is_alive() for th in threads):
+        time.sleep(max(0.0, min(interval, next_tick - time.monotonic())))
+        if time.monotonic() < next_tick:
+            continue
+        lo, hi = next_tick - t0 - interval, next_tick - t0
+        next_tick += interval
+        if hi <= 0 or lo >= duration:
+            continue  # still warming up / only draining the last in-flight requests
+        window = [r for r in list(results) if lo <= r.end < hi]
+        cpu, rss = sampler.sample() if sampler else (None, None)
+        row = dict(summarize(window, interval), t=round(hi, 1), cpu_pct=cpu, rss_mb=rss)
+        series.append(row)
+        if not quiet:
+            print(f"{row['t']:>6} {row['rps']:>8.1f} {row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f} "
+                  f"{row['error_rate'] * 100:>6.1f} {_fmt(cpu, 7, 0)} {_fmt(rss, 8, 0)}")
+    for th in threads:
+        th.join()
+    by_op = defaultdict(list)
+    for r in results:
+        by_op[r.op].append(r)
+    return {
+        "concurrency": concurrency,
+        "overall": summarize(results, duration),
+        "by_op": {op: summarize(rs, duration) for op, rs in sorted(by_op.items())},
+        "series": series,
+    }
+
+
+def _fmt(value, width: int, digits: int) -> str:
+    return f"{value:>{width}.{digits}f}" if value is not None else f"{'-':>{width}}"
+
+
+def print_summary(report: dict):
+    print(f"\n{'operation':>10} {'reqs':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'err %':>6} {'degr %':>7}")
+    for op, s in list(report["by_op"].items()) + [("all", report["overall"])]:
+        print(f"{op:>10} {s['requests']:>7} {s['rps']:>8.1f} {s['p50_ms']:>8.0f} {s['p95_ms']:>8.0f} "
+              f"{s['p99_ms']:>8.0f} {s['error_rate'] * 100:>6.1f} {s['degraded_rate'] * 100:>7.1f}")
+
+
+# -------- Saturation sweep --------
+def saturation_point(levels, knee: float, slo_ms: float, max_error_rate: float):
+    """
+    The last level that still met the SLO and error limit and gained more
+    than `knee` (fractional) throughput over the previous good level.
+    Returns (report, reason the sweep saturated after it).
+    """
+    best, reason = None, "throughput still rising at the last level"
+    for rep in levels:
+        s = rep["overall"]
+        if s["error_rate"] > max_error_rate:
+            return best, f"error rate {s['error_rate']:.1%} at concurrency {rep['concurrency']}"
+        if slo_ms and s["p95_ms"] > slo_ms:
+            return best, f"p95 {s['p95_ms']:.0f} ms over the {slo_ms:g} ms SLO at concurrency {rep['concurrency']}"
+        if best is not None and s["rps"] < best["overall"]["rps"] * (1.0 + knee):
+            return best, (f"throughput {(s['rps'] / best['overall']['rps'] - 1) * 100:+.1f}% "
+                          f"(< {knee:.0%}) at concurrency {rep['concurrency']}")
+        best = rep
+    return best, reason
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load test the Flask API against a local mock deployment.")
+    ap.add_argument("--url", help="test a running server instead of starting one")
+    ap.add_argument("--server", choices=("auto", "gunicorn", "flask"), default="auto")
+    ap.add_argument("--workers", type=int, default=2, help="server processes (gunicorn)")
+    ap.add_argument("--threads", type=int, default=8, help="threads per server process")
+    ap.add_argument("--in-place", action="store_true", help="serve from the checkout instead of a temp copy")
+    ap.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                    help="extra server environment, e.g. RESUME_EMBEDDER=tfidf (repeatable)")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    ap.add_argument("--corpus", type=int, default=200, help="distinct resumes / upload files")
+    ap.add_argument("--formats", default="txt,pdf,docx", help="upload file formats, round robin")
+    ap.add_argument("--huge-ratio", type=float, default=0.0, help="share of texts pasted 40x (budget tests)")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--sweep", help="comma separated concurrency levels, e.g. 1,2,4,8,16,32")
+    ap.add_argument("--duration", type=float, default=30.0, help="measured seconds per test / sweep level")
+    ap.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before each test")
+    ap.add_argument("--interval", type=float, default=2.0, help="seconds per reported interval")
+    ap.add_argument("--timeout", type=float, default=60.0, help="client timeout per request")
+    ap.add_argument("--slo-ms", type=float, default=0.0, help="p95 latency limit for the sweep (0: none)")
+    ap.add_argument("--knee", type=float, default=0.05, help="min throughput gain per sweep level")
+    ap.add_argument("--max-error-rate", type=float, default=0.01)
+    ap.add_argument("--json", help="write every report (series included) to this file")
+    args = ap.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    print(f"building corpus: {args.corpus} resumes as {', '.join(formats)} ...")
+    corpus = Corpus(args.corpus, formats, args.huge_ratio)
+
+    server = None
+    base = args.url
+    if not base:
+        env = dict(e.split("=", 1) for e in args.env)
+        server = LocalServer(args.workers, args.threads, args.server, args.in_place, env).start()
+        base = server.url
+        print(f"server: {server.server}, {server.workers} worker(s) x {server.threads} thread(s) at {base}")
+    sampler = ResourceSampler(server.proc.pid) if server else None
+
+    reports = []
+    try:
+        levels = [int(c) for c in args.sweep.split(",")] if args.sweep else [args.concurrency]
+        for c in levels:
+            print(f"\n== concurrency {c}: {args.warmup:g}s warm-up, {args.duration:g}s measured")
+            rep = measure(base, corpus, mix, c, args.duration, args.warmup, args.interval, sampler, args.timeout)
+            print_summary(rep)
+            reports.append(rep)
+    finally:
+        if server:
+            server.stop()
+
+    if args.sweep:
+        print(f"\n{'conc':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err %':>6} {'cpu %':>7}")
+        for rep in reports:
+            s = rep["overall"]
+            cpus = [r["cpu_pct"] for r in rep["series"] if r["cpu_pct"] is not None]
+            cpu = sum(cpus) / len(cpus) if cpus else None
+            print(f"{rep['concurrency']:>5} {s['rps']:>8.1f} {s['p50_ms']:>8.0f} {s['p95_ms']:>8.0f} "
+                  f"{s['p99_ms']:>8.0f} {s['error_rate'] * 100:>6.1f} {_fmt(cpu, 7, 0)}")
+        best, reason = saturation_point(reports, args.knee, args.slo_ms, args.max_error_rate)
+        if best is None:
+            print(f"saturated at the first level: {reason}")
+        else:
+            print(f"saturation point: concurrency {best['concurrency']}, "
+                  f"{best['overall']['rps']:.1f} req/s, p95 {best['overall']['p95_ms']:.0f} ms ({reason})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "reports": reports}, f, indent=2)
+    return reports
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# ==================================================
+# benchmarks/result_memory.py - memory held by N analysis results:
+# analyze_for_role() dicts vs compact_results.CompactAnalysis
+#
+#   python benchmarks/result_memory.py [--count 100000] [--distinct 300]
+#
+# Scoring 100k resumes would take minutes, so `--distinct` resume x role
+# pairs are scored once and the retained results are then rebuilt from
+# those pieces exactly as the two code paths build them (fresh lists,
+# dicts and floats per dict; fresh byte strings per compact record).
+# ==================================================
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import suggest  # noqa: E402
+from compact_results import CompactAnalysis, improvement_flags, to_arrow  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def _samples(distinct: int):
+    csv.field_size_limit(sys.maxsize)
+    with open(os.path.join(ROOT, "UpdatedResumeDataSet.csv"), encoding="utf-8", errors="ignore") as f:
+        texts = [row["Resume"] for row in csv.DictReader(f)]
+    roles = suggest.get_all_roles()
+    out = []
+    for i in range(distinct):
+        text = texts[i % len(texts)]
+        kb, role, ev = suggest._evidence_for(text, roles[i % len(roles)])
+        ranked = suggest._rank_gaps(kb, role, kb.matrix.missing(role, ev.bits), ev, text)
+        out.append((kb, role, ev, ranked, improvement_flags(text)))
+    return out
+
+
+def as_dict(kb, role, ev, ranked, flags):
+    # the body of suggest.analyze_for_role once evidence and ranking are known
+    result = {"improvements": suggest.improvement_texts(flags)}
+    result.update(kb.catalog.payload(role, ranked, ranked=True))
+    result.update(suggest._evidence_fields(kb, role, ev))
+    return result
+
+
+def as_compact(kb, role, ev, ranked, flags):
+    return CompactAnalysis.build(kb, role, ranked, ev, flags)
+
+
+def _held(build, samples, count: int):
+    """(MB retained by `count` results, seconds to build them)."""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    held = [build(*samples[i % len(samples)]) for i in range(count)]
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return held, size / MB, elapsed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Memory of held analysis results: dicts vs compact records.")
+    ap.add_argument("--count", type=int, default=100000)
+    ap.add_argument("--distinct", type=int, default=300, help="resume x role pairs actually scored")
+    args = ap.parse_args(argv)
+
+    samples = _samples(args.distinct)
+    dicts, dict_mb, dict_s = _held(as_dict, samples, args.count)
+    json_bytes = sum(len(json.dumps(d, ensure_ascii=False).encode("utf-8")) for d in dicts[:args.distinct])
+    del dicts
+    records, compact_mb, compact_s = _held(as_compact, samples, args.count)
+    wire_bytes = sum(len(r.to_bytes()) for r in records[:args.distinct])
+
+    print(f"{args.count} analyses ({args.distinct} distinct resume x role pairs)")
+    print(f"{'':>18} {'held':>10} {'per result':>11} {'build':>8} {'wire/result':>12}")
+    print(f"{'dict':>18} {dict_mb:>8.1f}MB {dict_mb * MB / args.count:>9.0f} B {dict_s:>7.2f}s "
+          f"{json_bytes / args.distinct:>10.0f} B  (JSON)")
+    print(f"{'CompactAnalysis':>18} {compact_mb:>8.1f}MB {compact_mb * MB / args.count:>9.0f} B {compact_s:>7.2f}s "
+          f"{wire_bytes / args.distinct:>10.0f} B  (to_bytes)")
+    try:
+        table = to_arrow(records)
+        print(f"{'Arrow table':>18} {table.nbytes / MB:>8.1f}MB {table.nbytes / args.count:>9.0f} B")
+    except ImportError:
+        print("(pyarrow not installed: Arrow size skipped)")
+    print(f"saved {dict_mb - compact_mb:.1f}MB ({(1 - compact_mb / dict_mb) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
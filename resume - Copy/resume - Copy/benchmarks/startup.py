@@ -0,0 +1,77 @@
+# ==================================================
+# benchmarks/startup.py - import-time profile of the
+# Flask / Streamlit entry points vs a startup budget
+#
+#   python benchmarks/startup.py            # summary + budget check
+#   python benchmarks/startup.py --top 25   # more offenders
+# ==================================================
+import argparse
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budget per entry module (milliseconds).
+# flask_app must not pull reportlab / pdfplumber / docx / nltk / torch at import.
+STARTUP_BUDGET_MS = {
+    "flask_app": 400.0,
+    "model": 50.0,
+    "suggest": 80.0,
+    "extract_utils": 20.0,
+}
+# Modules that must stay out of a cold start entirely
+FORBIDDEN_AT_STARTUP = ("nltk", "reportlab", "pdfplumber", "docx", "torch", "sentence_transformers")
+
+
+def profile_import(module: str):
+    """Run `python -X importtime -c 'import <module>'` and return [(self_us, cumulative_us, name)]."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(self_us), int(cum_us), name.rstrip()))
+    return rows
+
+
+def summarize(module: str, rows, top: int):
+    total_ms = max((c for _, c, n in rows if n.strip() == module), default=0) / 1000.0
+    print(f"\n== import {module}: {total_ms:.1f} ms cumulative (budget {STARTUP_BUDGET_MS[module]:.0f} ms)")
+    for self_us, cum_us, name in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        print(f"  {cum_us / 1000.0:9.1f} ms  {self_us / 1000.0:8.1f} ms self  {name}")
+    loaded = {n.strip().split(".")[0] for _, _, n in rows}
+    leaked = [m for m in FORBIDDEN_AT_STARTUP if m in loaded]
+    return total_ms, leaked
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Import-time profile vs startup budget.")
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("modules", nargs="*", default=list(STARTUP_BUDGET_MS))
+    args = ap.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        try:
+            total_ms, leaked = summarize(module, profile_import(module), args.top)
+        except RuntimeError as e:
+            print(f"\n== import {module}: skipped ({e})")
+            continue
+        if total_ms > STARTUP_BUDGET_MS.get(module, float("inf")):
+            print(f"  OVER BUDGET by {total_ms - STARTUP_BUDGET_MS[module]:.1f} ms")
+            failed = True
+        if leaked:
+            print(f"  heavy modules imported at startup: {', '.join(leaked)}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+# ==================================================
+# benchmarks/upload_memory.py - peak Python heap while
+# holding an upload: legacy read() + BytesIO vs uploads.spool
+#
+#   python benchmarks/upload_memory.py --mb 5 20
+# ==================================================
+import argparse
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import uploads  # noqa: E402
+
+
+def _body(path, mb):
+    with open(path, "wb") as f:
+        f.write(os.urandom(mb * uploads.MB))
+
+
+def _peak(fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / uploads.MB
+
+
+def legacy(path):
+    # what the extractors did: raw = file.read(); pdfplumber.open(io.BytesIO(raw))
+    with open(path, "rb") as stream:
+        raw = stream.read()
+        buf = io.BytesIO(raw)  # CPython shares `raw` here until the buffer is written
+        buf.read(1)
+
+
+def spooled(path):
+    with open(path, "rb") as stream, uploads.spool(stream, "resume.pdf", limit=10 ** 12) as up:
+        with up.open() as fp:
+            fp.read(1)
+        view = up.view()
+        view[:1].tobytes()
+        view.release()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Upload memory: legacy vs spooled.")
+    ap.add_argument("--mb", type=int, nargs="+", default=[1, 5, 20])
+    args = ap.parse_args(argv)
+    print(f"{'size (MB)':>9} {'legacy peak':>12} {'spooled peak':>13} {'saved':>8}")
+    for mb in args.mb:
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            _body(path, mb)
+            a, b = _peak(lambda: legacy(path)), _peak(lambda: spooled(path))
+            print(f"{mb:>9} {a:>10.2f}MB {b:>11.2f}MB {a - b:>6.2f}MB")
+        finally:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# ==================================================
+# budgets.py - per-request time/size budgets and graceful degradation
+#   extract: first N PDF pages, a wall-time cap on the page loop, OCR only
+#            with time left, over-long text truncated
+#   embed:   no escalation to the embedding backend (TF-IDF answers)
+#   rerank:  no trained-policy / bandit rerank (heuristic order)
+#   render:  huge texts rendered plain instead of templated, or truncated
+# A Budget lives in a context variable for the duration of one request
+# (Flask request, Streamlit pipeline stage, batch upload); the stages look it up with
+# current() and record each degradation they apply. Outside a scope the
+# budget is unlimited and nothing degrades.
+# ==================================================
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+# name -> default; each is overridable as RESUME_BUDGET_<NAME>
+_DEFAULTS = {
+    "request_seconds": 30.0,          # whole request
+    "extract_seconds": 10.0,          # cap on the PDF page loop
+    "ocr_min_seconds": 5.0,           # OCR only starts with this much extract time left
+    "embed_reserve_seconds": 3.0,     # escalation to embeddings needs this much left...
+    "embed_chars": 20000,             # ...and a cleaned text no longer than this
+    "rerank_reserve_seconds": 2.0,    # policy / bandit rerank needs this much left...
+    "rerank_chars": 30000,            # ...and a text no longer than this
+    "render_seconds": 20.0,           # cap on one PDF render
+    "render_template_chars": 30000,   # longer texts get the plain renderer
+    "render_chars": 120000,           # and nothing longer than this is rendered
+    "pdf_pages": 10,                  # pages read from a PDF
+    "text_chars": 60000,              # text kept for classification / analysis
+}
+LIMITS = {k: type(v)(os.environ.get(f"RESUME_BUDGET_{k.upper()}", v)) for k, v in _DEFAULTS.items()}
+
+DEGRADATIONS = {
+    "pdf_pages_capped": "only the first pages of the PDF were read",
+    "extract_time_capped": "PDF reading stopped at its time limit",
+    "ocr_skipped": "scanned pages were not OCR'd (too little time left)",
+    "text_truncated": "the text was cut to its size limit",
+    "tfidf_only": "the category comes from the fast TF-IDF model only",
+    "rerank_skipped": "suggestions use the default order (learned reranking skipped)",
+    "render_plain": "the PDF was rendered without the template",
+    "render_truncated": "the PDF holds only the first part of the text",
+}
+# applied because the request was short of time (not only because the input is big),
+# so a result carrying one of these is not worth caching: a rerun may do the full work
+TIMING_DEPENDENT = frozenset({"extract_time_capped", "ocr_skipped", "tfidf_only", "rerank_skipped"})
+
+
+class Budget:
+    """Deadline and limits of one request, plus the degradations applied to it."""
+    __slots__ = ("started", "deadline", "limits", "applied", "bounded")
+
+    def __init__(self, limits: Dict[str, float] = None, bounded: bool = True, **overrides):
+        self.limits = dict(LIMITS if limits is None else limits, **overrides)
+        self.bounded = bounded
+        self.started = time.monotonic()
+        self.deadline = self.started + self.limits["request_seconds"] if bounded else float("inf")
+        self.applied: Dict[str, str] = {}  # name -> detail, in the order applied
+
+    def limit(self, name: str):
+        return self.limits[name] if self.bounded else float("inf")
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def stage_deadline(self, seconds_key: str) -> float:
+        """Monotonic time a capped stage must stop at (its own cap or the request's end)."""
+        return min(self.deadline, time.monotonic() + self.limit(seconds_key))
+
+    def stage_timeout(self, seconds_key: str, default: float) -> float:
+        """Timeout for a blocking call that is a stage of its own (never more than `default`)."""
+        return max(0.0, min(default, self.stage_deadline(seconds_key) - time.monotonic()))
+
+    def allows(self, reserve_key: str, size: int = 0, chars_key: str = None) -> bool:
+        """Is there `reserve_key` seconds left (and is `size` within `chars_key`)?"""
+        if not self.bounded:
+            return True
+        if chars_key is not None and size > self.limits[chars_key]:
+            return False
+        return self.remaining() >= self.limits[reserve_key]
+
+    def degrade(self, name: str, detail: str = ""):
+        if name not in self.applied:
+            self.applied[name] = detail
+            _METRICS.count(name)
+
+    def clip_text(self, text: str, chars_key: str = "text_chars", name: str = "text_truncated") -> str:
+        """Text cut to the limit (at a line break when there is one near the end)."""
+        limit = self.limit(chars_key)
+        if not text or len(text) <= limit:
+            return text
+        limit = int(limit)
+        cut = text.rfind("\n", limit - 2000, limit)
+        self.degrade(name, f"{len(text)} -> {cut if cut > 0 else limit} chars")
+        return text[:cut if cut > 0 else limit]
+
+    def report(self) -> List[dict]:
+        return [{"degradation": k, "detail": v} for k, v in self.applied.items()]
+
+
+# -------- Metrics --------
+class _Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {name: 0 for name in DEGRADATIONS}
+        self._requests = 0
+        self._degraded = 0
+        self._over_deadline = 0
+
+    def count(self, name: str):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def finish(self, budget: Budget):
+        with self._lock:
+            self._requests += 1
+            self._degraded += bool(budget.applied)
+            self._over_deadline += budget.remaining() < 0
+
+    def merge(self, applied):
+        """A budget that ran in a worker process, known only by its degradation names."""
+        with self._lock:
+            self._requests += 1
+            self._degraded += bool(applied)
+            for name in applied:
+                self._counts[name] = self._counts.get(name, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "degraded_requests": self._degraded,
+                "degraded_rate": self._degraded / self._requests if self._requests else 0.0,
+                "over_deadline": self._over_deadline,
+                "degradations": dict(self._counts),
+                "limits": dict(LIMITS),
+            }
+
+
+_METRICS = _Metrics()
+_UNBOUNDED = Budget(bounded=False)
+_CURRENT: contextvars.ContextVar = contextvars.ContextVar("resume_budget", default=None)
+
+
+def current() -> Budget:
+    """The active request's budget (an unlimited one outside any scope)."""
+    return _CURRENT.get() or _UNBOUNDED
+
+
+def begin(**overrides):
+    """Start a budget for this request; pass the returned token to end()."""
+    return _CURRENT.set(Budget(**overrides))
+
+
+def end(token):
+    budget = _CURRENT.get()
+    _CURRENT.reset(token)
+    if budget is not None:
+        _METRICS.finish(budget)
+
+
+@contextmanager
+def scope(**overrides):
+    """`with budgets.scope() as budget:` for work that is not a Flask request."""
+    token = begin(**overrides)
+    try:
+        yield _CURRENT.get()
+    finally:
+        end(token)
+
+
+def record_remote(applied):
+    """Count the degradations of a budget that ran in another process (batch workers)."""
+    _METRICS.merge(applied)
+
+
+def stats() -> dict:
+    return _METRICS.stats()
@@ -0,0 +1,130 @@
+# ==================================================
+# calibration.py - calibrated category probabilities
+#   temperature: one scalar T, softmax(log p / T); keeps the ranking
+#   isotonic:    one monotone map per category (one-vs-rest), renormalized
+# Fitted once by train_model.py on held-out resumes and pickled next to
+# each backend's classifier (embedders.ARTIFACTS[...]["calibrator"]).
+# At inference both are a few numpy ops over the predict_proba matrix.
+# ==================================================
+import numpy as np
+
+METHODS = ("temperature", "isotonic")
+_EPS = 1e-12
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    z = logits - logits.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def _nll(proba: np.ndarray, y: np.ndarray) -> float:
+    return float(-np.log(np.clip(proba[np.arange(len(y)), y], _EPS, 1.0)).mean())
+
+
+def expected_calibration_error(proba, y, bins: int = 15) -> float:
+    """Gap between top-1 confidence and accuracy, averaged over equal-width confidence bins."""
+    proba, y = np.asarray(proba), np.asarray(y)
+    conf = proba.max(axis=1)
+    correct = proba.argmax(axis=1) == y
+    which = np.minimum((conf * bins).astype(int), bins - 1)
+    ece = 0.0
+    for b in range(bins):
+        mask = which == b
+        if mask.any():
+            ece += mask.mean() * abs(correct[mask].mean() - conf[mask].mean())
+    return float(ece)
+
+
+class TemperatureCalibrator:
+    """softmax(log p / T) with T fitted to minimise held-out log loss."""
+    method = "temperature"
+
+    def __init__(self, temperature: float = 1.0):
+        self.temperature = float(temperature)
+
+    def fit(self, proba, y, lo: float = 0.001, hi: float = 100.0, iters: int = 80):
+        logits = np.log(np.clip(np.asarray(proba, dtype=np.float64), _EPS, 1.0))
+        y = np.asarray(y)
+
+        def loss(log_t):
+            return _nll(_softmax(logits / np.exp(log_t)), y)
+
+        # golden-section search over log T (the loss is unimodal in T)
+        a, b = np.log(lo), np.log(hi)
+        g = (np.sqrt(5.0) - 1.0) / 2.0
+        c, d = b - g * (b - a), a + g * (b - a)
+        fc, fd = loss(c), loss(d)
+        for _ in range(iters):
+            if fc < fd:
+                b, d, fd = d, c, fc
+                c = b - g * (b - a)
+                fc = loss(c)
+            else:
+                a, c, fc = c, d, fd
+                d = a + g * (b - a)
+                fd = loss(d)
+        self.temperature = float(np.exp((a + b) / 2.0))
+        return self
+
+    def transform(self, proba) -> np.ndarray:
+        logits = np.log(np.clip(np.asarray(proba, dtype=np.float64), _EPS, 1.0))
+        return _softmax(logits / self.temperature)
+
+    def describe(self) -> dict:
+        return {"method": self.method, "temperature": round(self.temperature, 4)}
+
+
+class IsotonicCalibrator:
+    """
+    Per-category isotonic map from raw to calibrated probability. Only the
+    fitted breakpoints are kept, so inference is np.interp per column and
+    needs no scikit-learn objects.
+    """
+    method = "isotonic"
+
+    def __init__(self):
+        self.x = []  # per class: breakpoints of the raw probability
+        self.y = []  # per class: calibrated value at each breakpoint
+
+    def fit(self, proba, y):
+        from sklearn.isotonic import IsotonicRegression
+        proba, y = np.asarray(proba, dtype=np.float64), np.asarray(y)
+        self.x, self.y = [], []
+        for c in range(proba.shape[1]):
+            target = (y == c).astype(np.float64)
+            if target.min() == target.max():  # class absent (or alone) in the held-out set
+                self.x.append(np.array([0.0, 1.0]))
+                self.y.append(np.array([0.0, 1.0]))
+                continue
+            iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(proba[:, c], target)
+            self.x.append(iso.X_thresholds_.astype(np.float64))
+            self.y.append(iso.y_thresholds_.astype(np.float64))
+        return self
+
+    def transform(self, proba) -> np.ndarray:
+        proba = np.asarray(proba, dtype=np.float64)
+        out = np.empty_like(proba)
+        for c in range(proba.shape[1]):
+            out[:, c] = np.interp(proba[:, c], self.x[c], self.y[c])
+        total = out.sum(axis=1, keepdims=True)
+        # a row every map sends to 0 keeps its raw distribution
+        return np.where(total > _EPS, out / np.maximum(total, _EPS), proba)
+
+    def describe(self) -> dict:
+        return {"method": self.method, "breakpoints": int(sum(len(x) for x in self.x))}
+
+
+def build(method: str = "temperature"):
+    if method == "temperature":
+        return TemperatureCalibrator()
+    if method == "isotonic":
+        return IsotonicCalibrator()
+    raise ValueError(f"Unknown calibration method '{method}'. Choose one of: {', '.join(METHODS)}")
+
+
+def apply(calibrator, proba) -> np.ndarray:
+    """Calibrated probabilities for a predict_proba matrix (unchanged when no calibrator is fitted)."""
+    if calibrator is None:
+        return np.asarray(proba)
+    return calibrator.transform(proba)
@@ -1,7 +1,10 @@
 # categories.py
-CATEGORY_SKILLS = {
-    "Data Science": ["Python", "Pandas", "NumPy", "Scikit-learn", "Machine Learning", "Deep Learning"],
-    "Web Development": ["HTML", "CSS", "JavaScript", "React", "Node.js", "Git"],
-    "Android Development": ["Java", "Kotlin", "Android Studio", "XML", "Firebase"],
-    "AI/ML Engineer": ["Python", "TensorFlow", "PyTorch", "NLP", "Computer Vision"]
-}
+# Category -> skills view over the knowledge base (kb/roles.json).
+# Resolved on access so it always reflects the live KB snapshot.
+import knowledge_base
+
+
+def __getattr__(name):
+    if name == "CATEGORY_SKILLS":
+        return {role.title(): list(skills) for role, skills in knowledge_base.current().role_skills.items()}
+    raise AttributeError(f"module 'categories' has no attribute '{name}'")
@@ -0,0 +1,192 @@
+# ==================================================
+# compact_results.py - analysis results as small immutable records
+#
+# An analysis is stored as ids into the knowledge-base snapshot that
+# produced it: the role's index, the ranked missing skills as uint16
+# skill ids, the role's skill strengths quantized to uint16 (exact for
+# the 4-decimal strengths skill_evidence reports) and the improvement
+# hints as bit flags. Skill names, projects, courses and certificates
+# are only looked up in the shared catalog when a record is expanded.
+#
+#   rec = suggest.analyze_compact(text, role)
+#   rec.to_dict()          == suggest.analyze_for_role(text, role)
+#   CompactAnalysis.from_bytes(rec.to_bytes()) == rec
+#   from_arrow(to_arrow(records)) == records     (pyarrow, for batches)
+# ==================================================
+import struct
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Sequence
+
+import knowledge_base
+from knowledge_base import KnowledgeBaseError
+
+FORMAT_VERSION = 1
+NO_ROLE = 0xFFFF
+STRENGTH_SCALE = 10000
+SNAPSHOTS_KEPT = 4  # KB versions whose records still expand after a reload
+
+# Hints on the resume as a whole; a record keeps which ones apply as bits
+IMPROVEMENTS = (
+    "Expand your resume with more details on projects, achievements, and skills.",
+    "Add a section for Experience, Projects, or Internships.",
+    "Include your Education details.",
+)
+
+
+def improvement_flags(resume_text: str) -> int:
+    lower = resume_text.lower()
+    flags = 0
+    if len(resume_text.split()) < 200:
+        flags |= 1
+    if not any(word in lower for word in ["experience", "project", "internship"]):
+        flags |= 2
+    if not any(word in lower for word in ["education", "bachelor", "master", "degree"]):
+        flags |= 4
+    return flags
+
+
+def improvement_texts(flags: int) -> List[str]:
+    return [msg for i, msg in enumerate(IMPROVEMENTS) if flags >> i & 1]
+
+
+# Snapshots records were built against, so ids stay resolvable after a KB reload;
+# only the SNAPSHOTS_KEPT most recently used are kept (each one is a full KB)
+_SNAPSHOTS: "OrderedDict[str, knowledge_base.KnowledgeBase]" = OrderedDict()
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def _remember(kb):
+    with _SNAPSHOTS_LOCK:
+        _SNAPSHOTS.setdefault(kb.version, kb)
+        _SNAPSHOTS.move_to_end(kb.version)
+        while len(_SNAPSHOTS) > SNAPSHOTS_KEPT:
+            _SNAPSHOTS.popitem(last=False)
+
+
+def _snapshot(version: str):
+    with _SNAPSHOTS_LOCK:
+        kb = _SNAPSHOTS.get(version)
+        if kb is not None:
+            _SNAPSHOTS.move_to_end(version)
+    if kb is None:
+        kb = knowledge_base.current()
+        if kb.version != version:
+            raise KnowledgeBaseError(f"record was built with KB {version}; the active KB is {kb.version}")
+        _remember(kb)
+    return kb
+
+
+def _pack_u16(values: Sequence[int]) -> bytes:
+    return struct.pack(f"<{len(values)}H", *values)
+
+
+def _unpack_u16(data: bytes):
+    return struct.unpack(f"<{len(data) // 2}H", data)
+
+
+class CompactAnalysis(NamedTuple):
+    """One analyze_for_role() result in ~200 bytes instead of a dict of lists."""
+    kb_version: str       # interned: every record of a snapshot shares one string
+    role_id: int          # index into kb.matrix.roles, NO_ROLE if unknown
+    missing: bytes        # uint16 skill ids, ranked
+    strength: bytes       # uint16 strength * STRENGTH_SCALE, in the role table's order
+    improvements: int     # bits into IMPROVEMENTS
+
+    @classmethod
+    def build(cls, kb, role: str, ranked_missing: Sequence[str], evidence, flags: int) -> "CompactAnalysis":
+        _remember(kb)
+        matrix = kb.matrix
+        skills = kb.role_skills.get(role, ())
+        return cls(
+            sys.intern(kb.version),
+            matrix.role_index.get(role, NO_ROLE),
+            _pack_u16([matrix.skill_id[s] for s in ranked_missing]),
+            _pack_u16([round(v * STRENGTH_SCALE) for v in evidence.vector(skills)]),
+            flags,
+        )
+
+    # -------- lazy views --------
+    @property
+    def kb(self):
+        return _snapshot(self.kb_version)
+
+    @property
+    def role(self):
+        return None if self.role_id == NO_ROLE else self.kb.matrix.roles[self.role_id]
+
+    def missing_skills(self) -> List[str]:
+        vocab = self.kb.matrix.vocab
+        return [vocab[i] for i in _unpack_u16(self.missing)]
+
+    def strengths(self) -> Dict[str, float]:
+        kb = self.kb
+        skills = kb.role_skills.get(self.role, ()) if self.role_id != NO_ROLE else ()
+        return {s: q / STRENGTH_SCALE for s, q in zip(skills, _unpack_u16(self.strength))}
+
+    def weak_skills(self) -> List[str]:
+        from skill_evidence import WEAK_STRENGTH
+        strength = self.strengths()
+        out = [s for s, v in strength.items() if 0.0 < v < WEAK_STRENGTH]
+        return sorted(out, key=strength.__getitem__)
+
+    def suggestions(self) -> dict:
+        """missing_skills / projects / courses / certificates, from the KB's shared catalog."""
+        return self.kb.catalog.payload(self.role, self.missing_skills(), ranked=True)
+
+    def to_dict(self) -> dict:
+        """The same dict analyze_for_role() returns."""
+        result = {"improvements": improvement_texts(self.improvements)}
+        result.update(self.suggestions())
+        result.update(weak_skills=self.weak_skills(), skill_strength=self.strengths(),
+                      kb_version=self.kb_version)
+        return result
+
+    # -------- binary form --------
+    # <B format, B len(kb_version), kb_version, H role_id, B flags,
+    #  H n_missing, n_missing * H, H n_strength, n_strength * H>   (little endian)
+    def to_bytes(self) -> bytes:
+        version = self.kb_version.encode("utf-8")
+        return b"".join((
+            struct.pack("<BB", FORMAT_VERSION, len(version)), version,
+            struct.pack("<HBH", self.role_id, self.improvements, len(self.missing) // 2), self.missing,
+            struct.pack("<H", len(self.strength) // 2), self.strength,
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactAnalysis":
+        fmt, n = struct.unpack_from("<BB", data, 0)
+        if fmt != FORMAT_VERSION:
+            raise ValueError(f"unsupported compact analysis format {fmt}")
+        pos = 2 + n
+        version = sys.intern(bytes(data[2:pos]).decode("utf-8"))
+        role_id, flags, n_missing = struct.unpack_from("<HBH", data, pos)
+        pos += 5
+        missing = bytes(data[pos:pos + 2 * n_missing])
+        pos += 2 * n_missing
+        (n_strength,) = struct.unpack_from("<H", data, pos)
+        pos += 2
+        return cls(version, role_id, missing, bytes(data[pos:pos + 2 * n_strength]), flags)
+
+
+# -------- Arrow (batches) --------
+def to_arrow(records: Sequence[CompactAnalysis]):
+    """A pyarrow Table: kb_version dictionary-encoded, id lists as list<uint16>."""
+    import pyarrow as pa
+    return pa.table({
+        "kb_version": pa.array([r.kb_version for r in records]).dictionary_encode(),
+        "role_id": pa.array([r.role_id for r in records], pa.uint16()),
+        "missing": pa.array([_unpack_u16(r.missing) for r in records], pa.list_(pa.uint16())),
+        "strength": pa.array([_unpack_u16(r.strength) for r in records], pa.list_(pa.uint16())),
+        "improvements": pa.array([r.improvements for r in records], pa.uint8()),
+    })
+
+
+def from_arrow(table) -> List[CompactAnalysis]:
+    cols = table.to_pydict()
+    return [
+        CompactAnalysis(sys.intern(str(v)), role_id, _pack_u16(m), _pack_u16(s), flags)
+        for v, role_id, m, s, flags in zip(cols["kb_version"], cols["role_id"], cols["missing"],
+                                           cols["strength"], cols["improvements"])
+    ]
@@ -0,0 +1,202 @@
+# ==============================
+# contact_fields.py
+# Email / phone / LinkedIn / GitHub (and name) from resume text in one regex pass
+# ==============================
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Tuple
+
+FIELDS = ("email", "linkedin", "github", "phone")
+HEADER_LINES = 10      # contact details almost always sit in the first lines...
+HEADER_CHARS = 800     # ...unless those lines are huge (PDF text without breaks)
+NAME_LINES = 20
+MISSING = "—"
+
+# Emails and URLs may only start where a token starts, phones where a digit
+# run starts; the leftmost match of each starts there anyway, and the shared
+# lookbehind makes most positions fail in one step. Alternatives are tried
+# left to right at each position, so an email or a URL is consumed before
+# the phone pattern could read digits inside it.
+_TOKEN_START = r"(?<![A-Za-z0-9._%+-])"
+_DIGITS_START = r"(?<![0-9])"
+_FIELD_PATTERNS = {
+    "email": r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}",
+    "linkedin": r"(?:https?://)?(?:www\.)?linkedin\.com/[A-Za-z0-9_/.\-]+",
+    "github": r"(?:https?://)?(?:www\.)?github\.com/[A-Za-z0-9_/.\-]+",
+    "phone": r"(?:\+?\d{1,3}[- ]*)?(?:\d[ -]?){9,12}\d",
+}
+
+# A field can only match where its marker occurs; fields whose marker is
+# absent are left out of the alternation before any regex work
+_MARKERS = {"email": "@", "linkedin": "linkedin", "github": "github"}
+
+
+@lru_cache(maxsize=None)
+def _pattern(fields: FrozenSet[str]) -> "re.Pattern":
+    """One compiled alternation of named groups for these fields (at most 15 subsets)."""
+    token = "|".join(f"(?P<{f}>{_FIELD_PATTERNS[f]})" for f in FIELDS if f in fields and f != "phone")
+    branches = [f"{_TOKEN_START}(?:{token})"] if token else []
+    if "phone" in fields:
+        branches.append(f"{_DIGITS_START}(?P<phone>{_FIELD_PATTERNS['phone']})")
+    return re.compile("|".join(branches), re.IGNORECASE)
+
+
+class ContactMatch(NamedTuple):
+    field: str
+    value: str
+    start: int
+    end: int
+
+
+class ContactInfo(NamedTuple):
+    name: str
+    matches: Tuple[ContactMatch, ...]  # in text order
+
+    def all(self, field: str) -> List[str]:
+        return [m.value for m in self.matches if m.field == field]
+
+    def first(self, field: str) -> str:
+        """First value of a field, or "—" like the single-field extractors."""
+        for m in self.matches:
+            if m.field == field:
+                return m.value
+        return MISSING
+
+    def as_dict(self) -> Dict[str, object]:
+        out = {"name": self.name}
+        for f in FIELDS:
+            out[f] = self.first(f)
+            out[f + "s"] = self.all(f)
+        return out
+
+
+def header_end(text: str, max_lines: int = HEADER_LINES, max_chars: int = HEADER_CHARS) -> int:
+    """Offset just past the header region (first lines, capped in characters, cut at a line end)."""
+    pos = 0
+    for _ in range(max_lines):
+        nl = text.find("\n", pos, max_chars + 1)
+        if nl < 0:
+            break
+        pos = nl + 1
+    if pos == 0:  # no line break within the cap: stop at a space so no match is cut in two
+        if len(text) <= max_chars:
+            return len(text)
+        cut = text.rfind(" ", 0, max_chars)
+        return cut if cut > 0 else max_chars
+    return pos
+
+
+def _scan(fields: FrozenSet[str], text: str, start: int, end: int, out: List[ContactMatch]):
+    region = text[start:end].lower()
+    present = frozenset(f for f in fields if _MARKERS.get(f, "") in region)
+    if not present:
+        return
+    for m in _pattern(present).finditer(text, start, end):
+        field = m.lastgroup
+        value = m.group(field)
+        if field == "phone":
+            value = value.strip()
+        out.append(ContactMatch(field, value, m.start(), m.start() + len(value)))
+
+
+def find_contacts(text: str, full: bool = False) -> List[ContactMatch]:
+    """
+    Every contact match with offsets. The header is scanned first; the rest
+    of the text is scanned only for fields the header did not contain
+    (or for all of them with full=True).
+    """
+    text = text or ""
+    end = header_end(text)
+    found: List[ContactMatch] = []
+    _scan(frozenset(FIELDS), text, 0, end, found)
+    wanted = frozenset(FIELDS) if full else frozenset(FIELDS) - {m.field for m in found}
+    if wanted and end < len(text):
+        _scan(wanted, text, end, len(text), found)
+    return found
+
+
+def first_value(text: str, field: str) -> str:
+    """First match of one field (header first), or "—"."""
+    found: List[ContactMatch] = []
+    text = text or ""
+    end = header_end(text)
+    _scan(frozenset((field,)), text, 0, end, found)
+    if not found and end < len(text):
+        _scan(frozenset((field,)), text, end, len(text), found)
+    return found[0].value if found else MISSING
+
+
+# -------- Name --------
+_NAME_SPACES = re.compile(r"[\u00A0\u200B]+")
+_PROPER_NAME = re.compile(r"^[A-Z][a-z]+(\s[A-Z]\.)?(\s[A-Z][a-z]+){1,2}$")
+_NOT_A_NAME = re.compile(r"[\d@:/\\]")
+_EXTENSION = re.compile(r"\.[^.]+$")
+_FILENAME_NOISE = re.compile(r"[_\d]+")
+_SKIP_KEYWORDS = (
+    "resume", "curriculum vitae", "cv",
+    "career objective", "objective", "profile",
+    "education", "qualification", "qualifications",
+    "skills", "experience", "projects",
+    "strength", "hobbies", "achievements", "awards",
+    "journal", "publication", "declaration", "contact",
+    "email", "mobile", "phone", "address", "linkedin", "github",
+)
+
+
+def _top_lines(text: str, n: int) -> List[str]:
+    """First n non-empty stripped lines, without splitting the rest of the text."""
+    lines, pos, size = [], 0, len(text)
+    while pos < size and len(lines) < n:
+        nl = text.find("\n", pos)
+        if nl < 0:
+            nl = size
+        line = _NAME_SPACES.sub(" ", text[pos:nl]).strip()
+        if line:
+            lines.append(line)
+        pos = nl + 1
+    return lines
+
+
+def _is_skip(line: str) -> bool:
+    low = line.lower().strip().strip(":")
+    return any(k in low for k in _SKIP_KEYWORDS)
+
+
+def extract_name(text: str, filename: str = "") -> str:
+    """Heuristic person-name guess from the first lines, else from the file name."""
+    if not text:
+        return "Candidate"
+    top_lines = _top_lines(text, NAME_LINES)
+
+    # 1) Strong rule: ALL CAPS 2–3 words near top
+    for line in top_lines[:5]:
+        if line.isupper() and 1 < len(line.split()) <= 3 and not _is_skip(line):
+            return line.title()
+
+    # 2) Proper-cased names
+    for line in top_lines:
+        if not _is_skip(line) and _PROPER_NAME.match(line):
+            return line
+
+    # 3) Backup: capitalized words, 2–3 tokens, no digits/emails
+    for line in top_lines:
+        if _is_skip(line) or _NOT_A_NAME.search(line):
+            continue
+        words = line.split()
+        if 1 < len(words) <= 3 and sum(1 for w in words if w[0].isupper()) >= 2:
+            return line
+
+    # 4) Fallback: filename
+    if filename:
+        base = filename.split("/")[-1].split("\\")[-1]
+        base = _EXTENSION.sub("", base)                # remove extension
+        base = _FILENAME_NOISE.sub(" ", base).strip()  # remove underscores/digits
+        if base:
+            return base.title()
+
+    return "Candidate"
+
+
+def extract_contact_info(text: str, filename: str = "", full: bool = False) -> ContactInfo:
+    """Name guess plus every contact match: what the editor pages show, in one call."""
+    return ContactInfo(extract_name(text, filename), tuple(find_contacts(text, full)))
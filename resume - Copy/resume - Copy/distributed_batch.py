@@ -0,0 +1,511 @@
+# ==================================================
+# distributed_batch.py - sharded batch scoring across several hosts
+#
+#   python distributed_batch.py coordinator /data/resumes --out runs/nightly --shards 256
+#   python distributed_batch.py worker --coordinator http://coord:8765      (on each box)
+#   python distributed_batch.py status --coordinator http://coord:8765
+#   python distributed_batch.py compact runs/nightly [--format parquet]
+#
+# The coordinator hashes every input file and assigns it to shard
+# int(sha1[:8]) % N, so identical resumes always land in the same shard
+# and are scored once. Workers lease a shard over plain HTTP/JSON, fetch
+# the files (from a shared path when they can see it, otherwise from the
+# coordinator), run them through batch_engine (extract -> clean -> embed ->
+# classify via model.py), and post the results back. The coordinator writes
+# one partition file per shard. Leases expire, so a crashed worker's shard
+# is handed out again, up to MAX_ATTEMPTS times.
+# ==================================================
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8765
+DEFAULT_SHARDS = 64
+LEASE_SECONDS = float(os.environ.get("RESUME_SHARD_LEASE_SECONDS", "600"))
+MAX_ATTEMPTS = 3
+FINISH_GRACE_SECONDS = 15.0  # keep answering "finished" so polling workers can exit
+MAX_UNREACHABLE = 12         # consecutive failed polls before a worker gives up
+RESUME_SUFFIXES = (".pdf", ".docx", ".txt")
+OUTPUT_FIELDS = ("hash", "name", "category", "confidence", "top_k", "degradations", "error")
+
+
+def shard_of(content_hash: str, shards: int) -> int:
+    return int(content_hash[:8], 16) % shards
+
+
+def _file_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _iter_inputs(inputs):
+    for root in inputs:
+        if os.path.isfile(root):
+            yield root
+            continue
+        for dirpath, _, files in os.walk(root):
+            for fn in sorted(files):
+                if fn.lower().endswith(RESUME_SUFFIXES):
+                    yield os.path.join(dirpath, fn)
+
+
+def _atomic_write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# -------- Coordinator --------
+class Coordinator:
+    """
+    Shard plan + lease table for one run directory:
+      <out>/plan.json             shard count and inputs
+      <out>/shards/shard-NNNNN.jsonl   {"path", "name", "hash"} per unique file
+      <out>/state.json            status / attempts per shard (survives restarts)
+      <out>/parts/shard=NNNNN/part.jsonl   results, one row per file
+    """
+
+    def __init__(self, out_dir: str, lease_seconds: float = LEASE_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS, retry_failed: bool = False):
+        self.out_dir = out_dir
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._items = {}  # shard -> list of manifest entries (for serving files)
+        with open(os.path.join(out_dir, "plan.json"), "r", encoding="utf-8") as f:
+            self.plan = json.load(f)
+        self.state = self._load_state()
+        if retry_failed:  # another round for shards that used up their attempts
+            for st in self.state.values():
+                if st["status"] == "failed":
+                    st.update(status="pending", attempts=0)
+            self._save_state()
+
+    # ---- planning ----
+    @classmethod
+    def plan_run(cls, inputs, out_dir: str, shards: int = DEFAULT_SHARDS) -> dict:
+        """Hash and shard every input file once; an existing plan is reused as-is."""
+        plan_path = os.path.join(out_dir, "plan.json")
+        if os.path.exists(plan_path):
+            with open(plan_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        shard_dir = os.path.join(out_dir, "shards")
+        os.makedirs(shard_dir, exist_ok=True)
+        handles = [open(os.path.join(shard_dir, f"shard-{i:05d}.jsonl"), "w", encoding="utf-8")
+                   for i in range(shards)]
+        seen, files, dupes = set(), 0, 0
+        try:
+            for path in _iter_inputs(inputs):
+                h = _file_sha1(path)
+                files += 1
+                if h in seen:
+                    dupes += 1
+                    continue
+                seen.add(h)
+                entry = {"path": os.path.abspath(path), "name": os.path.basename(path), "hash": h}
+                handles[shard_of(h, shards)].write(json.dumps(entry, ensure_ascii=False) + "\n")
+        finally:
+            for f in handles:
+                f.close()
+        plan = {"shards": shards, "inputs": [os.path.abspath(p) for p in inputs],
+                "files": files, "unique": len(seen), "duplicates": dupes,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        _atomic_write(plan_path, json.dumps(plan, indent=2).encode("utf-8"))
+        return plan
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.out_dir, "shards", f"shard-{shard:05d}.jsonl")
+
+    def part_path(self, shard: int) -> str:
+        return os.path.join(self.out_dir, "parts", f"shard={shard:05d}", "part.jsonl")
+
+    def _load_state(self) -> dict:
+        path = os.path.join(self.out_dir, "state.json")
+        state = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                state = {int(k): v for k, v in json.load(f).items()}
+        for i in range(self.plan["shards"]):
+            s = state.setdefault(i, {"status": "pending", "attempts": 0})
+            if s["status"] == "leased":  # leases don't survive a coordinator restart
+                s.update(status="pending", worker=None, expires=None)
+            if s["status"] == "pending" and os.path.getsize(self._shard_path(i)) == 0:
+                s["status"] = "done"  # nothing hashed into this shard
+        return state
+
+    def _save_state(self):
+        _atomic_write(os.path.join(self.out_dir, "state.json"),
+                      json.dumps(self.state, indent=0).encode("utf-8"))
+
+    # ---- lease protocol ----
+    def _expire(self, now: float):
+        for s in self.state.values():
+            if s["status"] == "leased" and s["expires"] < now:
+                s["status"] = "pending" if s["attempts"] < self.max_attempts else "failed"
+                s["error"] = f"lease expired (worker {s.get('worker')})"
+
+    def lease(self, worker: str) -> dict:
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            for shard, s in sorted(self.state.items()):
+                if s["status"] == "pending":
+                    s.update(status="leased", worker=worker, attempts=s["attempts"] + 1,
+                             expires=now + self.lease_seconds)
+                    self._save_state()
+                    items = self._read_items(shard)
+                    return {"shard": shard, "attempt": s["attempts"], "lease_seconds": self.lease_seconds,
+                            "items": items}
+            finished = all(s["status"] in ("done", "failed") for s in self.state.values())
+            return {"shard": None, "finished": finished}
+
+    def _read_items(self, shard: int) -> list:
+        items = self._items.get(shard)
+        if items is None:
+            with open(self._shard_path(shard), "r", encoding="utf-8") as f:
+                items = [json.loads(line) for line in f if line.strip()]
+            self._items[shard] = items
+        return items
+
+    def _owns(self, shard: int, worker: str, attempt: int) -> bool:
+        s = self.state.get(shard)
+        return bool(s) and s["status"] == "leased" and s.get("worker") == worker and s["attempts"] == attempt
+
+    def heartbeat(self, shard: int, worker: str, attempt: int) -> bool:
+        with self._lock:
+            if not self._owns(shard, worker, attempt):
+                return False
+            self.state[shard]["expires"] = time.time() + self.lease_seconds
+            return True
+
+    def complete(self, shard: int, worker: str, attempt: int, body: bytes) -> bool:
+        """Store a shard's NDJSON results; stale leases (reassigned shards) are refused."""
+        with self._lock:
+            if not self._owns(shard, worker, attempt):
+                return False
+        _atomic_write(self.part_path(shard), body)
+        rows = body.count(b"\n")
+        with self._lock:
+            s = self.state[shard]
+            s.update(status="done", worker=worker, rows=rows, expires=None, error=None)
+            self._items.pop(shard, None)
+            self._save_state()
+        return True
+
+    def fail(self, shard: int, worker: str, attempt: int, error: str) -> bool:
+        with self._lock:
+            if not self._owns(shard, worker, attempt):
+                return False
+            s = self.state[shard]
+            s.update(status="pending" if s["attempts"] < self.max_attempts else "failed",
+                     error=error, expires=None)
+            self._save_state()
+            return True
+
+    def item_path(self, shard: int, index: int) -> str:
+        with self._lock:
+            return self._read_items(shard)[index]["path"]
+
+    def status(self) -> dict:
+        with self._lock:
+            self._expire(time.time())
+            counts = {}
+            for s in self.state.values():
+                counts[s["status"]] = counts.get(s["status"], 0) + 1
+            failed = {i: s.get("error") for i, s in self.state.items() if s["status"] == "failed"}
+        return {"plan": self.plan, "shards": counts, "failed": failed,
+                "finished": counts.get("pending", 0) + counts.get("leased", 0) == 0}
+
+
+def _handler(coord: Coordinator):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):  # keep worker polling out of stderr
+            pass
+
+        def _json(self, obj, code: int = 200):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def do_GET(self):
+            parts = self.path.strip("/").split("/")
+            if parts == ["status"]:
+                return self._json(coord.status())
+            if len(parts) == 4 and parts[0] == "shards" and parts[2] == "items":
+                try:
+                    path = coord.item_path(int(parts[1]), int(parts[3]))
+                    with open(path, "rb") as f:
+                        data = f.read()
+                except (ValueError, IndexError, OSError) as e:
+                    return self._json({"error": str(e)}, 404)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            self._json({"error": "not found"}, 404)
+
+        def do_POST(self):
+            parts = self.path.strip("/").split("?")[0].split("/")
+            if parts == ["lease"]:
+                return self._json(coord.lease(json.loads(self._body() or b"{}").get("worker", "?")))
+            if len(parts) == 3 and parts[0] == "shards":
+                shard = int(parts[1])
+                worker = self.headers.get("X-Worker", "?")
+                attempt = int(self.headers.get("X-Attempt", "0"))
+                if parts[2] == "heartbeat":
+                    ok = coord.heartbeat(shard, worker, attempt)
+                elif parts[2] == "result":
+                    ok = coord.complete(shard, worker, attempt, self._body())
+                elif parts[2] == "fail":
+                    ok = coord.fail(shard, worker, attempt, self._body().decode("utf-8", "replace"))
+                else:
+                    return self._json({"error": "not found"}, 404)
+                return self._json({"ok": ok}, 200 if ok else 409)
+            self._json({"error": "not found"}, 404)
+
+    return Handler
+
+
+def serve(coord: Coordinator, host: str = "0.0.0.0", port: int = DEFAULT_PORT, exit_when_done: bool = False):
+    server = ThreadingHTTPServer((host, port), _handler(coord))
+    if exit_when_done:
+        def watch():
+            while not coord.status()["finished"]:
+                time.sleep(1.0)
+            time.sleep(FINISH_GRACE_SECONDS)
+            server.shutdown()
+        threading.Thread(target=watch, daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+# -------- Worker --------
+class _Client:
+    def __init__(self, base_url: str, worker: str, timeout: float = 60.0):
+        self.base = base_url.rstrip("/")
+        self.worker = worker
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, body: bytes = None, headers: dict = None):
+        req = urllib.request.Request(self.base + path, data=body, method=method,
+                                     headers={"X-Worker": self.worker, **(headers or {})})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def json(self, method: str, path: str, obj=None, headers: dict = None):
+        body = json.dumps(obj).encode("utf-8") if obj is not None else None
+        code, data = self.request(method, path, body, headers)
+        return code, json.loads(data or b"{}")
+
+
+def _row(rec: dict, shard: int, role: str = None) -> dict:
+    if role:
+        from batch_engine import skill_gap
+        row = skill_gap(rec, role)
+    else:
+        row = {k: rec.get(k) for k in OUTPUT_FIELDS}
+    row["shard"] = shard
+    return row
+
+
+def run_shard(lease: dict, client: _Client, engine, role: str = None) -> bytes:
+    """
+    Score every file of a leased shard; returns the NDJSON partition body.
+    A file that can't be read or fetched becomes an error row of its own;
+    only coordinator / protocol errors (raised by the client) fail the shard.
+    """
+    shard = lease["shard"]
+    errors = []
+
+    def unreadable(item: dict, error: str) -> dict:
+        return {"hash": item["hash"], "name": item["name"], "category": None, "confidence": None,
+                "top_k": [], "degradations": [], "error": error}
+
+    def uploads():
+        for i, item in enumerate(lease["items"]):
+            path = item["path"]
+            if os.path.exists(path):  # shared filesystem
+                try:
+                    with open(path, "rb") as f:
+                        raw = f.read()
+                except OSError as e:  # deleted / unreadable since the shards were planned
+                    errors.append(unreadable(item, f"{type(e).__name__}: {e}"))
+                    continue
+            else:
+                code, raw = client.request("GET", f"/shards/{shard}/items/{i}")
+                if code != 200:
+                    errors.append(unreadable(item, f"cannot fetch {item['name']}: HTTP {code}"))
+                    continue
+            yield item["name"], raw
+
+    recs = list(engine.run(uploads())) + errors
+    lines = [json.dumps(_row(rec, shard, role), ensure_ascii=False) for rec in recs]
+    lines.sort()  # deterministic partitions regardless of completion order
+    return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+
+def worker_loop(coordinator_url: str, workers: int = None, role: str = None, poll_seconds: float = 5.0,
+                worker_id: str = None) -> int:
+    from batch_engine import BatchEngine
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    client = _Client(coordinator_url, worker_id)
+    engine = BatchEngine(max_workers=workers) if workers else BatchEngine()
+    done = unreachable = 0
+    try:
+        while True:
+            try:
+                _, lease = client.json("POST", "/lease", {"worker": worker_id})
+                unreachable = 0
+            except (urllib.error.URLError, ConnectionError) as e:
+                unreachable += 1
+                if unreachable >= MAX_UNREACHABLE:
+                    print(f"[{worker_id}] giving up, coordinator unreachable: {e}", file=sys.stderr)
+                    return done
+                time.sleep(poll_seconds)
+                continue
+            if lease.get("shard") is None:
+                if lease.get("finished"):
+                    return done
+                time.sleep(poll_seconds)  # remaining shards are leased elsewhere
+                continue
+
+            shard, attempt = lease["shard"], lease["attempt"]
+            headers = {"X-Attempt": str(attempt)}
+            stop = threading.Event()
+
+            def beat():
+                while not stop.wait(lease["lease_seconds"] / 3.0):
+                    client.request("POST", f"/shards/{shard}/heartbeat", b"", headers)
+            threading.Thread(target=beat, daemon=True).start()
+            try:
+                body = run_shard(lease, client, engine, role)
+                code, _ = client.request("POST", f"/shards/{shard}/result", body,
+                                         {**headers, "Content-Type": "application/x-ndjson"})
+                if code == 200:
+                    done += 1
+                print(f"[{worker_id}] shard {shard} attempt {attempt}: {len(lease['items'])} files"
+                      f" -> {'ok' if code == 200 else f'rejected ({code})'}", file=sys.stderr)
+            except Exception as e:
+                client.request("POST", f"/shards/{shard}/fail", f"{type(e).__name__}: {e}".encode("utf-8"), headers)
+                print(f"[{worker_id}] shard {shard} failed: {e}", file=sys.stderr)
+            finally:
+                stop.set()
+    finally:
+        engine.shutdown()
+
+
+# -------- Compaction --------
+def compact(out_dir: str, rows_per_file: int = 100_000, fmt: str = "jsonl") -> dict:
+    """
+    Merge every shard partition into <out>/compacted/part-NNNNN.<fmt>,
+    one row per content hash (a successful row wins over an error row).
+    """
+    parts_dir = os.path.join(out_dir, "parts")
+    best = {}
+    for dirpath, _, files in os.walk(parts_dir):
+        for fn in files:
+            if not fn.endswith(".jsonl"):
+                continue
+            with open(os.path.join(dirpath, fn), "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    row = json.loads(line)
+                    prev = best.get(row["hash"])
+                    if prev is None or (prev.get("error") and not row.get("error")):
+                        best[row["hash"]] = row
+
+    dest = os.path.join(out_dir, "compacted")
+    os.makedirs(dest, exist_ok=True)
+    for old in os.listdir(dest):
+        os.unlink(os.path.join(dest, old))
+    rows = [best[h] for h in sorted(best)]
+    files = []
+    for n, start in enumerate(range(0, len(rows), rows_per_file)):
+        chunk = rows[start:start + rows_per_file]
+        path = os.path.join(dest, f"part-{n:05d}.{fmt}")
+        if fmt == "parquet":
+            import pandas as pd  # needs pyarrow or fastparquet
+            pd.DataFrame(chunk).to_parquet(path, index=False)
+        else:
+            _atomic_write(path, "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in chunk).encode("utf-8"))
+        files.append(path)
+    errors = sum(1 for r in rows if r.get("error"))
+    return {"rows": len(rows), "errors": errors, "files": files}
+
+
+# -------- CLI --------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Sharded multi-host batch scoring.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    c = sub.add_parser("coordinator", help="plan shards and hand them out over HTTP")
+    c.add_argument("inputs", nargs="+", help="resume files or directories")
+    c.add_argument("--out", required=True, help="run directory (plan, state, partitions)")
+    c.add_argument("--shards", type=int, default=DEFAULT_SHARDS)
+    c.add_argument("--host", default="0.0.0.0")
+    c.add_argument("--port", type=int, default=DEFAULT_PORT)
+    c.add_argument("--exit-when-done", action="store_true", help="stop (and compact) once every shard is done")
+    c.add_argument("--retry-failed", action="store_true", help="give failed shards of an existing run new attempts")
+
+    w = sub.add_parser("worker", help="lease and score shards until the run is finished")
+    w.add_argument("--coordinator", required=True, help="e.g. http://coord-host:8765")
+    w.add_argument("--workers", type=int, default=None, help="processes on this host")
+    w.add_argument("--role", default=None, help="also compute skill coverage for this role")
+
+    s = sub.add_parser("status", help="print shard counts of a running coordinator")
+    s.add_argument("--coordinator", required=True)
+
+    k = sub.add_parser("compact", help="merge shard partitions into a few large files")
+    k.add_argument("out")
+    k.add_argument("--rows-per-file", type=int, default=100_000)
+    k.add_argument("--format", choices=("jsonl", "parquet"), default="jsonl")
+    args = ap.parse_args(argv)
+
+    if args.command == "coordinator":
+        plan = Coordinator.plan_run(args.inputs, args.out, args.shards)
+        print(f"{plan['unique']} unique files ({plan['duplicates']} duplicates) in {plan['shards']} shards;"
+              f" serving on {args.host}:{args.port}", file=sys.stderr)
+        coord = Coordinator(args.out, retry_failed=args.retry_failed)
+        serve(coord, args.host, args.port, args.exit_when_done)
+        if args.exit_when_done:
+            print(json.dumps(compact(args.out), indent=2))
+    elif args.command == "worker":
+        n = worker_loop(args.coordinator, args.workers, args.role)
+        print(f"{n} shards completed", file=sys.stderr)
+    elif args.command == "status":
+        print(json.dumps(_Client(args.coordinator, "status").json("GET", "/status")[1], indent=2))
+    else:
+        print(json.dumps(compact(args.out, args.rows_per_file, args.format), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
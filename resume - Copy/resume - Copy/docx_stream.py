@@ -0,0 +1,127 @@
+# ==============================
+# docx_stream.py
+# DOCX text straight from the zip: iterparse of word/document.xml (plus
+# headers and footers), no python-docx object model
+# ==============================
+import re
+import zipfile
+from typing import List
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_P, _T, _R, _TBL, _TR, _TC = W + "p", W + "t", W + "r", W + "tbl", W + "tr", W + "tc"
+_TXBX = W + "txbxContent"
+_BODY_LEVEL = (W + "body", W + "hdr", W + "ftr")
+# run children that stand for characters (python-docx's Paragraph.text does the same)
+_RUN_CHARS = {W + "tab": "\t", W + "ptab": "\t", W + "cr": "\n", W + "noBreakHyphen": "-"}
+_PARTS = re.compile(r"word/(header|footer)(\d*)\.xml$")
+
+
+class _Frame:
+    __slots__ = ("kind", "items", "after")
+
+    def __init__(self, kind: str):
+        self.kind = kind   # "p", "tc", "tr", "txbx"
+        self.items = []    # p: text pieces; tc/txbx: paragraph lines; tr: cell texts
+        self.after = []    # p only: lines of text boxes anchored in the paragraph
+
+
+def _part_lines(fp) -> List[str]:
+    """
+    Paragraphs and table rows of one part, in document order. A table row
+    becomes the tab-joined text of its cells; text-box paragraphs follow the
+    paragraph they are anchored in; mc:Fallback copies (VML duplicates of
+    text boxes) are skipped.
+    """
+    from lxml import etree
+    lines: List[str] = []
+    stack: List[_Frame] = []
+    skip = 0  # depth inside mc:Fallback
+
+    def sink(text: str):
+        for fr in reversed(stack):
+            if fr.kind in ("tc", "txbx"):
+                fr.items.append(text)
+                return
+        lines.append(text)
+
+    for event, el in etree.iterparse(fp, events=("start", "end"), huge_tree=True):
+        tag = el.tag
+        if tag == MC_FALLBACK:
+            skip += 1 if event == "start" else -1
+            continue
+        if skip:
+            continue
+        if event == "start":
+            if tag == _P:
+                stack.append(_Frame("p"))
+            elif tag == _TC:
+                stack.append(_Frame("tc"))
+            elif tag == _TR:
+                stack.append(_Frame("tr"))
+            elif tag == _TXBX:
+                stack.append(_Frame("txbx"))
+            continue
+
+        if tag == _T:
+            if stack and stack[-1].kind == "p" and el.text:
+                stack[-1].items.append(el.text)
+        elif tag in _RUN_CHARS or tag == W + "br":
+            parent = el.getparent()
+            if parent is not None and parent.tag == _R and stack and stack[-1].kind == "p":
+                if tag == W + "br":
+                    if el.get(W + "type") in (None, "textWrapping"):
+                        stack[-1].items.append("\n")
+                else:
+                    stack[-1].items.append(_RUN_CHARS[tag])
+        elif tag == _P:
+            fr = stack.pop()
+            sink("".join(fr.items).strip())
+            for text in fr.after:
+                sink(text)
+        elif tag == _TXBX:
+            fr = stack.pop()
+            for outer in reversed(stack):
+                if outer.kind == "p":
+                    outer.after.extend(fr.items)
+                    break
+            else:
+                for text in fr.items:
+                    sink(text)
+        elif tag == _TC:
+            fr = stack.pop()
+            stack[-1].items.append("\n".join(t for t in fr.items if t).strip())
+        elif tag == _TR:
+            fr = stack.pop()
+            sink("\t".join(fr.items) if any(fr.items) else "")
+        # drop finished top-level blocks so memory stays flat on long files
+        if tag in (_P, _TBL):
+            parent = el.getparent()
+            if parent is not None and parent.tag in _BODY_LEVEL:
+                el.clear()
+                while el.getprevious() is not None:
+                    del parent[0]
+    return lines
+
+
+def docx_text(fp) -> str:
+    """
+    Headers, body and footers of a .docx as text. Raises on anything that is
+    not a well-formed DOCX (zipfile.BadZipFile, KeyError, lxml XMLSyntaxError);
+    extract_utils then falls back to python-docx.
+    """
+    with zipfile.ZipFile(fp) as z:
+        names = z.namelist()
+        parts = sorted((m.group(1), int(m.group(2) or 0), n) for n in names for m in [_PARTS.match(n)] if m)
+        with z.open("word/document.xml") as f:
+            body = _part_lines(f)
+        extra = {"header": [], "footer": []}
+        seen = set()
+        for kind, _, name in parts:
+            with z.open(name) as f:
+                text = tuple(l for l in _part_lines(f) if l)
+            if text and text not in seen:  # first-page / even-page variants often repeat
+                seen.add(text)
+                extra[kind].extend(text)
+    lines = [l for l in extra["header"] + body + extra["footer"] if l]
+    return "\n".join(lines).strip()
@@ -1,27 +1,11 @@
 import streamlit as st
 from suggest import suggest_from_resume, ROLE_SKILLS
-from extract_utils import (
-    extract_name_from_text,
-    extract_email,
-    extract_phone,
-)
-import re
+from extract_utils import extract_contact_info
 
 st.set_page_config(page_title="Resume Editor", layout="wide")
 
 st.title("✍️ Resume Editor")
 
-# ----------------------------
-# Extra helpers
-# ----------------------------
-def extract_linkedin(text: str) -> str:
-    match = re.search(r"(https?://)?(www\.)?linkedin\.com/[A-Za-z0-9_/.\-]+", text or "", re.IGNORECASE)
-    return match.group(0) if match else "—"
-
-def extract_github(text: str) -> str:
-    match = re.search(r"(https?://)?(www\.)?github\.com/[A-Za-z0-9_/.\-]+", text or "", re.IGNORECASE)
-    return match.group(0) if match else "—"
-
 # ----------------------------
 # Main
 # ----------------------------
@@ -33,11 +17,12 @@ else:
     st.session_state["resume_text"] = resume_text
 
     # 🔎 Auto-extract details
-    name_guess = extract_name_from_text(resume_text)
-    email_guess = extract_email(resume_text)
-    phone_guess = extract_phone(resume_text)
-    linkedin_guess = extract_linkedin(resume_text)
-    github_guess = extract_github(resume_text)
+    info = extract_contact_info(resume_text)
+    name_guess = info.name
+    email_guess = info.first("email")
+    phone_guess = info.first("phone")
+    linkedin_guess = info.first("linkedin")
+    github_guess = info.first("github")
 
     with st.expander("🔎 Auto-Extracted Basics (you can copy these into your resume):", expanded=True):
         st.write(f"**Name (guess):** {name_guess}")
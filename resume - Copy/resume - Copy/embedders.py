@@ -0,0 +1,122 @@
+# ===========================
+# embedders.py
+# Pluggable resume embedders
+# ===========================
+import os
+import pickle
+
+# Backend is chosen per deployment: RESUME_EMBEDDER=sbert|sbert-int8|tfidf
+EMBEDDER_ENV = "RESUME_EMBEDDER"
+DEFAULT_BACKEND = "sbert"
+SBERT_MODEL_NAME = os.environ.get("RESUME_SBERT_MODEL", "all-MiniLM-L6-v2")
+
+# Every backend owns its embedder + classifier (+ calibrator) pickles; encoder.pkl is shared.
+ARTIFACTS = {
+    "sbert": {"embedder": "vectorizer.pkl", "model": "model.pkl", "calibrator": "calibrator.pkl"},
+    "sbert-int8": {"embedder": "vectorizer_int8.pkl", "model": "model_int8.pkl",
+                   "calibrator": "calibrator_int8.pkl"},
+    "tfidf": {"embedder": "vectorizer_tfidf.pkl", "model": "model_tfidf.pkl",
+              "calibrator": "calibrator_tfidf.pkl"},
+}
+BACKENDS = tuple(ARTIFACTS.keys())
+
+# Lazy singletons, one per backend
+_EMBEDDERS = {}
+_MODELS = {}
+_CALIBRATORS = {}
+
+
+class TfidfEmbedder:
+    """Sparse TF-IDF fast path exposing the same .encode() as SentenceTransformer."""
+
+    def __init__(self, max_features: int = 20000, ngram_range=(1, 2)):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        self.vectorizer = TfidfVectorizer(
+            max_features=max_features, ngram_range=ngram_range,
+            sublinear_tf=True, dtype="float32",
+        )
+
+    def fit(self, texts):
+        self.vectorizer.fit(texts)
+        return self
+
+    def encode(self, texts, **_):
+        return self.vectorizer.transform(texts)
+
+
+def get_backend(name: str = None) -> str:
+    """Resolve the configured backend name (argument > env var > default)."""
+    name = (name or os.environ.get(EMBEDDER_ENV) or DEFAULT_BACKEND).strip().lower()
+    if name not in ARTIFACTS:
+        raise ValueError(f"Unknown embedder backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    return name
+
+
+def artifact_paths(backend: str = None) -> dict:
+    return ARTIFACTS[get_backend(backend)]
+
+
+def quantize_embedder(embedder):
+    """Dynamic int8 quantization of every nn.Linear in a SentenceTransformer (CPU only)."""
+    import torch
+    embedder = embedder.to("cpu")
+    return torch.quantization.quantize_dynamic(embedder, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def build_embedder(backend: str = None, texts=None):
+    """Create a fresh embedder for training. TF-IDF needs the training texts to fit."""
+    backend = get_backend(backend)
+    if backend == "tfidf":
+        if texts is None:
+            raise ValueError("tfidf backend needs training texts to fit the vocabulary")
+        return TfidfEmbedder().fit(texts)
+
+    full_path = ARTIFACTS["sbert"]["embedder"]
+    if os.path.exists(full_path):
+        base = pickle.load(open(full_path, "rb"))
+    else:
+        from sentence_transformers import SentenceTransformer
+        base = SentenceTransformer(SBERT_MODEL_NAME, device="cpu")
+    if backend == "sbert-int8":
+        return quantize_embedder(base)
+    return base
+
+
+def save_artifact(obj, path: str):
+    # other workers may be loading the same path; publish it only once complete
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(obj, f)
+    os.replace(tmp, path)
+
+
+def load_embedder(backend: str = None):
+    backend = get_backend(backend)
+    if backend not in _EMBEDDERS:
+        path = ARTIFACTS[backend]["embedder"]
+        if not os.path.exists(path) and backend == "sbert-int8":
+            # derive the int8 cache from the full-precision model on first use
+            save_artifact(build_embedder(backend), path)
+        _EMBEDDERS[backend] = pickle.load(open(path, "rb"))
+    return _EMBEDDERS[backend]
+
+
+def load_classifier(backend: str = None):
+    backend = get_backend(backend)
+    if backend not in _MODELS:
+        _MODELS[backend] = pickle.load(open(ARTIFACTS[backend]["model"], "rb"))
+    return _MODELS[backend]
+
+
+def load_calibrator(backend: str = None):
+    """The backend's fitted calibration.* calibrator, or None when it was trained without one."""
+    backend = get_backend(backend)
+    if backend not in _CALIBRATORS:
+        path = ARTIFACTS[backend]["calibrator"]
+        _CALIBRATORS[backend] = pickle.load(open(path, "rb")) if os.path.exists(path) else None
+    return _CALIBRATORS[backend]
+
+
+def available_backends():
+    """Backends whose classifier artifact exists on disk."""
+    return [b for b in BACKENDS if os.path.exists(ARTIFACTS[b]["model"])]
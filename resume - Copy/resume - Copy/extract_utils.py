@@ -2,16 +2,19 @@
 # extract_utils.py - Resume text extractors
 # ===========================================
 import io
-import re
-import pdfplumber
-from docx import Document
-from docx.oxml.table import CT_Tbl
-from docx.oxml.text.paragraph import CT_P
-from docx.table import Table
-from docx.text.paragraph import Paragraph
+import time
+
+import contact_fields
+
+# pdfplumber / python-docx / ocr (PyMuPDF, its process pool) / budgets are imported on first use
+# to keep startup fast
 
 # -------- DOCX helpers (preserve tables + paragraphs order) --------
 def _iter_block_items(doc):
+    from docx.oxml.table import CT_Tbl
+    from docx.oxml.text.paragraph import CT_P
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
     body = doc.element.body
     for child in body.iterchildren():
         if isinstance(child, CT_P):
@@ -20,7 +23,22 @@ def _iter_block_items(doc):
             yield Table(child, doc)
 
 def _docx_bytes_to_text(file_bytes: bytes) -> str:
-    doc = Document(io.BytesIO(file_bytes))
+    return _docx_stream_to_text(io.BytesIO(file_bytes))
+
+def _docx_stream_to_text(fp) -> str:
+    # fast path: iterparse the XML parts directly (also picks up headers,
+    # footers and text boxes); python-docx only for files it cannot read
+    try:
+        from docx_stream import docx_text
+        return docx_text(fp)
+    except Exception:
+        fp.seek(0)
+    return _docx_object_model_text(fp)
+
+def _docx_object_model_text(fp) -> str:
+    from docx import Document
+    from docx.text.paragraph import Paragraph
+    doc = Document(fp)
     parts = []
     for block in _iter_block_items(doc):
         if isinstance(block, Paragraph):
@@ -36,90 +54,82 @@ def _docx_bytes_to_text(file_bytes: bytes) -> str:
 # -------- Public API --------
 def extract_text_from_file(uploaded_file) -> str:
     """Extract raw text from PDF/DOCX/TXT. Accepts a Streamlit UploadedFile or any file-like with .name + .read()."""
-    name = uploaded_file.name.lower()
-    raw = uploaded_file.read()
+    return extract_text_from_bytes(uploaded_file.name, uploaded_file.read())
+
+def extract_text_from_bytes(filename: str, raw: bytes) -> str:
+    """Same as extract_text_from_file, for an upload already held as bytes."""
+    return _extract(filename, lambda: io.BytesIO(raw), lambda: raw)
+
+def extract_text_from_upload(upload) -> str:
+    """Extract from an uploads.Upload: parsers read the spooled file / buffer in place."""
+    return _extract(upload.name, upload.open, upload.view)
+
+def _extract(filename: str, open_stream, get_buffer) -> str:
+    # over-long text is cut to the request budget before anything downstream sees it
+    import budgets
+    return budgets.current().clip_text(_extract_full(filename, open_stream, get_buffer))
+
+def _extract_full(filename: str, open_stream, get_buffer) -> str:
+    name = (filename or "").lower()
     if name.endswith(".pdf"):
-        text = []
-        with pdfplumber.open(io.BytesIO(raw)) as pdf:
-            for p in pdf.pages:
-                t = p.extract_text() or ""
-                text.append(t)
-        return "\n".join(text).strip()
+        return _pdf_text(open_stream, get_buffer)
     if name.endswith(".docx"):
-        return _docx_bytes_to_text(raw)
-    # txt or others
+        with open_stream() as fp:
+            return _docx_stream_to_text(fp)
+    # txt or others: decode straight from the buffer (no intermediate bytes copy)
     try:
-        return raw.decode("utf-8", errors="ignore").strip()
+        return str(get_buffer(), "utf-8", errors="ignore").strip()
     except Exception:
         return ""
 
+def _pdf_text(open_stream, get_buffer) -> str:
+    """pdfplumber page by page within the request budget: first N pages, time-capped loop, then OCR."""
+    import budgets
+    import pdfplumber
+    budget = budgets.current()
+    stop_at = budget.stage_deadline("extract_seconds")
+    text = []
+    with open_stream() as fp, pdfplumber.open(fp) as pdf:
+        pages = pdf.pages
+        max_pages = budget.limit("pdf_pages")
+        if len(pages) > max_pages:
+            budget.degrade("pdf_pages_capped", f"{int(max_pages)} of {len(pages)} pages")
+            pages = pages[:int(max_pages)]
+        for i, p in enumerate(pages):
+            if i and time.monotonic() > stop_at:  # the first page is always read
+                budget.degrade("extract_time_capped", f"{i} of {len(pages)} pages")
+                break
+            t = p.extract_text() or ""
+            text.append(t)
+    # scanned pages have no text layer: OCR those (bounded, cached by page hash)
+    import ocr
+    if any(ocr.needs_ocr(t) for t in text):
+        left = stop_at - time.monotonic()  # OCR shares the extract stage's time
+        if left >= budget.limit("ocr_min_seconds"):
+            text = ocr.fill_pages(get_buffer(), text, timeout=min(ocr.OCR_TIMEOUT, left))
+        else:
+            budget.degrade("ocr_skipped", f"{sum(map(ocr.needs_ocr, text))} pages, {max(0.0, left):.1f}s left")
+    return "\n".join(text).strip()
+
 # -------- Field Extractors --------
+# Precompiled, header-first implementations live in contact_fields; these
+# single-field wrappers keep the old signatures and the "—" placeholder.
 def extract_name_from_text(text: str, filename: str = "") -> str:
     """Heuristic person-name extractor for resume text."""
-    if not text:
-        return "Candidate"
-    text = re.sub(r"[\u00A0\u200B]+", " ", text)  # normalize spaces
-    lines = [l.strip() for l in text.splitlines() if l and l.strip()]
-
-    skip_keywords = {
-        "resume", "curriculum vitae", "cv",
-        "career objective", "objective", "profile",
-        "education", "qualification", "qualifications",
-        "skills", "experience", "projects",
-        "strength", "hobbies", "achievements", "awards",
-        "journal", "publication", "declaration", "contact",
-        "email", "mobile", "phone", "address", "linkedin", "github"
-    }
-
-    def _is_skip(line: str) -> bool:
-        low = line.lower().strip().strip(":")
-        return any(k in low for k in skip_keywords)
-
-    top_lines = lines[:20]
-
-    # 1) Strong rule: ALL CAPS 2–3 words near top
-    for line in top_lines[:5]:
-        if line.isupper() and 1 < len(line.split()) <= 3 and not _is_skip(line):
-            return line.title()
-
-    # 2) Proper-cased names
-    for line in top_lines:
-        if _is_skip(line):
-            continue
-        if re.match(r"^[A-Z][a-z]+(\s[A-Z]\.)?(\s[A-Z][a-z]+){1,2}$", line):
-            return line
-
-    # 3) Backup: capitalized words, 2–3 tokens, no digits/emails
-    for line in top_lines:
-        if _is_skip(line):
-            continue
-        if not re.search(r"[\d@:/\\]", line):
-            words = line.split()
-            if 1 < len(words) <= 3 and sum(1 for w in words if w[0].isupper()) >= 2:
-                return line
-
-    # 4) Fallback: filename
-    if filename:
-        base = filename.split("/")[-1].split("\\")[-1]
-        base = re.sub(r"\.[^.]+$", "", base)         # remove extension
-        base = re.sub(r"[_\d]+", " ", base).strip()  # remove underscores/digits
-        if base:
-            return base.title()
-
-    return "Candidate"
+    return contact_fields.extract_name(text, filename)
+
+def extract_contact_info(text: str, filename: str = ""):
+    """Name plus every email / phone / LinkedIn / GitHub match with offsets, in one pass."""
+    return contact_fields.extract_contact_info(text, filename)
 
 def extract_email(text: str) -> str:
-    m = re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text or "")
-    return m.group(0) if m else "—"
+    return contact_fields.first_value(text, "email")
 
 def extract_phone(text: str) -> str:
-    m = re.search(r"(\+?\d{1,3}[- ]*)?(\d[ -]?){9,12}\d", text or "")
-    return m.group(0).strip() if m else "—"
+    return contact_fields.first_value(text, "phone")
 
 def extract_linkedin(text: str) -> str:
-    m = re.search(r"(https?://)?(www\.)?linkedin\.com/[A-Za-z0-9_/.\-]+", text or "", re.IGNORECASE)
-    return m.group(0) if m else "—"
+    return contact_fields.first_value(text, "linkedin")
 
 def extract_github(text: str) -> str:
-    m = re.search(r"(https?://)?(www\.)?github\.com/[A-Za-z0-9_/.\-]+", text or "", re.IGNORECASE)
-    return m.group(0) if m else "—"
+    return contact_fields.first_value(text, "github")
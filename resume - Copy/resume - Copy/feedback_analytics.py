@@ -0,0 +1,353 @@
+# ==================================================
+# feedback_analytics.py - columnar feedback store + running aggregates
+#
+#   python feedback_analytics.py compact            # fold new log lines in now
+#   python feedback_analytics.py stats [--role R] [--kind K] [--item I]
+#
+# Compaction reads only the bytes appended to each feedback log since the
+# last run (feedback_events.read_rows), writes them as Parquet under
+# <ANALYTICS_DIR>/events/date=YYYY-MM-DD/, and folds them into counters
+# per (role, kind, item): events, accepted (reward > 0), reward sum.
+# Counters, per-role rollups and the read offsets live in state.json,
+# so /feedback/stats answers from a dict lookup instead of a CSV scan.
+# data/suggestion_stats.json (role -> skill -> reward sum) is rewritten
+# from the counters on every compaction.
+# ==================================================
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from feedback_events import FEEDBACK_LOGS, normalize_key, read_rows
+
+ANALYTICS_DIR = os.environ.get("RESUME_FEEDBACK_ANALYTICS_DIR", "feedback_analytics")
+SUGGESTION_STATS_PATH = os.path.join("data", "suggestion_stats.json")
+COMPACT_CHECK_SECONDS = float(os.environ.get("RESUME_FEEDBACK_COMPACT_SECONDS", "30"))
+LOCK_STALE_SECONDS = 600
+TOP_ITEMS = 10
+EVENT_COLUMNS = ("date", "timestamp", "resume_id", "role", "kind", "item", "reward", "source")
+
+# counter keys are "role<TAB>kind<TAB>item" so state.json stays plain JSON;
+# feedback_events.normalize_key turns any tab inside a field into a space
+_SEP = "\t"
+
+
+def _state_path(base: str) -> str:
+    return os.path.join(base, "state.json")
+
+
+def _empty_state() -> dict:
+    return {"sources": {}, "counters": {}, "rollups": {}, "totals": [0, 0, 0],
+            "rows": 0, "compacted_at": None}
+
+
+def load_state(base: str = ANALYTICS_DIR) -> dict:
+    try:
+        with open(_state_path(base), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return _empty_state()
+
+
+def _atomic_write_json(path: str, obj, indent=None):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=indent, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _date_of(timestamp: str) -> str:
+    try:
+        return datetime.fromisoformat(timestamp).date().isoformat()
+    except (TypeError, ValueError):
+        return "unknown"  # e.g. the old session logger wrote no timestamp
+
+
+# -------- Partitions --------
+def _write_part(path_no_ext: str, rows) -> str:
+    """One Parquet file (or JSON lines when pyarrow is not installed)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        path = path_no_ext + ".jsonl"
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            for r in rows:
+                f.write(json.dumps(dict(zip(EVENT_COLUMNS, r))) + "\n")
+    else:
+        path = path_no_ext + ".parquet"
+        table = pa.table({c: [r[i] for r in rows] for i, c in enumerate(EVENT_COLUMNS)})
+        pq.write_table(table, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def read_events(base: str = ANALYTICS_DIR, since: str = None, until: str = None):
+    """
+    Compacted events as a pandas DataFrame, reading only the date
+    partitions in [since, until] (ISO dates, inclusive; rows without a
+    timestamp are only included when no range is given).
+    """
+    import pandas as pd
+    root = os.path.join(base, "events")
+    frames = []
+    for name in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        day = name.partition("=")[2]
+        if (since or until) and (day == "unknown" or (since and day < since) or (until and day > until)):
+            continue
+        for part in sorted(os.listdir(os.path.join(root, name))):
+            path = os.path.join(root, name, part)
+            if part.endswith(".parquet"):
+                frames.append(pd.read_parquet(path))
+            elif part.endswith(".jsonl"):
+                frames.append(pd.read_json(path, lines=True, dtype={"date": str}))
+    if not frames:
+        return pd.DataFrame(columns=list(EVENT_COLUMNS))
+    return pd.concat(frames, ignore_index=True)
+
+
+# -------- Counters --------
+def _bump(counter: list, reward: int):
+    counter[0] += 1
+    counter[1] += 1 if reward > 0 else 0
+    counter[2] += reward
+
+
+def _summary(counter) -> dict:
+    events, accepted, reward_sum = counter
+    return {"events": events, "accepted": accepted, "rejected": events - accepted,
+            "acceptance_rate": round(accepted / events, 4) if events else None,
+            "reward_sum": reward_sum}
+
+
+def _rebuild_rollups(state: dict, roles):
+    """Per role: totals per kind and the top items per kind by reward sum."""
+    by_role = {}
+    for key, counter in state["counters"].items():
+        role, kind, item = key.split(_SEP)
+        if role in roles:
+            by_role.setdefault(role, {}).setdefault(kind, []).append((item, counter))
+    for role, kinds in by_role.items():
+        state["rollups"][role] = {
+            kind: {
+                "counter": [sum(c[i] for _, c in items) for i in range(3)],
+                "top": [[item, c] for item, c in sorted(items, key=lambda t: (-t[1][2], -t[1][0], t[0]))[:TOP_ITEMS]],
+            }
+            for kind, items in kinds.items()
+        }
+
+
+def write_suggestion_stats(state: dict, path: str = SUGGESTION_STATS_PATH):
+    """role -> skill -> reward sum, the format data/suggestion_stats.json has always had."""
+    out = {}
+    for key, (_, _, reward_sum) in state["counters"].items():
+        role, kind, item = key.split(_SEP)
+        if kind == "skill":
+            out.setdefault(role, {})[item] = reward_sum
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    _atomic_write_json(path, out, indent=2)
+
+
+# -------- Compaction --------
+class _CompactLock:
+    """Cross-process lock file, so two app workers never fold the same lines twice."""
+
+    def __init__(self, base: str):
+        self.path = os.path.join(base, ".compact.lock")
+        self.held = False
+
+    def __enter__(self):
+        try:
+            if time.time() - os.stat(self.path).st_mtime > LOCK_STALE_SECONDS:
+                os.unlink(self.path)  # left behind by a crashed run
+        except OSError:
+            pass
+        try:
+            os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            self.held = True
+        except FileExistsError:
+            pass
+        return self
+
+    def __exit__(self, *exc):
+        if self.held:
+            os.unlink(self.path)
+
+
+def compact(paths=FEEDBACK_LOGS, base: str = ANALYTICS_DIR,
+            stats_path: str = SUGGESTION_STATS_PATH) -> dict:
+    """
+    Fold lines appended since the last run into the partitions and counters.
+    Returns {"rows": new rows, "parts": files written}, or None when another
+    process is compacting right now.
+    """
+    os.makedirs(base, exist_ok=True)
+    with _CompactLock(base) as lock:
+        if not lock.held:
+            return None
+        state = load_state(base)
+        # part names derive from the offsets we start from: a run that dies
+        # before saving state is redone into the same files, not new ones
+        run_id = hashlib.sha1(json.dumps(
+            [[p, state["sources"].get(p, {}).get("offset", 0)] for p in paths]).encode("utf-8")).hexdigest()[:12]
+
+        by_date, touched, new_rows = {}, set(), 0
+        for path in paths:
+            src = state["sources"].get(path, {"offset": 0, "header": None})
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            if size < src["offset"]:
+                src = {"offset": 0, "header": None}  # truncated or replaced: read it from the start
+            rows, end, header = read_rows(path, src["offset"], src["header"])
+            for r in rows:
+                day = _date_of(r.timestamp)
+                by_date.setdefault(day, []).append(
+                    (day, r.timestamp, r.resume_id, r.role, r.kind, r.item, r.reward, path))
+                _bump(state["counters"].setdefault(_SEP.join((r.role, r.kind, r.item)), [0, 0, 0]), r.reward)
+                _bump(state["totals"], r.reward)
+                touched.add(r.role)
+            new_rows += len(rows)
+            state["sources"][path] = {"offset": end, "header": header}
+
+        parts = []
+        for day, rows in sorted(by_date.items()):
+            part_dir = os.path.join(base, "events", f"date={day}")
+            os.makedirs(part_dir, exist_ok=True)
+            parts.append(_write_part(os.path.join(part_dir, f"part-{run_id}"), rows))
+
+        if new_rows or not os.path.exists(_state_path(base)):
+            _rebuild_rollups(state, touched)
+            state["rows"] += new_rows
+            state["compacted_at"] = datetime.utcnow().isoformat()
+            write_suggestion_stats(state, stats_path)
+        _atomic_write_json(_state_path(base), state)
+    _AGG.invalidate()
+    return {"rows": new_rows, "parts": parts}
+
+
+# -------- Serving (constant-time lookups on the last compacted state) --------
+class _Aggregates:
+    """state.json cached by mtime; compaction is started in the background when the logs grow."""
+
+    def __init__(self, base: str = ANALYTICS_DIR, paths=FEEDBACK_LOGS):
+        self.base = base
+        self.paths = paths
+        self.state = None
+        self._mtime = None
+        self._checked = 0.0
+        self._compacting = False
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._mtime = None
+
+    def get(self) -> dict:
+        try:
+            mtime = os.stat(_state_path(self.base)).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self.state is None or mtime != self._mtime:
+            with self._lock:
+                self.state = load_state(self.base)
+                self._mtime = mtime
+        return self.state
+
+    def _behind(self) -> bool:
+        sources = self.get()["sources"]
+        for path in self.paths:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            if size != sources.get(path, {}).get("offset"):
+                return True
+        return False
+
+    def maybe_compact(self, force: bool = False):
+        """Start a compaction thread if a log grew (checked at most every COMPACT_CHECK_SECONDS)."""
+        now = time.monotonic()
+        if self._compacting or (not force and now - self._checked < COMPACT_CHECK_SECONDS):
+            return
+        self._checked = now
+        if self._behind():
+            self._compacting = True
+            threading.Thread(target=self._run, daemon=True, name="feedback-compact").start()
+
+    def _run(self):
+        try:
+            compact(self.paths, self.base)
+        except Exception as e:  # keep serving the last good aggregates
+            print(f"feedback compaction failed: {type(e).__name__}: {e}", file=sys.stderr)
+        finally:
+            self._compacting = False
+
+
+_AGG = _Aggregates()
+
+
+def schedule_compaction():
+    """Called after new feedback is logged; compaction itself runs off-thread."""
+    _AGG.maybe_compact(force=True)
+
+
+def stats(role: str = None, kind: str = None, item: str = None, refresh: bool = True) -> dict:
+    """
+    Aggregates as of the last compaction:
+      role + kind + item -> that item's counters
+      role [+ kind]      -> per-kind totals and top items
+      nothing            -> overall totals and per-role totals
+    With refresh, a background compaction starts if the logs have grown.
+    """
+    if refresh:
+        _AGG.maybe_compact()
+    state = _AGG.get()
+    out = {"as_of": state["compacted_at"], "rows": state["rows"]}
+    role = normalize_key(role) or None
+    kind = normalize_key(kind) or None
+    item = normalize_key(item) or None
+    if role and kind and item:
+        counter = state["counters"].get(_SEP.join((role, kind, item)))
+        out.update(role=role, kind=kind, item=item, **_summary(counter or [0, 0, 0]))
+        return out
+    if role:
+        kinds = state["rollups"].get(role, {})
+        if kind:
+            kinds = {kind: kinds[kind]} if kind in kinds else {}
+        out.update(role=role, kinds={
+            k: dict(_summary(v["counter"]), top=[dict(_summary(c), item=i) for i, c in v["top"]])
+            for k, v in kinds.items()
+        })
+        return out
+    out.update(_summary(state["totals"]), roles={
+        r: _summary([sum(v["counter"][i] for v in kinds.values()) for i in range(3)])
+        for r, kinds in state["rollups"].items()
+    })
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compact feedback logs into Parquet and query the aggregates.")
+    ap.add_argument("command", choices=("compact", "stats"))
+    ap.add_argument("--role")
+    ap.add_argument("--kind")
+    ap.add_argument("--item")
+    args = ap.parse_args(argv)
+    if args.command == "compact":
+        res = compact()
+        if res is None:
+            print("Another compaction is running.")
+            return 1
+        print(f"{res['rows']} new rows, {len(res['parts'])} partition files -> {ANALYTICS_DIR}")
+        return 0
+    print(json.dumps(stats(args.role, args.kind, args.item, refresh=False), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
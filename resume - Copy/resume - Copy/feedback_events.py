@@ -0,0 +1,108 @@
+# ==============================
+# feedback_events.py
+# One reader for every feedback log format the app has written
+# ==============================
+import csv
+import os
+from typing import Iterable, Iterator, NamedTuple
+
+# feedback_log.csv is the master log (the positive/negative files only repeat
+# its rows); data/rewards_*.csv hold the seeded demo rewards. Lines that carry
+# no per-skill reward (e.g. JSON lines with a whole resume_text) are skipped.
+FEEDBACK_LOGS = (
+    "feedback_log.csv",
+    os.path.join("data", "rewards_positive.csv"),
+    os.path.join("data", "rewards_negative.csv"),
+)
+# Column orders for headerless rows appended after another format's lines:
+# log_feedback_rows, and the older session logger without a timestamp
+LOG_FIELDS = ("timestamp", "resume_id", "role", "kind", "text", "reward", "comments")
+SESSION_FIELDS = ("resume_id", "role", "kind", "text", "reward", "comments")
+KINDS = ("skill", "project", "course", "certificate")
+
+
+class FeedbackEvent(NamedTuple):
+    timestamp: str
+    resume_id: str
+    role: str
+    skill: str
+    reward: int
+
+
+class FeedbackRow(NamedTuple):
+    """Any rated suggestion: kind is skill / project / course / certificate."""
+    timestamp: str
+    resume_id: str
+    role: str
+    kind: str
+    item: str
+    reward: int
+
+
+def normalize_key(value) -> str:
+    """Lower-cased, with every run of whitespace (tabs and newlines included) turned into one space."""
+    return " ".join((value or "").split()).lower()
+
+
+def _feedback_row(row: dict):
+    role = normalize_key(row.get("role") or row.get("target_role"))
+    kind = normalize_key(row.get("kind"))
+    item = row.get("text")
+    if row.get("skill"):
+        kind, item = "skill", row.get("skill")
+    item = normalize_key(item)
+    try:
+        reward = int(float(row.get("reward") or 0))
+    except ValueError:
+        return None
+    if not role or kind not in KINDS or not item or reward == 0:
+        return None
+    return FeedbackRow(row.get("timestamp") or "", row.get("resume_id") or "", role, kind, item, reward)
+
+
+def read_rows(path: str, offset: int = 0, header=None):
+    """
+    Rated rows of one log from byte `offset` on, for incremental readers.
+    Returns (rows, end_offset, header); end_offset stops after the last
+    complete line and header is the one in force there, so the next call
+    can resume from (end_offset, header).
+    """
+    rows = []
+    if not os.path.exists(path):
+        return rows, 0, None
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    complete = data[:data.rfind(b"\n") + 1]
+    lines = complete.decode("utf-8", errors="replace").splitlines(keepends=True)
+    for fields in csv.reader(line for line in lines if not line.lstrip().startswith("{")):
+        if not fields:
+            continue
+        if "reward" in fields:
+            header = fields
+            continue
+        if header is not None and len(fields) == len(header):
+            row = dict(zip(header, fields))
+        elif len(fields) == len(LOG_FIELDS):
+            row = dict(zip(LOG_FIELDS, fields))
+        elif len(fields) == len(SESSION_FIELDS):
+            row = dict(zip(SESSION_FIELDS, fields))
+        else:
+            continue
+        r = _feedback_row(row)
+        if r is not None:
+            rows.append(r)
+    return rows, offset + len(complete), header
+
+
+def read_events(path: str) -> Iterator[FeedbackEvent]:
+    """Per-skill reward events from one log file, in file order."""
+    rows, _, _ = read_rows(path)
+    for r in rows:
+        if r.kind == "skill":
+            yield FeedbackEvent(r.timestamp, r.resume_id, r.role, r.item, r.reward)
+
+
+def iter_events(paths: Iterable[str] = FEEDBACK_LOGS) -> Iterator[FeedbackEvent]:
+    for path in paths:
+        yield from read_events(path)
@@ -1,71 +1,117 @@
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, g, request, jsonify, send_file, stream_with_context
 import io
 import os
-from docx import Document
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from resume_templates import generate_resume_pdf
-from model import predict_category_and_conf
-from suggest import analyze_for_role, suggest_from_resume, log_feedback_rows
-import pdfplumber
-import docx
+from model import predict_top_k, get_tier_stats
+from extract_utils import extract_text_from_upload
+import budgets
+import feedback_analytics
+import knowledge_base
+import ocr
+import pdf_render
+import uploads
+from pdf_render import RenderBusy, RenderTimeout
+from uploads import UploadTooLarge
+from ingest import MAX_ARCHIVE_BYTES
+from result_store import classify_with_store, get_store
+from suggest import (analyze_for_role, analyze_for_role_json, analyze_all_roles, suggest_from_resume,
+                     log_feedback_rows, record_skill_feedback, resolve_role, role_candidates)
+
+# reportlab, pdfplumber and python-docx are imported inside the helpers that
+# need them (reportlab only in pdf_render's worker processes) so the API
+# starts (and serves /analyze) without loading them.
 
 app = Flask(__name__)
+# Werkzeug rejects bodies past this before we read them (multipart overhead included);
+# only /ingest raises it, to the archive limit (see _body_limit)
+app.config["MAX_CONTENT_LENGTH"] = uploads.capped(uploads.MAX_UPLOAD_BYTES) + uploads.MULTIPART_OVERHEAD
+ARCHIVE_LIMIT = uploads.capped(MAX_ARCHIVE_BYTES)
+
+
+@app.errorhandler(UploadTooLarge)
+def _upload_too_large(e):
+    return jsonify({"error": str(e)}), 413
+
+
+@app.errorhandler(RenderBusy)
+@app.errorhandler(RenderTimeout)
+def _render_unavailable(e):
+    return jsonify({"error": str(e)}), e.status_code
+
+
+@app.errorhandler(413)
+def _request_too_large(e):
+    limit = ARCHIVE_LIMIT if request.endpoint == "ingest_archive" else uploads.capped(uploads.MAX_UPLOAD_BYTES)
+    return jsonify({"error": f"Upload exceeds the {limit // uploads.MB} MB limit."}), 413
+
+
+@app.before_request
+def _body_limit():
+    # set before anything parses the body; every other route keeps the single-upload cap
+    if request.endpoint == "ingest_archive":
+        request.max_content_length = ARCHIVE_LIMIT + uploads.MULTIPART_OVERHEAD
+
+
+@app.before_request
+def _start_budget():
+    # every request gets time/size budgets; stages degrade to cheaper paths past them
+    g.budget_token = budgets.begin()
+
+
+@app.after_request
+def _kb_version_header(resp):
+    # lets clients tell which roles/skills/courses tables produced a response
+    resp.headers["X-KB-Version"] = knowledge_base.version()
+    applied = budgets.current().applied
+    if applied:
+        resp.headers["X-Degradations"] = ",".join(applied)
+    return resp
+
+
+@app.teardown_request
+def _end_budget(exc):
+    token = g.pop("budget_token", None)
+    if token is not None:
+        budgets.end(token)
+
 
 # ----------- Helpers -----------
-def _extract_text_from_upload(file_storage):
+def _stored_embedding(resume_id, text: str = None):
     """
-    Robust extractor for Flask uploads (PDF/DOCX/TXT).
-    Does not depend on parser.py's .name attribute.
+    Embedding saved with an /upload, when the client passes its resume_id back
+    (and, given `text`, only while the text is still the uploaded one).
     """
-    filename = (file_storage.filename or "").lower()
-    raw = file_storage.read()
-
-    if filename.endswith(".pdf"):
-        text = ""
-        with pdfplumber.open(io.BytesIO(raw)) as pdf:
-            for p in pdf.pages:
-                t = p.extract_text() or ""
-                text += t + "\n"
-        return text.strip()
-
-    if filename.endswith(".docx"):
-        d = docx.Document(io.BytesIO(raw))
-        return "\n".join(p.text for p in d.paragraphs).strip()
-
-    # fallback to txt
-    try:
-        return raw.decode("utf-8", errors="ignore").strip()
-    except Exception:
-        return ""
+    if not resume_id or resume_id == "session":
+        return None
+    store = get_store()
+    rec = store.get(resume_id)
+    if not rec or (text is not None and rec["raw_text"] != text):
+        return None
+    return store.load_embedding(rec.get("embedding_ref"))
+
+def _classify_upload(file_storage):
+    """
+    Robust extractor + classifier for Flask uploads (PDF/DOCX/TXT).
+    The body is spooled (temp file + mmap past a threshold) and size-checked
+    before any parsing; raises UploadTooLarge -> 413. The result store is
+    consulted by content hash before any extraction or model work.
+    Returns the stored record, or None if no text could be extracted.
+    """
+    with uploads.spool(file_storage.stream, file_storage.filename, request.content_length) as up:
+        return classify_with_store(up.content_hash, file_storage.filename,
+                                   lambda: extract_text_from_upload(up))
 
 
-def _make_pdf(text: str) -> io.BytesIO:
-    buf = io.BytesIO()
-    c = canvas.Canvas(buf, pagesize=letter)
-    width, height = letter
-    y = height - 50
-    c.setFont("Helvetica", 11)
-    for line in (text or "").splitlines():
-        # naive wrapping at ~95 chars
-        while len(line) > 95:
-            c.drawString(50, y, line[:95])
-            line = line[95:]
-            y -= 14
-            if y < 60:
-                c.showPage(); c.setFont("Helvetica", 11); y = height - 50
-        c.drawString(50, y, line)
-        y -= 14
-        if y < 60:
-            c.showPage(); c.setFont("Helvetica", 11); y = height - 50
-    c.showPage()
-    c.save()
-    buf.seek(0)
-    return buf
+def _pdf_response(pdf: bytes, filename: str) -> Response:
+    """Stream rendered PDF bytes back in chunks (the render itself ran in pdf_render's pool)."""
+    return Response(pdf_render.iter_chunks(pdf), mimetype="application/pdf", headers={
+        "Content-Length": str(len(pdf)),
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    })
 
 
 def _make_docx(text: str) -> io.BytesIO:
+    from docx import Document
     buf = io.BytesIO()
     d = Document()
     for para in (text or "").splitlines():
@@ -86,14 +132,17 @@ def upload_resume():
     if "file" not in request.files:
         return jsonify({"error": "No file uploaded"}), 400
     file = request.files["file"]
-    text = _extract_text_from_upload(file)
-    if not text:
+    rec = _classify_upload(file)
+    if not rec:
         return jsonify({"error": "Could not extract text from file"}), 400
-    category, conf = predict_category_and_conf(text)
     return jsonify({
-        "resume_text": text,
-        "predicted_category": category,
-        "confidence": conf
+        "resume_id": rec["content_hash"],
+        "resume_text": rec["raw_text"],
+        "predicted_category": rec["category"],
+        "confidence": rec["confidence"],
+        "top_categories": rec["top_k"],
+        "cached": rec["cached"],
+        "degradations": budgets.current().report(),
     })
 
 
@@ -101,19 +150,41 @@ def upload_resume():
 @app.route("/analyze", methods=["POST"])
 def analyze_resume():
     data = request.json or {}
-    text = data.get("resume_text")
+    text = budgets.current().clip_text(data.get("resume_text"))
     role = data.get("category")
     if not text or not role:
         return jsonify({"error": "resume_text and category required"}), 400
-    result = analyze_for_role(text, role)
-    return jsonify(result)
+    resume_id = data.get("resume_id")
+    if resume_id:
+        # attach the analysis to the stored upload (reused on the next identical request)
+        store = get_store()
+        rec = store.get(resume_id)
+        canonical = resolve_role(role)
+        if rec and rec["raw_text"] == text:
+            if canonical in rec["analyses"]:
+                return jsonify(rec["analyses"][canonical])
+            result = analyze_for_role(text, role, store.load_embedding(rec.get("embedding_ref")))
+            if not budgets.current().applied:  # a degraded analysis is not kept for reuse
+                store.put_analysis(resume_id, canonical, result)
+            return jsonify(result)
+    return Response(analyze_for_role_json(text, role), mimetype="application/json")
+
+
+# 2b) Analyze against every role at once (coverage + missing skills per role)
+@app.route("/analyze/all", methods=["POST"])
+def analyze_resume_all_roles():
+    data = request.json or {}
+    text = budgets.current().clip_text(data.get("resume_text"))
+    if not text:
+        return jsonify({"error": "resume_text required"}), 400
+    return jsonify({"roles": analyze_all_roles(text), "kb_version": knowledge_base.version()})
 
 
 # 3) Editor-style re-analyze (same as analyze but named for clarity)
 @app.route("/editor/analyze", methods=["POST"])
 def editor_analyze():
     data = request.json or {}
-    text = data.get("resume_text")
+    text = budgets.current().clip_text(data.get("resume_text"))
     role = data.get("category")
     if not text or not role:
         return jsonify({"error": "resume_text and category required"}), 400
@@ -125,16 +196,18 @@ def editor_analyze():
 @app.route("/editor/recheck", methods=["POST"])
 def recheck_resume():
     data = request.json or {}
-    text = data.get("resume_text")
+    text = budgets.current().clip_text(data.get("resume_text"))
     role = data.get("category")
     if not text or not role:
         return jsonify({"error": "resume_text and category required"}), 400
-    pred_cat, conf = predict_category_and_conf(text)
+    top = predict_top_k(text)
     res = analyze_for_role(text, role)
     return jsonify({
-        "model_thinks": pred_cat,
-        "confidence": conf,
-        "analysis": res
+        "model_thinks": top[0]["category"],
+        "confidence": top[0]["confidence"],
+        "top_categories": top,
+        "analysis": res,
+        "degradations": budgets.current().report(),
     })
 
 
@@ -146,10 +219,7 @@ def download_resume_editor():
     fmt = (data.get("format") or "pdf").lower()
 
     if fmt == "pdf":
-        buf = _make_pdf(text)
-        return send_file(buf, as_attachment=True,
-                         download_name="Updated_Resume.pdf",
-                         mimetype="application/pdf")
+        return _pdf_response(pdf_render.render("plain", text), "Updated_Resume.pdf")
     if fmt == "docx":
         buf = _make_docx(text)
         return send_file(buf, as_attachment=True,
@@ -173,12 +243,7 @@ def download_template_pdf():
     except Exception:
         template_id = 1
 
-    out = io.BytesIO()
-    generate_resume_pdf(text, template_id, out)
-    out.seek(0)
-    return send_file(out, as_attachment=True,
-                     download_name="resume.pdf",
-                     mimetype="application/pdf")
+    return _pdf_response(pdf_render.render("template", text, template_id), "resume.pdf")
 
 
 # 7) Feedback logging + lightweight RL tick
@@ -194,8 +259,10 @@ def feedback():
     if not role:
         return jsonify({"error": "category required"}), 400
 
-    # Build rows from current analysis
-    analysis = analyze_for_role(text, role)
+    # Build rows from current analysis (ranked with the same inputs /analyze used)
+    resume_id = data.get("resume_id") or "session"
+    embedding = _stored_embedding(resume_id, text)
+    analysis = analyze_for_role(text, role, embedding)
     rows = []
     for s in analysis.get("missing_skills", []):
         rows.append(("skill", s))
@@ -207,19 +274,117 @@ def feedback():
         rows.append(("certificate", c))
 
     log_feedback_rows(
-        resume_id="session", target_role=role, rows=rows,
+        resume_id=resume_id, target_role=role, rows=rows,
         reward=reward, comments=comments
     )
+    feedback_analytics.schedule_compaction()
 
     # live-tick RL (optional)
     try:
-        from train_rl_from_feedback import train_incremental
+        from train_rl_from_feedback import apply_skill_evidence, train_incremental
         train_incremental()
+        # suggested skills (missing or weakly shown), scaled by how little evidence the resume had
+        strength = analysis.get("skill_strength", {})
+        suggested = analysis.get("missing_skills", []) + analysis.get("weak_skills", [])
+        apply_skill_evidence({s: strength.get(s, 0.0) for s in suggested}, reward)
+        record_skill_feedback(text, role, suggested, reward, embedding)
         return jsonify({"status": "ok", "note": "feedback logged & RL updated"})
     except Exception as e:
         return jsonify({"status": "ok", "note": f"feedback logged; RL update skipped: {e}"}), 200
 
 
+@app.route("/feedback/stats", methods=["GET"])
+def feedback_stats():
+    # served from the aggregates of the last compaction; no log scan per request
+    return jsonify(feedback_analytics.stats(request.args.get("role"), request.args.get("kind"),
+                                            request.args.get("item")))
+
+
+# 8) Resolve a free-text role / category name to the canonical role
+@app.route("/roles/resolve", methods=["GET"])
+def resolve_role_name():
+    q = request.args.get("q", "")
+    try:
+        k = int(request.args.get("k", 3))
+    except ValueError:
+        k = 3
+    return jsonify({
+        "query": q,
+        "role": resolve_role(q),
+        "candidates": [{"role": r, "score": s} for r, s in role_candidates(q, k)],
+    })
+
+
+# 9) Bulk ingestion of a zip/tar archive of resumes -> NDJSON stream
+_ENGINE = None
+
+def _batch_engine():
+    global _ENGINE
+    if _ENGINE is None:
+        from batch_engine import BatchEngine
+        _ENGINE = BatchEngine()
+    return _ENGINE
+
+
+@app.route("/ingest", methods=["POST"])
+def ingest_archive():
+    from ingest import ArchiveError, ingest, is_archive, to_ndjson
+    if "file" not in request.files:
+        return jsonify({"error": "No archive uploaded"}), 400
+    file = request.files["file"]
+    if not is_archive(file.filename):
+        return jsonify({"error": "Expected a .zip or .tar(.gz/.bz2/.xz) archive"}), 400
+    role = request.form.get("category") or None
+
+    up = uploads.spool(file.stream, file.filename, request.content_length, limit=ARCHIVE_LIMIT)
+    fp = up.open()
+
+    def generate():
+        try:
+            yield from to_ndjson(ingest(fp, file.filename, _batch_engine(), role))
+        except ArchiveError as e:
+            yield from to_ndjson([{"name": file.filename, "status": "error", "error": str(e)}])
+        finally:
+            fp.close()
+            up.close()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+# 10) Classifier tier stats (fast TF-IDF vs escalated embedding path), PDF render and OCR timings
+@app.route("/stats/classifier", methods=["GET"])
+def classifier_stats():
+    return jsonify(get_tier_stats())
+
+
+@app.route("/stats/render", methods=["GET"])
+def render_stats():
+    return jsonify(pdf_render.stats())
+
+
+@app.route("/stats/ocr", methods=["GET"])
+def ocr_stats():
+    return jsonify(ocr.stats())
+
+
+@app.route("/stats/budgets", methods=["GET"])
+def budget_stats():
+    # requests that hit a budget and which cheaper path each one took
+    return jsonify(budgets.stats())
+
+
+# 11) Knowledge base status / forced reload (files are also picked up on change)
+@app.route("/kb", methods=["GET"])
+def kb_status():
+    return jsonify(knowledge_base.status())
+
+
+@app.route("/kb/reload", methods=["POST"])
+def kb_reload():
+    ok = knowledge_base.reload()
+    return jsonify(knowledge_base.status()), (200 if ok else 422)
+
+
 if __name__ == "__main__":
     # Use FLASK_RUN_PORT/FLASK_RUN_HOST when running via `flask run`
     app.run(host="0.0.0.0", port=5000, debug=True)
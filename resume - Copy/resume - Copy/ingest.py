@@ -0,0 +1,163 @@
+# ==================================================
+# ingest.py - bulk ingestion of zip / tar resume archives
+#
+#   python ingest.py resumes.zip [--role "data scientist"] [-o out.ndjson]
+#
+# Entries are streamed out of the archive (never extracted to disk),
+# run through batch_engine in parallel, and emitted as NDJSON lines in
+# completion order. A bad entry becomes an error line, not a failed batch.
+# ==================================================
+import argparse
+import json
+import os
+import sys
+import tarfile
+import zipfile
+
+import uploads
+from batch_engine import BatchEngine, skill_gap
+
+MAX_ARCHIVE_BYTES = int(float(os.environ.get("RESUME_MAX_ARCHIVE_MB", "200")) * uploads.MB)
+MAX_ENTRIES = int(os.environ.get("RESUME_MAX_ARCHIVE_ENTRIES", "5000"))
+RESUME_SUFFIXES = (".pdf", ".docx", ".txt")
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+class ArchiveError(Exception):
+    """The archive itself is unreadable (as opposed to one bad entry)."""
+
+
+def is_archive(filename: str) -> bool:
+    name = (filename or "").lower()
+    return name.endswith(".zip") or name.endswith(TAR_SUFFIXES)
+
+
+def _skip(name: str) -> bool:
+    base = name.rsplit("/", 1)[-1]
+    return not base or base.startswith(".") or name.startswith("__MACOSX/")
+
+
+def _iter_zip(fp):
+    try:
+        zf = zipfile.ZipFile(fp)
+    except zipfile.BadZipFile as e:
+        raise ArchiveError(f"not a valid zip archive: {e}")
+    with zf:
+        for info in zf.infolist():
+            if info.is_dir() or _skip(info.filename):
+                continue
+            if info.file_size > uploads.MAX_UPLOAD_BYTES:
+                yield info.filename, None, f"entry is {info.file_size} bytes; limit is {uploads.MAX_UPLOAD_BYTES}"
+                continue
+            try:
+                with zf.open(info) as member:
+                    # read one byte past the limit in case the header lies (zip bombs)
+                    raw = member.read(uploads.MAX_UPLOAD_BYTES + 1)
+            except Exception as e:
+                yield info.filename, None, f"{type(e).__name__}: {e}"
+                continue
+            if len(raw) > uploads.MAX_UPLOAD_BYTES:
+                yield info.filename, None, "entry exceeds the upload limit"
+                continue
+            yield info.filename, raw, None
+
+
+def _iter_tar(fp):
+    try:
+        tf = tarfile.open(fileobj=fp, mode="r|*")  # streaming: no seeking, no temp files
+    except tarfile.TarError as e:
+        raise ArchiveError(f"not a valid tar archive: {e}")
+    with tf:
+        try:
+            for member in tf:
+                if not member.isfile() or _skip(member.name):
+                    continue
+                if member.size > uploads.MAX_UPLOAD_BYTES:
+                    yield member.name, None, f"entry is {member.size} bytes; limit is {uploads.MAX_UPLOAD_BYTES}"
+                    continue
+                yield member.name, tf.extractfile(member).read(), None
+        except tarfile.TarError as e:
+            yield "<archive>", None, f"archive truncated or corrupt: {e}"
+
+
+def iter_archive(fp, filename: str):
+    """Yield (entry_name, raw_bytes | None, error | None) for every resume-like entry."""
+    name = (filename or "").lower()
+    entries = _iter_tar(fp) if name.endswith(TAR_SUFFIXES) else _iter_zip(fp)
+    count = 0
+    for entry, raw, err in entries:
+        if err is None and not entry.lower().endswith(RESUME_SUFFIXES):
+            if is_archive(entry):
+                err = "nested archives are not supported"
+            else:
+                continue
+        count += 1
+        if count > MAX_ENTRIES:
+            yield entry, None, f"archive has more than {MAX_ENTRIES} resumes; rest skipped"
+            return
+        yield entry, raw, err
+
+
+def _public(rec: dict, role: str = None) -> dict:
+    row = skill_gap(rec, role) if role else {k: v for k, v in rec.items() if k != "text"}
+    row["status"] = "error" if row.get("error") else "ok"
+    return row
+
+
+def ingest(fp, filename: str, engine: BatchEngine, role: str = None):
+    """Yield one result dict per archive entry, in completion order."""
+    errors = []
+
+    def entries():
+        for name, raw, err in iter_archive(fp, filename):
+            if err is None:
+                yield name, raw
+            else:
+                errors.append({"name": name, "hash": None, "error": err, "status": "error"})
+
+    for rec in engine.run(entries()):
+        while errors:
+            yield errors.pop(0)
+        yield _public(rec, role)
+    while errors:
+        yield errors.pop(0)
+
+
+def to_ndjson(results):
+    for r in results:
+        yield json.dumps(r, ensure_ascii=False) + "\n"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Classify every resume inside a zip/tar archive.")
+    ap.add_argument("archive")
+    ap.add_argument("--role", default=None, help="also compute skill coverage for this role")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("-o", "--output", default="-", help="NDJSON output file (default: stdout)")
+    args = ap.parse_args(argv)
+
+    engine = BatchEngine(max_workers=args.workers) if args.workers else BatchEngine()
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    ok = failed = 0
+    try:
+        with open(args.archive, "rb") as fp:
+            for r in ingest(fp, args.archive, engine, args.role):
+                out.write(json.dumps(r, ensure_ascii=False) + "\n")
+                out.flush()
+                if r["status"] == "error":
+                    failed += 1
+                else:
+                    ok += 1
+    except ArchiveError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        engine.shutdown()
+        if out is not sys.stdout:
+            out.close()
+    print(f"{ok} ok, {failed} failed", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
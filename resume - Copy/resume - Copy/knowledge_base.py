@@ -0,0 +1,174 @@
+# ==================================================
+# knowledge_base.py - roles, skills, synonyms, courses and
+# certificates loaded from versioned JSON files in kb/
+#
+#   kb/manifest.json      {"version": "..."}
+#   kb/roles.json         roles -> skills, role aliases, classifier label map
+#   kb/skills.json        skill synonyms -> canonical skill
+#   kb/courses.json       skill -> course
+#   kb/certificates.json  skill -> certificate
+#
+# Files are compiled into an immutable snapshot (interned skill ids,
+# role bitsets, suggestion catalog, role resolver). When a file changes
+# a new snapshot is built in the background and swapped in with one
+# assignment; requests already holding the old snapshot finish on it.
+# ==================================================
+import hashlib
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from role_resolver import RoleResolver, load_encoder_labels
+from skill_matrix import SkillMatrix
+from suggestion_catalog import SuggestionCatalog
+
+KB_DIR = os.environ.get("RESUME_KB_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "kb"))
+KB_FILES = ("manifest.json", "roles.json", "skills.json", "courses.json", "certificates.json")
+RELOAD_CHECK_SECONDS = float(os.environ.get("RESUME_KB_RELOAD_SECONDS", "2"))
+
+
+class KnowledgeBaseError(Exception):
+    """A KB file is missing or malformed; the previous snapshot stays active."""
+
+
+class KnowledgeBase:
+    """One immutable, fully indexed KB snapshot."""
+
+    def __init__(self, version: str, role_skills, aliases, category_map, synonyms,
+                 courses, certificates, default_role: str):
+        self.version = version
+        self.role_skills = MappingProxyType({r: tuple(s) for r, s in role_skills.items()})
+        self.roles = tuple(self.role_skills)
+        self.aliases = MappingProxyType(dict(aliases))
+        self.category_map = MappingProxyType(dict(category_map))
+        self.synonyms = MappingProxyType(dict(synonyms))
+        self.courses = MappingProxyType(dict(courses))
+        self.certificates = MappingProxyType(dict(certificates))
+
+        self.matrix = SkillMatrix(role_skills, synonyms)
+        self.catalog = SuggestionCatalog(role_skills, courses, certificates)
+        self._resolver = RoleResolver(self.roles, {**aliases, **category_map}, default=default_role)
+        self._labels_indexed = False
+        self._labels_lock = threading.Lock()
+
+    @property
+    def resolver(self) -> RoleResolver:
+        # encoder.pkl needs sklearn to unpickle, so its labels are indexed on first use
+        if not self._labels_indexed:
+            with self._labels_lock:
+                if not self._labels_indexed:
+                    self._resolver.add_labels(load_encoder_labels(), self.category_map)
+                    self._labels_indexed = True
+        return self._resolver
+
+
+def _read(kb_dir: str, name: str) -> dict:
+    path = os.path.join(kb_dir, name)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise KnowledgeBaseError(f"{path}: {e}")
+
+
+def _fingerprint(kb_dir: str) -> tuple:
+    out = []
+    for name in KB_FILES:
+        try:
+            st = os.stat(os.path.join(kb_dir, name))
+            out.append((name, st.st_size, st.st_mtime_ns))
+        except OSError:
+            out.append((name, None, None))
+    return tuple(out)
+
+
+def load(kb_dir: str = KB_DIR) -> KnowledgeBase:
+    """Read and compile the KB files into a snapshot. Raises KnowledgeBaseError."""
+    docs = {name: _read(kb_dir, name) for name in KB_FILES}
+    digest = hashlib.sha1(json.dumps(docs, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    roles = docs["roles.json"]
+    role_skills = roles.get("roles") or {}
+    if not role_skills:
+        raise KnowledgeBaseError("roles.json defines no roles")
+    for role, skills in role_skills.items():
+        if not isinstance(skills, list) or not all(isinstance(s, str) for s in skills):
+            raise KnowledgeBaseError(f"roles.json: skills for '{role}' must be a list of strings")
+    return KnowledgeBase(
+        version=f"{docs['manifest.json'].get('version', '0')}+{digest}",
+        role_skills=role_skills,
+        aliases=roles.get("aliases", {}),
+        category_map=roles.get("category_map", {}),
+        synonyms=docs["skills.json"].get("synonyms", {}),
+        courses=docs["courses.json"].get("courses", {}),
+        certificates=docs["certificates.json"].get("certificates", {}),
+        default_role=roles.get("default_role", "software engineer"),
+    )
+
+
+class _Holder:
+    """Owns the active snapshot and swaps it when the files on disk change."""
+
+    def __init__(self, kb_dir: str = KB_DIR):
+        self.kb_dir = kb_dir
+        self.snapshot = None
+        self.last_error = None
+        self._fp = None
+        self._checked = 0.0
+        self._reloading = False
+        self._lock = threading.Lock()
+
+    def get(self) -> KnowledgeBase:
+        snap = self.snapshot
+        if snap is None:
+            with self._lock:
+                if self.snapshot is None:
+                    self._fp = _fingerprint(self.kb_dir)
+                    self.snapshot = load(self.kb_dir)
+                return self.snapshot
+        now = time.monotonic()
+        if now - self._checked >= RELOAD_CHECK_SECONDS and not self._reloading:
+            self._checked = now
+            if _fingerprint(self.kb_dir) != self._fp:
+                self._reloading = True
+                threading.Thread(target=self.reload, daemon=True, name="kb-reload").start()
+        return snap
+
+    def reload(self) -> bool:
+        """Rebuild from disk and swap atomically. Keeps the old snapshot on error."""
+        try:
+            fp = _fingerprint(self.kb_dir)
+            snap = load(self.kb_dir)
+            with self._lock:
+                self._fp = fp
+                self.snapshot = snap  # single reference assignment = atomic swap
+                self.last_error = None
+            return True
+        except KnowledgeBaseError as e:
+            self.last_error = str(e)
+            with self._lock:
+                self._fp = _fingerprint(self.kb_dir)  # don't retry until the file changes again
+            return False
+        finally:
+            self._reloading = False
+
+
+_HOLDER = _Holder()
+
+
+def current() -> KnowledgeBase:
+    """Active snapshot. Grab it once per request and use it throughout."""
+    return _HOLDER.get()
+
+
+def reload() -> bool:
+    return _HOLDER.reload()
+
+
+def version() -> str:
+    return current().version
+
+
+def status() -> dict:
+    return {"version": current().version, "dir": _HOLDER.kb_dir, "last_error": _HOLDER.last_error}
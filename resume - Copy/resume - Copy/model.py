@@ -2,29 +2,43 @@
 # model.py
 # Helpers for cleaning & predict
 # ===========================
+import os
 import re
+import time
 import pickle
-import nltk
-from nltk.corpus import stopwords
+import threading
+from typing import List, NamedTuple
 
-# Download once
-nltk.download('stopwords', quiet=True)
-STOP = set(stopwords.words('english'))
+import budgets
+import embedders
+from stopwords_en import ENGLISH_STOPWORDS
 
-# Lazy singletons
-_EMBEDDER = None
-_MODEL = None
+# Bundled list: no nltk import / network download at startup
+STOP = ENGLISH_STOPWORDS
+
+ENCODER_PATH = "encoder.pkl"
+
+# Two-tier classification: the TF-IDF tier answers first and only escalates to
+# the configured (embedding) backend when its top-1 vs top-2 margin is small.
+FAST_BACKEND = "tfidf"
+ESCALATION_MARGIN = float(os.environ.get("RESUME_ESCALATION_MARGIN", "0.20"))
+# How many categories (best first, calibrated) predictions carry
+TOP_K = int(os.environ.get("RESUME_TOP_K", "3"))
+
+# Lazy singletons (embedder/classifier are cached per backend in embedders.py)
 _ENCODER = None
 
-def _load_artifacts():
-    global _EMBEDDER, _MODEL, _ENCODER
-    if _EMBEDDER is None:
-        _EMBEDDER = pickle.load(open("vectorizer.pkl", "rb"))
-    if _MODEL is None:
-        _MODEL = pickle.load(open("model.pkl", "rb"))
+def _load_encoder():
+    global _ENCODER
     if _ENCODER is None:
-        _ENCODER = pickle.load(open("encoder.pkl", "rb"))
-    return _EMBEDDER, _MODEL, _ENCODER
+        _ENCODER = pickle.load(open(ENCODER_PATH, "rb"))
+    return _ENCODER
+
+def _load_artifacts(backend: str = None):
+    """Return (embedder, classifier, encoder) for the configured backend."""
+    emb = embedders.load_embedder(backend)
+    model = embedders.load_classifier(backend)
+    return emb, model, _load_encoder()
 
 def clean_resume(txt: str) -> str:
     if not txt:
@@ -37,13 +51,115 @@ def clean_resume(txt: str) -> str:
     t = " ".join(w for w in t.split() if w not in STOP)
     return t
 
-def predict_category_and_conf(raw_text: str):
-    """Return (category_name, confidence_percent_float)."""
-    emb, model, enc = _load_artifacts()
-    cleaned = clean_resume(raw_text)
+class Prediction(NamedTuple):
+    category: str
+    confidence: float           # calibrated probability of `category`, in percent
+    margin: float               # raw top-1 minus top-2 probability (what escalation was tuned on)
+    top_k: List[dict]           # [{"category", "confidence"}], best first, calibrated
+    backend: str
+    features: object
+
+def _classify(cleaned: str, backend: str = None, k: int = TOP_K) -> Prediction:
+    """One backend: raw predict_proba, the backend's calibrator on top, the k best categories."""
+    import calibration  # numpy stays out of the cold start
+    backend = embedders.get_backend(backend)
+    emb, model, enc = _load_artifacts(backend)
     X = emb.encode([cleaned])
-    prob = model.predict_proba(X)[0]
-    idx = prob.argmax()
-    cat = enc.inverse_transform([idx])[0]
-    conf = float(prob[idx] * 100.0)
-    return cat, conf
+    raw = model.predict_proba(X)
+    order = raw[0].argsort()
+    margin = float(raw[0][order[-1]] - raw[0][order[-2]]) if len(order) > 1 else float(raw[0][order[-1]])
+    prob = calibration.apply(embedders.load_calibrator(backend), raw)[0]
+    best = prob.argsort()[::-1][:max(1, k)]
+    names = enc.inverse_transform(best)
+    top_k = [{"category": str(n), "confidence": round(float(prob[i]) * 100.0, 2)} for n, i in zip(names, best)]
+    return Prediction(str(names[0]), float(prob[best[0]] * 100.0), margin, top_k, backend, X)
+
+def predict_category_and_conf(raw_text: str, backend: str = None):
+    """Return (category_name, confidence_percent_float).
+
+    With no explicit backend this goes through the two-tier classifier.
+    """
+    if backend is None:
+        return predict_category_two_tier(raw_text)
+    pred = _classify(clean_resume(raw_text), backend)
+    return pred.category, pred.confidence
+
+def predict_top_k(raw_text: str, k: int = TOP_K, backend: str = None) -> List[dict]:
+    """The k most likely categories with calibrated confidences (percent), best first."""
+    cleaned = clean_resume(raw_text)
+    pred = _classify(cleaned, backend, k) if backend else _two_tier(cleaned, k=k)
+    return pred.top_k
+
+# -------- Tier stats --------
+_STATS_LOCK = threading.Lock()
+_TIER_STATS = {"requests": 0, "escalated": 0, "fast_ms": 0.0, "full_ms": 0.0, "fast": 0, "full": 0}
+
+def _record(tier: str, elapsed_ms: float):
+    with _STATS_LOCK:
+        _TIER_STATS[tier] += 1
+        _TIER_STATS[tier + "_ms"] += elapsed_ms
+
+def get_tier_stats() -> dict:
+    """Escalation rate and mean latency per tier since start (or last reset)."""
+    with _STATS_LOCK:
+        s = dict(_TIER_STATS)
+    return {
+        "requests": s["requests"],
+        "escalated": s["escalated"],
+        "escalation_rate": s["escalated"] / s["requests"] if s["requests"] else 0.0,
+        "fast_calls": s["fast"],
+        "full_calls": s["full"],
+        "fast_avg_ms": s["fast_ms"] / s["fast"] if s["fast"] else 0.0,
+        "full_avg_ms": s["full_ms"] / s["full"] if s["full"] else 0.0,
+        "margin_threshold": ESCALATION_MARGIN,
+    }
+
+def reset_tier_stats():
+    with _STATS_LOCK:
+        for k in _TIER_STATS:
+            _TIER_STATS[k] = 0.0 if k.endswith("_ms") else 0
+
+def predict_category_two_tier(raw_text: str, margin_threshold: float = None):
+    """TF-IDF first; escalate to the embedding backend only for low-margin resumes."""
+    pred = _two_tier(clean_resume(raw_text), margin_threshold)
+    return pred.category, pred.confidence
+
+def classify_resume(raw_text: str) -> dict:
+    """Two-tier prediction plus what the result store keeps (cleaned text, dense embedding)."""
+    cleaned = clean_resume(raw_text)
+    pred = _two_tier(cleaned)
+    embedding = None
+    if not hasattr(pred.features, "toarray"):  # only dense (sentence-transformer) vectors are worth keeping
+        embedding = pred.features[0]
+    return {"category": pred.category, "confidence": pred.confidence, "top_k": pred.top_k,
+            "cleaned_text": cleaned, "backend": pred.backend, "embedding": embedding}
+
+def _two_tier(cleaned: str, margin_threshold: float = None, k: int = TOP_K) -> Prediction:
+    """
+    Prediction of the tier that answered (its backend and features included).
+    A request out of time (or with a huge text) keeps the TF-IDF answer
+    instead of escalating.
+    """
+    threshold = ESCALATION_MARGIN if margin_threshold is None else margin_threshold
+    full_backend = embedders.get_backend()
+    with _STATS_LOCK:
+        _TIER_STATS["requests"] += 1
+
+    if full_backend != FAST_BACKEND and FAST_BACKEND in embedders.available_backends():
+        start = time.perf_counter()
+        pred = _classify(cleaned, FAST_BACKEND, k)
+        _record("fast", (time.perf_counter() - start) * 1000.0)
+        if pred.margin >= threshold:
+            return pred
+        budget = budgets.current()
+        if not budget.allows("embed_reserve_seconds", len(cleaned), "embed_chars"):
+            budget.degrade("tfidf_only", f"margin {pred.margin:.2f}, {len(cleaned)} chars, "
+                                         f"{max(0.0, budget.remaining()):.1f}s left")
+            return pred
+        with _STATS_LOCK:
+            _TIER_STATS["escalated"] += 1
+
+    start = time.perf_counter()
+    pred = _classify(cleaned, full_backend, k)
+    _record("full", (time.perf_counter() - start) * 1000.0)
+    return pred
@@ -0,0 +1,359 @@
+# ==================================================
+# ocr.py - OCR fallback for PDF pages without a text layer
+#   detect:  pdfplumber found (next to) no text on the page
+#   raster:  PyMuPDF renders the page to a grayscale image
+#   engine:  a local OCR callable, RESUME_OCR_ENGINE=tesseract|none|module:function,
+#            checked once in the app process; one that can't run falls back
+#            to "none" with a warning instead of failing in every worker
+# Pages are OCR'd one job per page in a dedicated process pool, at most
+# OCR_MAX_PAGES pages per document and within OCR_TIMEOUT seconds per
+# document; pages not done by then stay empty. A page job keeps its
+# in-flight slot until its worker is really done with it, so jobs that
+# outlive their document's timeout still count against OCR_MAX_IN_FLIGHT. Results are cached on disk
+# by page hash (the page's own content stream and images), so retries and
+# re-uploads of the same scan skip the OCR.
+# ==================================================
+import hashlib
+import importlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
+
+OCR_ENGINE = os.environ.get("RESUME_OCR_ENGINE", "tesseract")
+OCR_WORKERS = int(os.environ.get("RESUME_OCR_WORKERS", "2"))
+OCR_MAX_PAGES = int(os.environ.get("RESUME_OCR_MAX_PAGES", "6"))
+OCR_TIMEOUT = float(os.environ.get("RESUME_OCR_TIMEOUT_SECONDS", "45"))
+OCR_MAX_IN_FLIGHT = int(os.environ.get("RESUME_OCR_MAX_INFLIGHT", str(OCR_WORKERS * 4)))
+OCR_DPI = int(os.environ.get("RESUME_OCR_DPI", "200"))
+OCR_CACHE_DIR = os.environ.get("RESUME_OCR_CACHE_DIR", "ocr_cache")
+MIN_TEXT_CHARS = 20     # fewer extracted characters than this: treat the page as scanned
+MEMORY_CACHE_SIZE = 256
+TIMINGS_KEPT = 512
+
+# engine(image, timeout) -> str; image is a grayscale PIL.Image
+Engine = Callable[..., str]
+
+
+# -------- Engines (resolved inside the workers) --------
+def _tesseract(image, timeout: float) -> str:
+    import pytesseract
+    return pytesseract.image_to_string(image, timeout=max(1, int(timeout)))
+
+
+def _no_engine(image, timeout: float) -> str:
+    return ""
+
+
+def _probe_tesseract():
+    import pytesseract
+    pytesseract.get_tesseract_version()  # raises when the tesseract binary is not on PATH
+
+
+ENGINES: Dict[str, Engine] = {"tesseract": _tesseract, "none": _no_engine}
+PROBES = {"tesseract": _probe_tesseract}  # engine name -> check that it can run here
+
+
+def resolve_engine(name: str = None) -> Engine:
+    """Built-in engine by name, or any importable callable as "package.module:function"."""
+    name = (name or OCR_ENGINE).strip()
+    if name in ENGINES:
+        return ENGINES[name]
+    if ":" in name:
+        module, attr = name.split(":", 1)
+        return getattr(importlib.import_module(module), attr)
+    raise ValueError(f"Unknown OCR engine '{name}'. Choose one of: {', '.join(ENGINES)} or module:function")
+
+
+def usable_engine(name: str = None) -> str:
+    """`name` if that engine can run in this environment, else "none" (with a warning)."""
+    name = (name or OCR_ENGINE).strip()
+    try:
+        resolve_engine(name)
+        PROBES.get(name, lambda: None)()
+    except Exception as e:
+        if name != "none":
+            print(f"OCR engine '{name}' unavailable ({type(e).__name__}: {e}); scanned pages stay empty",
+                  file=sys.stderr)
+        return "none"
+    return name
+
+
+def needs_ocr(page_text: str) -> bool:
+    return len((page_text or "").strip()) < MIN_TEXT_CHARS
+
+
+# -------- Page hash + cache --------
+def page_hash(doc, page, dpi: int = OCR_DPI, engine: str = None) -> str:
+    """
+    Hash of what the page draws: its content stream plus the raw bytes of
+    the images it uses (a scan is one image per page). The same scanned
+    page inside a different PDF file has the same hash.
+    """
+    h = hashlib.sha1()
+    h.update(f"{engine or OCR_ENGINE}|{dpi}|{page.rotation}|".encode("utf-8"))
+    h.update(page.read_contents())
+    for img in page.get_images(full=True):
+        h.update(doc.xref_stream_raw(img[0]) or b"")
+    return h.hexdigest()
+
+
+class _PageCache:
+    """OCR text per page hash: a small in-memory LRU in front of one file per page."""
+
+    def __init__(self, directory: str = OCR_CACHE_DIR, size: int = MEMORY_CACHE_SIZE):
+        self.directory = directory
+        self.size = size
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".txt")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                return self._mem[key]
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            return None
+        self._remember(key, text)
+        return text
+
+    def put(self, key: str, text: str):
+        self._remember(key, text)
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, path)  # concurrent writers of one page write the same text
+        except OSError:
+            pass  # read-only deployments still get the in-memory cache
+
+    def _remember(self, key: str, text: str):
+        with self._lock:
+            self._mem[key] = text
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.size:
+                self._mem.popitem(last=False)
+
+
+# -------- Worker side --------
+_WORKER_ENGINE = None
+
+
+def _init_worker(engine_name: str):
+    global _WORKER_ENGINE
+    _WORKER_ENGINE = resolve_engine(engine_name)
+
+
+def _ocr_job(page_pdf: bytes, dpi: int, timeout: float):
+    """Rasterize a one-page PDF and OCR it. Returns (text, raster_ms, ocr_ms)."""
+    import pymupdf
+    from PIL import Image
+    start = time.perf_counter()
+    with pymupdf.open(stream=page_pdf, filetype="pdf") as doc:
+        pix = doc[0].get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY, alpha=False)
+        image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    raster_ms = (time.perf_counter() - start) * 1000.0
+    start = time.perf_counter()
+    text = _WORKER_ENGINE(image, timeout) or ""
+    return text.strip(), raster_ms, (time.perf_counter() - start) * 1000.0
+
+
+def _single_page_pdf(doc, index: int) -> bytes:
+    """Page `index` as its own small PDF (only that page's resources are shipped to a worker)."""
+    import pymupdf
+    with pymupdf.open() as out:
+        out.insert_pdf(doc, from_page=index, to_page=index)
+        return out.tobytes(garbage=1)
+
+
+# -------- Service --------
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class OcrService:
+    """Process pool for OCR jobs, a page cache in front of it and per-page timings."""
+
+    def __init__(self, engine: str = OCR_ENGINE, max_workers: int = OCR_WORKERS,
+                 max_pages: int = OCR_MAX_PAGES, timeout: float = OCR_TIMEOUT,
+                 max_in_flight: int = OCR_MAX_IN_FLIGHT, dpi: int = OCR_DPI, cache: _PageCache = None):
+        self.engine = engine
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.dpi = dpi
+        self.cache = cache or _PageCache()
+        self._pool = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counts = {"documents": 0, "pages": 0, "cache_hits": 0, "skipped_over_cap": 0,
+                        "skipped_busy": 0, "timeouts": 0, "errors": 0}
+        self._timings = deque(maxlen=TIMINGS_KEPT)  # (raster_ms, ocr_ms)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                                 initargs=(self.engine,))
+            return self._pool
+
+    def _discard_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._counts[key] += n
+
+    def _reserve(self, n: int) -> int:
+        """Take up to n in-flight page slots; the rest of the pages are skipped, not queued."""
+        with self._lock:
+            got = max(0, min(n, self.max_in_flight - self._in_flight))
+            self._in_flight += got
+            return got
+
+    def _release(self, n: int):
+        with self._lock:
+            self._in_flight -= n
+
+    def fill_pages(self, pdf, page_texts: List[str], timeout: float = None) -> List[str]:
+        """
+        page_texts with the scanned pages (see needs_ocr) replaced by OCR text.
+        `pdf` is the document's bytes (bytes, bytearray or memoryview);
+        `timeout` shortens the per-document limit (a request budget's remainder).
+        Never raises for OCR problems: pages that could not be read stay as they were.
+        """
+        todo = [i for i, t in enumerate(page_texts) if needs_ocr(t)]
+        if not todo or self.engine == "none":
+            return page_texts
+        try:
+            import pymupdf
+        except ImportError:
+            self._count("errors")
+            return page_texts
+        self._count("documents")
+        out = list(page_texts)
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        deadline = time.monotonic() + timeout
+        with pymupdf.open(stream=bytes(pdf), filetype="pdf") as doc:
+            keys = {}
+            for i in todo:
+                if i >= doc.page_count:
+                    continue
+                key = page_hash(doc, doc[i], self.dpi, self.engine)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    self._count("cache_hits")
+                    out[i] = cached
+                else:
+                    keys[i] = key
+            pending = sorted(keys)[:self.max_pages]
+            self._count("skipped_over_cap", len(keys) - len(pending))
+            if not pending:
+                return out
+            slots = self._reserve(len(pending))
+            self._count("skipped_busy", len(pending) - slots)
+            pending = pending[:slots]
+            if not pending:
+                return out
+            futures = {}
+            try:
+                pool = self._executor()
+                for i in pending:
+                    fut = pool.submit(_ocr_job, _single_page_pdf(doc, i), self.dpi, timeout)
+                    futures[fut] = i
+                    # the slot is freed when the job is cancelled or its worker finishes, not at our deadline
+                    fut.add_done_callback(self._release_one)
+                done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+                for fut in not_done:
+                    if not fut.cancel():  # already running: keep its text for the retry
+                        fut.add_done_callback(self._cache_late(keys[futures[fut]]))
+                self._count("timeouts", len(not_done))
+                for fut in done:
+                    i = futures[fut]
+                    try:
+                        text, raster_ms, ocr_ms = fut.result()
+                    except BrokenProcessPool:
+                        self._discard_pool(pool)  # a worker died; the next document starts a fresh pool
+                        self._count("errors")
+                        continue
+                    except Exception:
+                        self._count("errors")
+                        continue
+                    self.cache.put(keys[i], text)
+                    out[i] = text
+                    with self._lock:
+                        self._counts["pages"] += 1
+                        self._timings.append((raster_ms, ocr_ms))
+            finally:
+                self._release(slots - len(futures))  # slots of pages never submitted
+        return out
+
+    def _release_one(self, fut):
+        self._release(1)
+
+    def _cache_late(self, key: str):
+        def done(fut):
+            if not fut.cancelled() and fut.exception() is None:
+                self.cache.put(key, fut.result()[0])
+        return done
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            in_flight = self._in_flight
+            timings = list(self._timings)
+        raster = sorted(r for r, _ in timings)
+        ocr = sorted(o for _, o in timings)
+        return {
+            "engine": self.engine,
+            "configured_engine": OCR_ENGINE,
+            "workers": self.max_workers,
+            "max_pages": self.max_pages,
+            "timeout_seconds": self.timeout,
+            "in_flight": in_flight,
+            **counts,
+            "raster_p50_ms": round(_percentile(raster, 0.50), 2),
+            "raster_p95_ms": round(_percentile(raster, 0.95), 2),
+            "ocr_p50_ms": round(_percentile(ocr, 0.50), 2),
+            "ocr_p95_ms": round(_percentile(ocr, 0.95), 2),
+        }
+
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+def get_service() -> OcrService:
+    global _SERVICE
+    if _SERVICE is None:
+        with _SERVICE_LOCK:
+            if _SERVICE is None:
+                _SERVICE = OcrService(engine=usable_engine(OCR_ENGINE))
+    return _SERVICE
+
+
+def fill_pages(pdf, page_texts: List[str], timeout: float = None) -> List[str]:
+    if OCR_ENGINE == "none":
+        return page_texts
+    return get_service().fill_pages(pdf, page_texts, timeout)
+
+
+def stats() -> dict:
+    return get_service().stats()
@@ -1,20 +1,8 @@
 import io
 import streamlit as st
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from docx import Document
-
-from model import predict_category_and_conf
-from suggest import analyze_for_role, ALL_ROLES, log_feedback_rows
-
-# ✅ import all extractors
-from extract_utils import (
-    extract_name_from_text,
-    extract_email,
-    extract_phone,
-    extract_linkedin,
-    extract_github,
-)
+
+from suggest import analyze_for_role, resolve_role, get_all_roles, log_feedback_rows, record_skill_feedback
+import ui_cache
 
 st.set_page_config(page_title="Resume Editor", layout="wide")
 st.title("✏️ Resume Editor")
@@ -24,23 +12,19 @@ if "resume_text" not in st.session_state:
     st.stop()
 
 resume_text = st.session_state["resume_text"]
-chosen_category = st.session_state.get("chosen_category", ALL_ROLES[0])
+chosen_category = st.session_state.get("chosen_category", get_all_roles()[0])
 
 # ----------------------------
 # Auto-extracted basics
 # ----------------------------
 with st.expander("🔎 Auto-Extracted Basics (you can copy these into your resume):", expanded=True):
-    nm = extract_name_from_text(resume_text)
-    em = extract_email(resume_text)
-    ph = extract_phone(resume_text)
-    li = extract_linkedin(resume_text)
-    gh = extract_github(resume_text)
-
-    st.write(f"**Name (guess):** {nm}")
-    st.write(f"**Email:** {em}")
-    st.write(f"**Phone:** {ph}")
-    st.write(f"**LinkedIn:** {li}")
-    st.write(f"**GitHub:** {gh}")
+    info = ui_cache.contacts(resume_text)  # one pass over the header, cached per text
+
+    st.write(f"**Name (guess):** {info.name}")
+    st.write(f"**Email:** {', '.join(info.all('email')) or info.first('email')}")
+    st.write(f"**Phone:** {', '.join(info.all('phone')) or info.first('phone')}")
+    st.write(f"**LinkedIn:** {info.first('linkedin')}")
+    st.write(f"**GitHub:** {info.first('github')}")
 
 # ----------------------------
 # Editor
@@ -49,15 +33,16 @@ st.markdown("### 📝 Edit Your Resume Text")
 edited_resume = st.text_area("Make your changes below:", value=resume_text, height=420)
 
 st.markdown("### 🎯 Target Role / Category (override if you want)")
-roles = sorted(set(ALL_ROLES + [chosen_category]))
+roles = sorted(set(get_all_roles() + [chosen_category]))
 cat_idx = roles.index(chosen_category) if chosen_category in roles else 0
 user_category = st.selectbox("Category to analyze against:", roles, index=cat_idx)
 st.session_state["chosen_category"] = user_category
+st.caption(f"Skill table used: **{resolve_role(user_category)}**")
 
 if st.button("🔄 Re-check Edited Resume"):
-    pred_cat, conf = predict_category_and_conf(edited_resume)
+    pred_cat, conf = ui_cache.predict(edited_resume)
     st.success(f"Model thinks: **{pred_cat}** (Confidence: {conf:.2f}%)")
-    res = analyze_for_role(edited_resume, user_category)
+    res = ui_cache.analyze(edited_resume, user_category)
 
     col1, col2 = st.columns(2)
     with col1:
@@ -66,6 +51,9 @@ if st.button("🔄 Re-check Edited Resume"):
 
         st.markdown("#### 🧩 Missing / Important Skills")
         for s in res["missing_skills"]: st.write(f"- {s}") if res["missing_skills"] else st.write("No gaps detected.")
+        if res.get("weak_skills"):
+            st.caption("Mentioned but thinly evidenced (add dated projects/experience):")
+            for s in res["weak_skills"]: st.write(f"- {s} ({res['skill_strength'][s]:.0%})")
 
     with col2:
         st.markdown("#### 💡 Projects to Add")
@@ -84,29 +72,15 @@ if st.button("🔄 Re-check Edited Resume"):
 # Download helpers
 # ----------------------------
 def make_pdf(text: str) -> bytes:
-    buf = io.BytesIO()
-    c = canvas.Canvas(buf, pagesize=letter)
-    width, height = letter
-    left, top = 50, height - 50
-    c.setFont("Helvetica", 11)
-    y = top
-    for line in (text or "").splitlines():
-        while len(line) > 95:
-            c.drawString(left, y, line[:95])
-            line = line[95:]
-            y -= 14
-            if y < 60:
-                c.showPage(); c.setFont("Helvetica", 11); y = top
-        c.drawString(left, y, line)
-        y -= 14
-        if y < 60:
-            c.showPage(); c.setFont("Helvetica", 11); y = top
-    c.showPage()
-    c.save()
-    buf.seek(0)
-    return buf.read()
+    # same width-aware layout as the API; rendered in-process (memoized per text below),
+    # cut to the render budget so a giant paste cannot pin the session
+    import budgets
+    from pdf_render import render_plain
+    with budgets.scope() as budget:
+        return render_plain(budget.clip_text(text, "render_chars", "render_truncated"))
 
 def make_docx(text: str) -> bytes:
+    from docx import Document
     buf = io.BytesIO()
     d = Document()
     for para in (text or "").splitlines():
@@ -117,12 +91,19 @@ def make_docx(text: str) -> bytes:
 
 st.markdown("### ⬇️ Download Updated Resume")
 target_text = st.session_state.get("edited_resume", resume_text)
+target_hash = ui_cache.content_hash(target_text)
+
+# PDF/DOCX are only rendered on request, then reused until the text changes
+if st.session_state.get("downloads_for") != target_hash:
+    if st.button("⚙️ Prepare PDF / DOCX downloads"):
+        st.session_state["downloads_for"] = target_hash
 
 c1, c2, c3 = st.columns(3)
-with c1:
-    st.download_button("📄 Download PDF", data=make_pdf(target_text), file_name="Updated_Resume.pdf", mime="application/pdf")
-with c2:
-    st.download_button("📝 Download DOCX", data=make_docx(target_text), file_name="Updated_Resume.docx", mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+if st.session_state.get("downloads_for") == target_hash:
+    with c1:
+        st.download_button("📄 Download PDF", data=ui_cache.session_memo(("pdf", target_hash), make_pdf, target_text), file_name="Updated_Resume.pdf", mime="application/pdf")
+    with c2:
+        st.download_button("📝 Download DOCX", data=ui_cache.session_memo(("docx", target_hash), make_docx, target_text), file_name="Updated_Resume.docx", mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
 with c3:
     st.download_button("📃 Download TXT", data=target_text.encode("utf-8"), file_name="Updated_Resume.txt", mime="text/plain")
 
@@ -133,7 +114,7 @@ st.markdown("### 📝 Feedback (helps the AI improve)")
 fb_txt = st.text_input("Optional comments")
 reward = st.radio("Were these suggestions useful?", [1, -1], index=0, format_func=lambda x: "👍 Yes" if x == 1 else "👎 No")
 if st.button("Submit Feedback"):
-    from train_rl_from_feedback import train_incremental
+    from train_rl_from_feedback import apply_skill_evidence, train_incremental
     analysis = st.session_state.get("last_analysis", analyze_for_role(target_text, user_category))
     rows = []
     for s in analysis.get("missing_skills", []): rows.append(("skill", s))
@@ -144,6 +125,10 @@ if st.button("Submit Feedback"):
     st.success("✅ Feedback recorded.")
     try:
         train_incremental()
+        strength = analysis.get("skill_strength", {})
+        suggested = analysis.get("missing_skills", []) + analysis.get("weak_skills", [])
+        apply_skill_evidence({s: strength.get(s, 0.0) for s in suggested}, reward)
+        record_skill_feedback(target_text, user_category, suggested, reward)
         st.caption("RL weights lightly updated.")
     except Exception:
         st.caption("Feedback logged.")
@@ -0,0 +1,68 @@
+import streamlit as st
+
+from suggest import get_all_roles
+import batch_engine
+
+st.set_page_config(page_title="Batch Compare", layout="wide")
+st.title("📚 Compare & Rank Resumes")
+
+
+@st.cache_resource(show_spinner=False)
+def get_engine():
+    # one pool per server process; workers keep their models loaded between runs
+    return batch_engine.BatchEngine()
+
+
+engine = get_engine()
+records = st.session_state.setdefault("batch_records", {})  # hash -> stage-1 record
+
+uploads = st.file_uploader("📤 Upload resumes (PDF, DOCX, TXT)", type=["pdf", "docx", "txt"],
+                           accept_multiple_files=True)
+role = st.selectbox("🎯 Rank against role:", get_all_roles())
+sort_by = st.selectbox("Sort by:", ["coverage", "confidence", "missing_count", "name"])
+descending = sort_by in ("coverage", "confidence")  # scores best-first; gaps and names ascending
+
+table = st.empty()
+
+
+def show(rows):
+    table.dataframe(batch_engine.to_dataframe(rows), use_container_width=True, hide_index=True)
+
+
+if uploads:
+    todo = []
+    for f in uploads:
+        raw = f.getvalue()
+        h = batch_engine.content_hash(raw)
+        if h not in records:
+            todo.append((f.name, raw))
+
+    if todo:
+        progress = st.progress(0.0, text=f"Processing {len(todo)} new resume(s)...")
+        for i, rec in enumerate(engine.run(todo), 1):
+            records[rec["hash"]] = rec
+            # stream partial results into the table as each resume finishes
+            show(engine.rank(records.values(), role, sort_by, descending))
+            progress.progress(i / len(todo), text=f"{i}/{len(todo)} processed")
+        progress.empty()
+
+    # role / sort changes land here: only the skill-gap stage reruns
+    current = {batch_engine.content_hash(f.getvalue()) for f in uploads}
+    rows = engine.rank([r for h, r in records.items() if h in current], role, sort_by, descending)
+    show(rows)
+
+    failed = sum(1 for r in rows if r.get("error"))
+    st.caption(f"{len(rows)} resume(s), {failed} with errors.")
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.download_button("⬇️ Export CSV", data=batch_engine.to_csv_bytes(rows),
+                           file_name="resume_ranking.csv", mime="text/csv")
+    with c2:
+        try:
+            st.download_button("⬇️ Export Parquet", data=batch_engine.to_parquet_bytes(rows),
+                               file_name="resume_ranking.parquet", mime="application/octet-stream")
+        except ImportError:
+            st.caption("Install pyarrow to enable Parquet export.")
+else:
+    st.caption("Upload one or more resumes to compare them.")
@@ -0,0 +1,261 @@
+# ==================================================
+# pdf_render.py - PDF rendering off the request thread
+#   plain:    the editor's simple PDF, lines broken by measured width
+#   template: resume_templates.generate_resume_pdf (50 styles)
+# Renders run in a small process pool whose workers register the fonts
+# and build every template style once at start-up. A bounded number of
+# renders may be queued or running; past that callers get RenderBusy.
+# A render that times out keeps its slot until its worker is done with it.
+# Within a request budget (budgets.py) huge texts are rendered plain or
+# truncated, and the render timeout never outlasts the request.
+# ==================================================
+import io
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+import budgets
+
+RENDER_WORKERS = int(os.environ.get("RESUME_RENDER_WORKERS", str(min(4, max(1, (os.cpu_count() or 2) - 1)))))
+MAX_IN_FLIGHT = int(os.environ.get("RESUME_RENDER_MAX_INFLIGHT", str(RENDER_WORKERS * 2)))
+QUEUE_WAIT_SECONDS = float(os.environ.get("RESUME_RENDER_QUEUE_WAIT_SECONDS", "2"))
+RENDER_TIMEOUT = float(os.environ.get("RESUME_RENDER_TIMEOUT_SECONDS", "30"))
+STREAM_CHUNK = 64 * 1024
+TIMINGS_KEPT = 512  # recent renders used for the percentiles in stats()
+
+# plain layout (letter, as the old inline renderer)
+PLAIN_FONT = "Helvetica"
+PLAIN_SIZE = 11
+PLAIN_LEADING = 14
+MARGIN = 50
+BOTTOM = 60
+
+
+class RenderBusy(Exception):
+    """Too many renders queued or running (HTTP 503)."""
+    status_code = 503
+
+
+class RenderTimeout(Exception):
+    """A render did not finish within RENDER_TIMEOUT (HTTP 504)."""
+    status_code = 504
+
+
+# -------- Width-aware line breaking --------
+@lru_cache(maxsize=8192)
+def glyph_width(ch: str, font: str, size: float) -> float:
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    return stringWidth(ch, font, size)
+
+
+def text_width(s: str, font: str = PLAIN_FONT, size: float = PLAIN_SIZE) -> float:
+    # the standard fonts have no kerning, so the sum of glyph widths is exact
+    return sum(glyph_width(ch, font, size) for ch in s)
+
+
+def wrap_line(line: str, max_width: float, font: str = PLAIN_FONT, size: float = PLAIN_SIZE):
+    """Greedy break at spaces; a word wider than the line is split between characters."""
+    if text_width(line, font, size) <= max_width:
+        return [line]
+    space = glyph_width(" ", font, size)
+    out, cur, cur_w = [], "", 0.0
+    for word in line.split(" "):
+        w = text_width(word, font, size)
+        if cur and cur_w + space + w <= max_width:
+            cur, cur_w = cur + " " + word, cur_w + space + w
+            continue
+        if cur:
+            out.append(cur)
+        cur, cur_w = "", 0.0
+        while w > max_width:
+            piece, piece_w = "", 0.0
+            for ch in word:
+                cw = glyph_width(ch, font, size)
+                if piece and piece_w + cw > max_width:
+                    break
+                piece, piece_w = piece + ch, piece_w + cw
+            out.append(piece)
+            word = word[len(piece):]
+            w -= piece_w
+        cur, cur_w = word, w
+    out.append(cur)
+    return out
+
+
+# -------- Renderers (run inside the workers) --------
+def render_plain(text: str) -> bytes:
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=letter)
+    width, height = letter
+    max_width = width - 2 * MARGIN
+    y = height - MARGIN
+    c.setFont(PLAIN_FONT, PLAIN_SIZE)
+    for line in (text or "").splitlines():
+        for part in wrap_line(line.expandtabs(4), max_width):
+            c.drawString(MARGIN, y, part)
+            y -= PLAIN_LEADING
+            if y < BOTTOM:
+                c.showPage(); c.setFont(PLAIN_FONT, PLAIN_SIZE); y = height - MARGIN
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def render_template(text: str, template_id: int) -> bytes:
+    from resume_templates import generate_resume_pdf
+    buf = io.BytesIO()
+    generate_resume_pdf(text or "", template_id, buf)
+    return buf.getvalue()
+
+
+def _init_worker():
+    import resume_templates
+    resume_templates.preload()
+    for code in range(32, 127):  # printable ASCII of the plain font
+        glyph_width(chr(code), PLAIN_FONT, PLAIN_SIZE)
+
+
+def _render_job(kind: str, text: str, template_id: int):
+    start = time.perf_counter()
+    pdf = render_template(text, template_id) if kind == "template" else render_plain(text)
+    return pdf, (time.perf_counter() - start) * 1000.0
+
+
+# -------- Service --------
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class RenderService:
+    """Process pool plus an in-flight limit and per-render timings."""
+
+    def __init__(self, max_workers: int = RENDER_WORKERS, max_in_flight: int = MAX_IN_FLIGHT):
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._counts = {"plain": 0, "template": 0, "rejected": 0, "timeouts": 0, "errors": 0, "bytes": 0}
+        self._in_flight = 0
+        self._timings = deque(maxlen=TIMINGS_KEPT)  # (total_ms, render_ms)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker)
+            return self._pool
+
+    def _discard_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._counts[key] += n
+
+    def _release(self, fut=None):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def render(self, kind: str, text: str, template_id: int = 1,
+               timeout: float = RENDER_TIMEOUT) -> bytes:
+        """PDF bytes for `kind` ("plain" or "template"); raises RenderBusy / RenderTimeout."""
+        if not self._slots.acquire(timeout=QUEUE_WAIT_SECONDS):
+            self._count("rejected")
+            raise RenderBusy("PDF rendering is busy; retry shortly.")
+        start = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            pool = self._executor()
+            fut = pool.submit(_render_job, kind, text, template_id)
+        except BaseException:
+            self._release()
+            raise
+        # freed when the job is cancelled or its worker finishes, not when we stop waiting:
+        # a timed-out render still occupies a worker, so it keeps counting against max_in_flight
+        fut.add_done_callback(self._release)
+        try:
+            pdf, render_ms = fut.result(timeout=timeout)
+        except FutureTimeout:
+            fut.cancel()  # only succeeds while the job is still queued
+            self._count("timeouts")
+            raise RenderTimeout(f"PDF rendering took longer than {timeout:g}s.")
+        except BrokenProcessPool:
+            self._discard_pool(pool)  # a worker died; the next render starts a fresh pool
+            self._count("errors")
+            raise
+        except Exception:
+            self._count("errors")
+            raise
+        total_ms = (time.perf_counter() - start) * 1000.0
+        with self._lock:
+            self._counts[kind if kind == "template" else "plain"] += 1
+            self._counts["bytes"] += len(pdf)
+            self._timings.append((total_ms, render_ms))
+        return pdf
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            in_flight = self._in_flight
+            timings = list(self._timings)
+        total = sorted(t for t, _ in timings)
+        render = sorted(r for _, r in timings)
+        return {
+            "workers": self.max_workers,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": in_flight,
+            **counts,
+            "recent": len(timings),
+            "total_p50_ms": round(_percentile(total, 0.50), 2),
+            "total_p95_ms": round(_percentile(total, 0.95), 2),
+            "render_p50_ms": round(_percentile(render, 0.50), 2),
+            "render_p95_ms": round(_percentile(render, 0.95), 2),
+            # time spent outside the renderer: pickling, queueing, pool start-up
+            "overhead_avg_ms": round(sum(t - r for t, r in timings) / len(timings), 2) if timings else 0.0,
+        }
+
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+def get_service() -> RenderService:
+    global _SERVICE
+    if _SERVICE is None:
+        with _SERVICE_LOCK:
+            if _SERVICE is None:
+                _SERVICE = RenderService()
+    return _SERVICE
+
+
+def render(kind: str, text: str, template_id: int = 1) -> bytes:
+    budget = budgets.current()
+    text = budget.clip_text(text or "", "render_chars", "render_truncated")
+    if kind == "template" and len(text) > budget.limit("render_template_chars"):
+        budget.degrade("render_plain", f"{len(text)} chars")
+        kind = "plain"
+    return get_service().render(kind, text, template_id,
+                                timeout=budget.stage_timeout("render_seconds", RENDER_TIMEOUT))
+
+
+def stats() -> dict:
+    return get_service().stats()
+
+
+def iter_chunks(pdf: bytes, chunk: int = STREAM_CHUNK):
+    """The PDF as a stream of chunks for a streamed HTTP response."""
+    view = memoryview(pdf)
+    for i in range(0, len(view), chunk):
+        yield bytes(view[i:i + chunk])
@@ -0,0 +1,244 @@
+# ==================================================
+# result_store.py - persistent analysis results (SQLite)
+#   keyed by (upload content hash, model version); the version
+#   changes whenever a model artifact or the knowledge base changes,
+#   so stale rows simply stop matching. Per backend only the newest
+#   KEEP_VERSIONS versions are kept (processes with another
+#   RESUME_EMBEDDER, or the previous release mid-deploy, share the file).
+# ==================================================
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import embedders
+
+STORE_PATH = os.environ.get("RESUME_STORE_PATH", "results.sqlite3")
+EMBED_DIR = os.environ.get("RESUME_EMBED_DIR", "embeddings")
+KEEP_VERSIONS = int(os.environ.get("RESUME_STORE_KEEP_VERSIONS", "3"))  # per backend, by last write
+# bump when the shape of stored results changes (2: skill_strength / weak_skills,
+# 3: calibrated confidence + top_k categories)
+ANALYSIS_SCHEMA = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    content_hash  TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    backend       TEXT,
+    filename      TEXT,
+    raw_text      TEXT,
+    cleaned_text  TEXT,
+    embedding_ref TEXT,
+    category      TEXT,
+    confidence    REAL,
+    top_k         TEXT NOT NULL DEFAULT '[]',
+    analyses      TEXT NOT NULL DEFAULT '{}',
+    created_at    TEXT NOT NULL,
+    PRIMARY KEY (content_hash, model_version)
+);
+"""
+# columns added after the first release: (name, definition) for files created before them
+_ADDED_COLUMNS = (("top_k", "TEXT NOT NULL DEFAULT '[]'"), ("backend", "TEXT"))
+
+
+# -------- Versioning --------
+def skill_tables_fingerprint() -> str:
+    """Version of the knowledge base (roles/skills/courses/certificates) analyses were built from."""
+    import knowledge_base
+    return knowledge_base.version()
+
+
+def model_version() -> str:
+    """
+    Fingerprint of every artifact a prediction depends on (size + mtime,
+    so retraining or swapping a pickle changes it) plus the KB version.
+    Cheap enough (a few os.stat calls) to evaluate on every lookup.
+    """
+    from model import ENCODER_PATH, FAST_BACKEND
+    backend = embedders.get_backend()
+    paths = [ENCODER_PATH]
+    for b in sorted({backend, FAST_BACKEND}):
+        paths.extend(embedders.ARTIFACTS[b].values())
+    parts = [backend, f"schema:{ANALYSIS_SCHEMA}"]
+    for p in paths:
+        try:
+            st = os.stat(p)
+            parts.append(f"{p}:{st.st_size}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{p}:missing")
+    parts.append(skill_tables_fingerprint())
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+# -------- Store --------
+class ResultStore:
+    """One SQLite file; a connection per thread (and per worker process)."""
+
+    def __init__(self, path: str = STORE_PATH, embed_dir: str = EMBED_DIR):
+        self.path = path
+        self.embed_dir = embed_dir
+        self._local = threading.local()
+        self._purged_for = None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            have = {r[1] for r in conn.execute("PRAGMA table_info(results)")}
+            for name, definition in _ADDED_COLUMNS:
+                if name not in have:
+                    conn.execute(f"ALTER TABLE results ADD COLUMN {name} {definition}")
+            self._local.conn = conn
+        return conn
+
+    def get(self, content_hash: str, version: str = None):
+        version = version or model_version()
+        self._purge_once(version)
+        row = self._conn().execute(
+            "SELECT * FROM results WHERE content_hash = ? AND model_version = ?",
+            (content_hash, version),
+        ).fetchone()
+        if row is None:
+            return None
+        rec = dict(row)
+        rec["analyses"] = json.loads(rec["analyses"] or "{}")
+        rec["top_k"] = json.loads(rec["top_k"] or "[]")
+        return rec
+
+    def put(self, content_hash: str, filename: str, raw_text: str, result: dict, version: str = None):
+        """Store an extraction + classification result (as returned by model.classify_resume)."""
+        version = version or model_version()
+        ref = self._save_embedding(content_hash, result.get("backend"), result.get("embedding"))
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (content_hash, model_version, backend, filename, raw_text,"
+                " cleaned_text, embedding_ref, category, confidence, top_k, analyses, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE((SELECT analyses FROM results"
+                " WHERE content_hash = ? AND model_version = ?), '{}'), ?)",
+                (content_hash, version, embedders.get_backend(), filename, raw_text,
+                 result.get("cleaned_text"), ref,
+                 result.get("category"), result.get("confidence"),
+                 json.dumps(result.get("top_k") or [], ensure_ascii=False), content_hash, version,
+                 datetime.utcnow().isoformat()),
+            )
+
+    def put_analysis(self, content_hash: str, role: str, analysis: dict, version: str = None):
+        version = version or model_version()
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT analyses FROM results WHERE content_hash = ? AND model_version = ?",
+                (content_hash, version),
+            ).fetchone()
+            if row is None:
+                return False
+            analyses = json.loads(row["analyses"] or "{}")
+            analyses[role] = analysis
+            conn.execute(
+                "UPDATE results SET analyses = ? WHERE content_hash = ? AND model_version = ?",
+                (json.dumps(analyses, ensure_ascii=False), content_hash, version),
+            )
+        return True
+
+    def _save_embedding(self, content_hash: str, backend: str, vec):
+        if vec is None or not backend:
+            return None
+        import numpy as np
+        folder = os.path.join(self.embed_dir, backend)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{content_hash}.npy")
+        # other workers mmap the final path; np.save keeps a name that already ends in .npy
+        tmp = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(tmp, np.asarray(vec, dtype=np.float32))
+        os.replace(tmp, path)
+        return path
+
+    def load_embedding(self, ref: str):
+        if not ref or not os.path.exists(ref):
+            return None
+        import numpy as np
+        return np.load(ref, mmap_mode="r")
+
+    def _purge_once(self, version: str):
+        if self._purged_for != version:
+            self._purged_for = version
+            self.purge_stale(version)
+
+    def purge_stale(self, version: str = None, keep: int = KEEP_VERSIONS) -> int:
+        """
+        Drop rows of old model versions: per backend, all but the `keep` most
+        recently written versions (`version`, the caller's own, always stays).
+        An embedding file goes only once no remaining row refers to it.
+        """
+        version = version or model_version()
+        with self._conn() as conn:
+            kept, stale = {}, []
+            for row in conn.execute(
+                "SELECT backend, model_version FROM results GROUP BY backend, model_version"
+                " ORDER BY MAX(created_at) DESC"
+            ):
+                n = kept.get(row["backend"], 0)
+                if row["model_version"] == version or n < keep:
+                    kept[row["backend"]] = n + 1
+                else:
+                    stale.append((row["backend"], row["model_version"]))
+            refs, removed = set(), 0
+            for backend, old in stale:
+                where = "model_version = ? AND backend IS ?"
+                refs.update(r[0] for r in conn.execute(f"SELECT embedding_ref FROM results WHERE {where}",
+                                                       (old, backend)) if r[0])
+                removed += conn.execute(f"DELETE FROM results WHERE {where}", (old, backend)).rowcount
+            # files are per (backend, content hash), so a newer version may still use one
+            orphans = [ref for ref in refs
+                       if conn.execute("SELECT 1 FROM results WHERE embedding_ref = ? LIMIT 1", (ref,)).fetchone() is None]
+        for ref in orphans:
+            if os.path.exists(ref):
+                os.unlink(ref)
+        return removed
+
+    def stats(self) -> dict:
+        n = self._conn().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {"rows": n, "path": self.path, "model_version": model_version()}
+
+
+_STORE = None
+
+def get_store() -> ResultStore:
+    global _STORE
+    if _STORE is None:
+        _STORE = ResultStore()
+    return _STORE
+
+
+def classify_with_store(content_hash: str, filename: str, extract):
+    """
+    Look the upload up before doing any work; on a miss run extract() and
+    model.classify_resume, then persist. Returns the stored record dict.
+    """
+    store = get_store()
+    version = model_version()
+    rec = store.get(content_hash, version)
+    if rec is not None:
+        rec["cached"] = True
+        return rec
+    from model import classify_resume
+    import budgets
+    text = extract()
+    if not text:
+        return None
+    result = classify_resume(text)
+    if budgets.current().applied:
+        # built on cheaper paths (pages capped, TF-IDF only, ...): answer, but don't keep it
+        return {"content_hash": content_hash, "model_version": version, "filename": filename,
+                "raw_text": text, "cleaned_text": result.get("cleaned_text"), "embedding_ref": None,
+                "category": result.get("category"), "confidence": result.get("confidence"),
+                "top_k": result.get("top_k") or [], "analyses": {}, "cached": False}
+    store.put(content_hash, filename, text, result, version)
+    rec = store.get(content_hash, version) or {}
+    rec["cached"] = False
+    return rec
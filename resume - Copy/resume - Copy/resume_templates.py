@@ -3,48 +3,75 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase import pdfmetrics
 
-import random
+TEMPLATE_COUNT = 50
 
-# Register some additional fonts (if available in system)
-try:
-    pdfmetrics.registerFont(TTFont("Helvetica-Bold", "Helvetica-Bold.ttf"))
-    pdfmetrics.registerFont(TTFont("Times-Roman", "Times-Roman.ttf"))
-    pdfmetrics.registerFont(TTFont("Courier", "Courier.ttf"))
-except:
-    pass
+_FONTS_REGISTERED = False
+_STYLES = {}  # template_id -> ParagraphStyle, built once per process
+
+# Different fonts & colors for templates
+FONTS = ["Helvetica", "Helvetica-Bold", "Times-Roman", "Courier"]
+COLORS = [
+    colors.black, colors.darkblue, colors.green, colors.purple, colors.red, colors.teal
+]
+ALIGNMENTS = [TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY]  # TA_JUSTIFY is 4, not 3
+
+def _register_fonts():
+    """Register some additional fonts (if available in system), once, on first render."""
+    global _FONTS_REGISTERED
+    if _FONTS_REGISTERED:
+        return
+    _FONTS_REGISTERED = True
+    try:
+        pdfmetrics.registerFont(TTFont("Helvetica-Bold", "Helvetica-Bold.ttf"))
+        pdfmetrics.registerFont(TTFont("Times-Roman", "Times-Roman.ttf"))
+        pdfmetrics.registerFont(TTFont("Courier", "Courier.ttf"))
+    except:
+        pass
+
+def template_number(template_id):
+    """template_id wrapped into 1..TEMPLATE_COUNT (any client-supplied int maps onto one of the 50)."""
+    return (int(template_id) - 1) % TEMPLATE_COUNT + 1
+
+def template_style(template_id):
+    """Body style of one template (1-50); ids outside the range wrap around."""
+    template_id = template_number(template_id)  # so the cache never holds more than TEMPLATE_COUNT styles
+    style = _STYLES.get(template_id)
+    if style is None:
+        styles = getSampleStyleSheet()
+        # Template variations
+        style = ParagraphStyle(
+            f"Template{template_id}",
+            parent=styles["Normal"],
+            fontName=FONTS[template_id % len(FONTS)],
+            fontSize=12,
+            textColor=COLORS[template_id % len(COLORS)],
+            leading=14 + (template_id % 6),  # line spacing variation
+            alignment=ALIGNMENTS[template_id % len(ALIGNMENTS)],
+        )
+        _STYLES[template_id] = style
+    return style
+
+def preload():
+    """Fonts and every template style, e.g. in a render worker before its first job."""
+    _register_fonts()
+    for template_id in range(1, TEMPLATE_COUNT + 1):
+        template_style(template_id)
+    for font in FONTS:
+        pdfmetrics.getFont(font)
 
 def generate_resume_pdf(resume_text, template_id, buffer):
     """
     Generate resume PDF with different templates based on template_id (1-50).
     """
+    _register_fonts()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
     styles = getSampleStyleSheet()
-
-    # Different fonts & colors for templates
-    fonts = ["Helvetica", "Helvetica-Bold", "Times-Roman", "Courier"]
-    colors_list = [
-        colors.black, colors.darkblue, colors.green, colors.purple, colors.red, colors.teal
-    ]
-
-    # Template variations
-    font_choice = fonts[template_id % len(fonts)]
-    color_choice = colors_list[template_id % len(colors_list)]
-    leading = 14 + (template_id % 6)  # line spacing variation
-    alignment = template_id % 4  # 0=left,1=center,2=right,3=justify
-
-    # Define custom style
-    custom_style = ParagraphStyle(
-        "CustomStyle",
-        parent=styles["Normal"],
-        fontName=font_choice,
-        fontSize=12,
-        textColor=color_choice,
-        leading=leading,
-        alignment=alignment,
-    )
+    template_id = template_number(template_id)
+    custom_style = template_style(template_id)
 
     # Build document
     story = []
@@ -4,9 +4,10 @@ import numpy as np
 import torch
 import torch.nn as nn
 
+import embedders
+
 POLICY_PATH = "rl_policy.pth"
 METADATA_PATH = "rl_policy_metadata.pkl"
-VECTORIZER_PATH = "vectorizer.pkl"
 
 class ResumePolicyNet(nn.Module):
     def __init__(self, resume_dim: int, role_count: int, role_embed_dim: int, hidden: int, action_count: int):
@@ -32,9 +33,14 @@ class ResumePolicyNet(nn.Module):
         return logits
 
 def load_policy():
-    if not (os.path.exists(POLICY_PATH) and os.path.exists(METADATA_PATH) and os.path.exists(VECTORIZER_PATH)):
-        raise FileNotFoundError("RL policy or metadata/embedder not found.")
+    if not (os.path.exists(POLICY_PATH) and os.path.exists(METADATA_PATH)):
+        raise FileNotFoundError("RL policy or metadata not found.")
     meta = pickle.load(open(METADATA_PATH, "rb"))
+    # the policy was trained on one embedder backend's vectors; reuse that backend
+    backend = meta.get("embedder_backend", embedders.DEFAULT_BACKEND)
+    needs_embedder = meta["embed_dim"] > 0
+    if needs_embedder and not os.path.exists(embedders.artifact_paths(backend)["embedder"]):
+        raise FileNotFoundError(f"Embedder for backend '{backend}' not found.")
     policy = ResumePolicyNet(
         resume_dim=meta["embed_dim"],
         role_count=len(meta["role_list"]),
@@ -44,17 +50,26 @@ def load_policy():
     )
     policy.load_state_dict(torch.load(POLICY_PATH, map_location="cpu"))
     policy.eval()
-    embedder = pickle.load(open(VECTORIZER_PATH, "rb"))
+    embedder = embedders.load_embedder(backend) if needs_embedder else None
     return meta, policy, embedder
 
-def score_skills_with_policy(policy, embedder, meta, resume_text: str, role: str):
+def score_skills_with_policy(policy, embedder, meta, resume_text: str, role: str, embedding=None):
     # Returns list of (skill, score) sorted desc
     role_list = meta["role_list"]
     skill_list = meta["skill_list"]
     role_idx = role_list.index(role) if role in role_list else 0
 
-    if meta["embed_dim"] > 0 and resume_text:
-        vec = embedder.encode([resume_text])[0]
+    if meta["embed_dim"] > 0:
+        # e.g. the vector the result store kept for this upload (unless another backend made it)
+        if embedding is not None and np.size(embedding) == meta["embed_dim"]:
+            vec = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        elif resume_text:
+            vec = embedder.encode([resume_text])
+            if hasattr(vec, "toarray"):  # sparse TF-IDF backend
+                vec = vec.toarray()
+            vec = vec[0]
+        else:
+            vec = np.zeros(meta["embed_dim"], dtype=np.float32)
         resume_tensor = torch.tensor(vec, dtype=torch.float32).unsqueeze(0)
     else:
         resume_tensor = None
@@ -64,3 +79,16 @@ def score_skills_with_policy(policy, embedder, meta, resume_text: str, role: str
         probs = torch.softmax(logits, dim=-1).cpu().numpy().reshape(-1)
     ranked_idx = np.argsort(probs)[::-1]
     return [(skill_list[i], float(probs[i])) for i in ranked_idx]
+
+_CACHED = {"key": None, "loaded": None}
+
+def get_policy():
+    """(meta, policy, embedder), loaded once and reloaded when the files change; None if absent."""
+    try:
+        key = (os.stat(POLICY_PATH).st_mtime_ns, os.stat(METADATA_PATH).st_mtime_ns)
+    except OSError:
+        return None
+    if _CACHED["key"] != key:
+        _CACHED["loaded"] = load_policy()
+        _CACHED["key"] = key
+    return _CACHED["loaded"]
@@ -0,0 +1,153 @@
+# ==============================
+# role_resolver.py
+# Free-text role name -> canonical ROLE_SKILLS key
+# ==============================
+import os
+import pickle
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+DEFAULT_ROLE = "software engineer"
+MIN_SCORE = 0.25
+RESOLVE_CACHE_SIZE = 2048
+ENCODER_PATH = "encoder.pkl"
+
+# Role aliases and the classifier-label map live in kb/roles.json (knowledge_base.py).
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9 ]", " ", (text or "").lower()).split())
+
+
+def _edit_distance(a: str, b: str, bound: int) -> int:
+    """Levenshtein distance, giving up (returning bound + 1) once it exceeds bound."""
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+        if min(cur) > bound:
+            return bound + 1
+        prev = cur
+    return prev[-1]
+
+
+def _max_edits(token: str) -> int:
+    # short tokens (ai, ml, cv) must match exactly
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+class RoleResolver:
+    """
+    Inverted token index over role names, aliases and classifier labels.
+    Lookups are memoized; misspelled tokens are matched within a small
+    edit-distance bound.
+    """
+
+    def __init__(self, roles: Iterable[str], aliases: Dict[str, str] = None,
+                 default: str = DEFAULT_ROLE, min_score: float = MIN_SCORE):
+        self.roles: List[str] = list(roles)
+        self.default = default if default in self.roles else (self.roles[0] if self.roles else default)
+        self.min_score = min_score
+        self._order = {r: i for i, r in enumerate(self.roles)}
+        self._exact: Dict[str, str] = {}
+        self._phrases: List[Tuple[Tuple[str, ...], str]] = []
+        self._postings: Dict[str, List[int]] = {}
+
+        for r in self.roles:
+            self._add(r, r)
+        for alias, role in (aliases or {}).items():
+            if role in self._order:
+                self._add(alias, role)
+
+        self.resolve = lru_cache(maxsize=RESOLVE_CACHE_SIZE)(self._resolve)
+
+    def _add(self, phrase: str, role: str):
+        norm = _normalize(phrase)
+        if not norm or norm in self._exact:
+            return
+        self._exact[norm] = role
+        pid = len(self._phrases)
+        self._phrases.append((tuple(norm.split()), role))
+        for tok in set(norm.split()):
+            self._postings.setdefault(tok, []).append(pid)
+
+    def add_labels(self, labels: Iterable[str], mapping: Dict[str, str] = None):
+        """Index external labels (e.g. classifier categories) under the role they resolve to."""
+        mapping = mapping or {}
+        for label in labels:
+            norm = _normalize(label)
+            if not norm or norm in self._exact:
+                continue
+            role = mapping.get(norm) or self._candidates(norm, 1)[0][0]
+            self._add(norm, role)
+        self.resolve.cache_clear()
+
+    def _token_matches(self, tok: str) -> List[Tuple[str, float]]:
+        if tok in self._postings:
+            return [(tok, 1.0)]
+        bound = _max_edits(tok)
+        if not bound:
+            return []
+        out = []
+        for cand in self._postings:
+            if len(cand) >= 4:
+                d = _edit_distance(tok, cand, bound)
+                if d <= bound:
+                    out.append((cand, 1.0 - 0.2 * d))
+        return out
+
+    def _candidates(self, norm: str, k: int) -> List[Tuple[str, float]]:
+        if not norm:
+            return [(self.default, 0.0)]
+        if norm in self._exact:
+            return [(self._exact[norm], 1.0)] + [
+                (r, s) for r, s in self._scored(norm) if r != self._exact[norm]
+            ][:k - 1]
+        ranked = self._scored(norm)
+        if not ranked or ranked[0][1] < self.min_score:
+            return [(self.default, 0.0)]
+        return ranked[:k]
+
+    def _scored(self, norm: str) -> List[Tuple[str, float]]:
+        q = norm.split()
+        # phrase id -> matched weight, one best match per query token
+        hits: Dict[int, Dict[str, float]] = {}
+        for tok in q:
+            for cand, w in self._token_matches(tok):
+                for pid in self._postings[cand]:
+                    got = hits.setdefault(pid, {})
+                    if w > got.get(cand, 0.0):
+                        got[cand] = w
+        best: Dict[str, Tuple[float, bool]] = {}
+        for pid, matched in hits.items():
+            toks, role = self._phrases[pid]
+            score = 2.0 * sum(matched.values()) / (len(toks) + len(q))  # Dice over tokens
+            # on equal scores a role's own name beats an alias pointing at another role
+            key = (score, " ".join(toks) == role)
+            if key > best.get(role, (0.0, False)):
+                best[role] = key
+        ranked = sorted(best.items(), key=lambda rs: (-rs[1][0], not rs[1][1], self._order[rs[0]]))
+        return [(r, s) for r, (s, _) in ranked]
+
+    def _resolve(self, text: str) -> str:
+        return self._candidates(_normalize(text), 1)[0][0]
+
+    def candidates(self, text: str, k: int = 3) -> List[Tuple[str, float]]:
+        """Top-k (role, score) pairs; score is 1.0 for exact names/aliases."""
+        return [(r, round(s, 4)) for r, s in self._candidates(_normalize(text), max(1, k))]
+
+
+def load_encoder_labels(path: str = ENCODER_PATH) -> List[str]:
+    """Category names from the classifier's LabelEncoder, or [] if it can't be read."""
+    if not os.path.exists(path):
+        return []
+    try:
+        return [str(c) for c in pickle.load(open(path, "rb")).classes_]
+    except Exception:
+        return []
@@ -0,0 +1,175 @@
+# ==============================
+# skill_evidence.py
+# Per-skill strength from where, how often and how recently a skill is mentioned
+# ==============================
+import re
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, List, NamedTuple, Sequence
+
+from skill_matrix import SkillMatrix, normalize
+
+# Heading line -> section. A short line (<= 4 words) is a heading when its
+# words equal one of these, or start with one and the line ends in ":" or is
+# all caps ("TECHNICAL SKILLS & TOOLS", "Projects (selected):").
+SECTION_HEADINGS: Dict[str, str] = {
+    "skills": "skills", "technical skills": "skills", "core skills": "skills",
+    "key skills": "skills", "technologies": "skills", "tech stack": "skills",
+    "tools": "skills", "competencies": "skills", "core competencies": "skills",
+    "experience": "experience", "work experience": "experience",
+    "professional experience": "experience", "employment": "experience",
+    "employment history": "experience", "work history": "experience",
+    "internship": "experience", "internships": "experience",
+    "projects": "projects", "personal projects": "projects",
+    "academic projects": "projects", "key projects": "projects",
+    "education": "education", "academic background": "education", "qualifications": "education",
+    "certifications": "certifications", "certificates": "certifications",
+    "licenses": "certifications", "courses": "certifications", "training": "certifications",
+    "summary": "summary", "profile": "summary", "objective": "summary",
+    "about me": "summary", "professional summary": "summary", "career objective": "summary",
+}
+
+# A skill used in a job or project counts for more than one in a keyword list
+SECTION_WEIGHTS: Dict[str, float] = {
+    "experience": 1.0, "projects": 0.9, "certifications": 0.6,
+    "skills": 0.5, "summary": 0.45, "education": 0.35, None: 0.4,
+}
+BASE_WEIGHT = 0.6          # weight of one undated, top-section mention
+MAX_MENTION_WEIGHT = 0.9
+DATE_BONUS = 1.2           # a year or "N years" right next to the mention
+NEAR_CHARS = 80
+RECENCY_WINDOW = 300       # dates further away than this don't date a mention
+RECENCY_HALF_LIFE = 3.0    # years
+UNDATED_RECENCY = 0.75
+WEAK_STRENGTH = 0.3        # mentioned, but below this it is worth strengthening
+HEADING_MAX_CHARS = 60
+
+_DATES = re.compile(r"(?<!\d)(19[5-9]\d|20[0-4]\d)(?!\d)|\b(present|current|now)\b|\b(\d{1,2})\+? *(?:years|yrs)\b")
+
+
+class Section(NamedTuple):
+    name: str
+    start: int
+    end: int
+
+
+class Mention(NamedTuple):
+    skill: str
+    start: int
+    end: int
+    section: str
+    weight: float
+
+
+class Evidence:
+    """Result of one pass over a resume: mentions, sections and a strength per skill."""
+
+    __slots__ = ("strength", "mentions", "sections", "bits")
+
+    def __init__(self, strength: Dict[str, float], mentions: List[Mention],
+                 sections: List[Section], bits: int):
+        self.strength = strength
+        self.mentions = mentions
+        self.sections = sections
+        self.bits = bits
+
+    def vector(self, skills: Sequence[str]) -> List[float]:
+        """Strengths in the given skill order (0.0 for skills never mentioned)."""
+        get = self.strength.get
+        return [get(s, 0.0) for s in skills]
+
+    def weak(self, skills: Sequence[str]) -> List[str]:
+        """Mentioned skills whose strength is below WEAK_STRENGTH, weakest first."""
+        out = [s for s in skills if 0.0 < self.strength.get(s, 0.0) < WEAK_STRENGTH]
+        return sorted(out, key=self.strength.__getitem__)
+
+
+def parse_sections(text: str) -> List[Section]:
+    """Split text into (section, start, end) spans at recognised heading lines."""
+    sections: List[Section] = []
+    name, start, pos = None, 0, 0
+    for line in text.splitlines(keepends=True):
+        words = normalize(line).split() if len(line) <= HEADING_MAX_CHARS else None
+        if words and len(words) <= 4:
+            key = " ".join(words)
+            found = SECTION_HEADINGS.get(key)
+            stripped = line.strip()
+            if found is None and (stripped.endswith(":") or stripped.isupper()):
+                for n in (3, 2, 1):
+                    if len(words) > n and " ".join(words[:n]) in SECTION_HEADINGS:
+                        found = SECTION_HEADINGS[" ".join(words[:n])]
+                        break
+            if found is not None:
+                if pos > start:
+                    sections.append(Section(name, start, pos))
+                name, start = found, pos
+        pos += len(line)
+    if pos > start:
+        sections.append(Section(name, start, pos))
+    return sections
+
+
+def _date_marks(norm: str, this_year: int):
+    """Sorted offsets of date-like tokens and the year each one stands for."""
+    offsets, years = [], []
+    for m in _DATES.finditer(norm):
+        if m.group(1):
+            year = int(m.group(1))
+            if year > this_year:
+                continue
+        else:
+            year = this_year  # "present" / "3 years" describe the current state
+        offsets.append(m.start())
+        years.append(year)
+    return offsets, years
+
+
+def _recency(year: int, this_year: int) -> float:
+    age = max(0, this_year - year)
+    return 0.5 + 0.5 * 0.5 ** (age / RECENCY_HALF_LIFE)
+
+
+def analyze(text: str, matrix: SkillMatrix, today: date = None) -> Evidence:
+    """
+    Locate every skill mention and score it by section, date proximity and
+    recency; repeated mentions combine as 1 - prod(1 - w), so strength grows
+    with frequency but stays below 1. One regex pass for skills, one for dates.
+    """
+    text = text or ""
+    this_year = (today or date.today()).year
+    norm = normalize(text)
+    sections = parse_sections(text)
+    sec_starts = [s.start for s in sections]
+    date_offsets, date_years = _date_marks(norm, this_year)
+
+    remaining: Dict[int, float] = {}  # skill id -> prod(1 - w)
+    mentions: List[Mention] = []
+    bits = 0
+    for sid, start, end in matrix.finditer(norm):
+        k = bisect_right(sec_starts, start) - 1
+        sec = sections[k] if k >= 0 else Section(None, 0, len(text))
+
+        # the closest date before the mention (an entry's header line), else
+        # the closest one after it, as long as it is in the same section
+        j = bisect_right(date_offsets, start) - 1
+        if j >= 0 and date_offsets[j] >= max(sec.start, start - RECENCY_WINDOW):
+            year, dist = date_years[j], start - date_offsets[j]
+        else:
+            j += 1
+            if j < len(date_offsets) and date_offsets[j] < min(sec.end, end + RECENCY_WINDOW):
+                year, dist = date_years[j], date_offsets[j] - end
+            else:
+                year = None
+        if year is not None:
+            recency = _recency(year, this_year)
+            bonus = DATE_BONUS if dist <= NEAR_CHARS else 1.0
+        else:
+            recency, bonus = UNDATED_RECENCY, 1.0
+
+        w = min(MAX_MENTION_WEIGHT, BASE_WEIGHT * SECTION_WEIGHTS.get(sec.name, SECTION_WEIGHTS[None]) * recency * bonus)
+        remaining[sid] = remaining.get(sid, 1.0) * (1.0 - w)
+        bits |= 1 << sid
+        mentions.append(Mention(matrix.vocab[sid], start, end, sec.name, round(w, 4)))
+
+    strength = {matrix.vocab[sid]: round(1.0 - r, 4) for sid, r in remaining.items()}
+    return Evidence(strength, mentions, sections, bits)
@@ -0,0 +1,104 @@
+# ==============================
+# skill_matrix.py
+# Role x skill bitsets over an interned skill vocabulary
+# ==============================
+import re
+from typing import Dict, Iterator, List, Tuple
+
+# "+" and "#" survive so c++ / c# stay matchable; every other symbol becomes
+# one space, which keeps offsets in the normalized text equal to the original's
+_SYMBOLS = re.compile(r"[^A-Za-z0-9+#]")
+_WORD = "a-z0-9+#"
+
+
+def normalize(text: str) -> str:
+    return _SYMBOLS.sub(" ", text or "").lower()
+
+
+def _normalize(text: str) -> str:
+    return " ".join(normalize(text).split())
+
+
+class SkillMatrix:
+    """
+    Interns every skill once and stores each role as an int bitset.
+    A resume is turned into one bitset, after which missing skills and
+    coverage for every role are a couple of integer ops per role.
+    """
+
+    def __init__(self, role_skills: Dict[str, List[str]], synonyms: Dict[str, str] = None):
+        self.vocab: List[str] = []
+        self.skill_id: Dict[str, int] = {}
+        for skills in role_skills.values():
+            for s in skills:
+                if s not in self.skill_id:
+                    self.skill_id[s] = len(self.vocab)
+                    self.vocab.append(s)
+
+        self.roles: List[str] = list(role_skills.keys())
+        self.role_index: Dict[str, int] = {r: i for i, r in enumerate(self.roles)}
+        # role order is kept so missing skills come back in the table's order
+        self.role_ids: List[Tuple[int, ...]] = [
+            tuple(dict.fromkeys(self.skill_id[s] for s in role_skills[r])) for r in self.roles
+        ]
+        self.role_bits: List[int] = [self._bits(ids) for ids in self.role_ids]
+        self.role_sizes: List[int] = [len(ids) for ids in self.role_ids]
+
+        # text patterns -> skill id: the skill's normalized spelling
+        # ("scikit-learn" -> "scikit learn") and any synonyms pointing at it
+        patterns: Dict[str, int] = {}
+        for s, i in self.skill_id.items():
+            norm = _normalize(s)
+            if len(norm) >= 2:
+                patterns.setdefault(norm, i)
+        for alias, target in (synonyms or {}).items():
+            norm = _normalize(alias)
+            if target in self.skill_id and len(norm) >= 2:
+                patterns.setdefault(norm, self.skill_id[target])
+        self.patterns: Dict[str, int] = patterns
+
+        # one alternation over every pattern (longest first), whole words only,
+        # optional plural ("apis", "databases"), any run of spaces between words
+        alts = sorted(patterns, key=len, reverse=True)
+        body = "|".join(r"[ ]+".join(map(re.escape, p.split())) for p in alts)
+        self._finder = re.compile(rf"(?<![{_WORD}])({body})(?:e?s)?(?![{_WORD}])") if alts else None
+
+    @staticmethod
+    def _bits(ids) -> int:
+        b = 0
+        for i in ids:
+            b |= 1 << i
+        return b
+
+    def finditer(self, normalized_text: str) -> Iterator[Tuple[int, int, int]]:
+        """(skill id, start, end) for every skill mention in normalize(text)."""
+        if self._finder is None:
+            return
+        patterns = self.patterns
+        for m in self._finder.finditer(normalized_text):
+            yield patterns[" ".join(m.group(1).split())], m.start(), m.end()
+
+    def resume_bits(self, resume_text: str) -> int:
+        """Bitset of vocabulary skills mentioned in the resume text."""
+        b = 0
+        for i, _, _ in self.finditer(normalize(resume_text)):
+            b |= 1 << i
+        return b
+
+    def skills_in(self, bits: int) -> List[str]:
+        return [s for i, s in enumerate(self.vocab) if bits >> i & 1]
+
+    def missing(self, role: str, resume_bits: int) -> List[str]:
+        r = self.role_index.get(role)
+        if r is None:
+            return []
+        return [self.vocab[i] for i in self.role_ids[r] if not resume_bits >> i & 1]
+
+    def coverage_all(self, resume_bits: int) -> List[Tuple[str, float, int]]:
+        """(role, coverage 0..1, missing bitset) for every role."""
+        out = []
+        for role, rb, size in zip(self.roles, self.role_bits, self.role_sizes):
+            gap = rb & ~resume_bits
+            have = size - bin(gap).count("1")
+            out.append((role, have / size if size else 1.0, gap))
+        return out
@@ -107,50 +107,48 @@ def log_feedback_rows(resume_id: str, target_role: str, rows, reward: int, comme
 import os
 import re
 import csv
+import json
 from typing import List, Dict, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
+
+import budgets
+import knowledge_base
+import skill_evidence
+from compact_results import CompactAnalysis, improvement_flags, improvement_texts
 
 # ==============================
 # Role → Required Skills mapping
 # ==============================
-ROLE_SKILLS: Dict[str, List[str]] = {
-    "data scientist": ["python","sql","statistics","machine learning","deep learning","pandas","numpy","nlp"],
-    "software engineer": ["python","java","c++","git","system design","databases","algorithms","data structures"],
-    "web developer": ["html","css","javascript","react","node.js","mongodb","api","git"],
-    "ml engineer": ["python","tensorflow","pytorch","scikit-learn","mlops","docker","aws","azure","kubernetes"],
-
-    # --- AI Categories (general + specialized) ---
-    "ai": ["python","pytorch","tensorflow","transformers","huggingface","mlflow","docker","fastapi","aws","azure"],
-    "ai engineer": ["python","pytorch","tensorflow","transformers","huggingface","mlflow","docker","fastapi","prompt engineering","aws","gcp","azure"],
-    "ai researcher": ["python","pytorch","tensorflow","deep learning","transformers","statistics","experimentation","numpy","scipy"],
-
-    # --- LLM & NLP ---
-    "llm engineer": ["python","transformers","huggingface","prompt engineering","rag","vector dbs","langchain","pytorch","mlflow","docker","aws"],
-    "nlp engineer": ["python","nlp","transformers","huggingface","spacy","nltk","text classification","bert","gpt"],
-
-    # --- CV ---
-    "computer vision engineer": ["python","opencv","cnn","pytorch","tensorflow","image processing","object detection","segmentation"],
-
-    # --- Generative AI ---
-    "generative ai": ["python","pytorch","tensorflow","transformers","diffusion models","huggingface","mlflow","docker","stable diffusion","dalle","midjourney"],
-    "generative ai engineer": ["python","pytorch","tensorflow","transformers","diffusion models","huggingface","mlflow","docker","prompt engineering","gan","vae","stable diffusion","text-to-image","text-to-video"],
-}
+# Roles, skills, synonyms, courses and certificates live in kb/*.json and are
+# hot-reloaded by knowledge_base.py. Every call below takes one snapshot and
+# uses it throughout; these module-level tables are the snapshot at import,
+# kept for callers that read them directly.
+_KB_AT_IMPORT = knowledge_base.current()
+ROLE_SKILLS: Dict[str, List[str]] = {r: list(s) for r, s in _KB_AT_IMPORT.role_skills.items()}
 
 # ==============================
 # Suggestions Data Structures
 # ==============================
-@dataclass
+# Frozen + slotted: one Suggestion per (catalog, role, skill) is shared by
+# every result that contains it. For holding many analyses see
+# compact_results.CompactAnalysis (analyze_compact below).
+@dataclass(frozen=True, slots=True)
 class Suggestion:
     skill: str
     project_title: str
     course: str
     certificate: str
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SuggestionResult:
     missing_skills: List[str]
     suggestions: List[Suggestion]
 
+@lru_cache(maxsize=8192)
+def _suggestion(catalog, role: str, skill: str) -> Suggestion:
+    return Suggestion(*catalog.record(role, skill))
+
 # ==============================
 # Helpers
 # ==============================
@@ -158,90 +156,135 @@ def _normalize(text: str) -> str:
     return re.sub(r"[^a-z0-9 ]", " ", text.lower()).strip()
 
 def _extract_resume_skills(resume_text: str) -> List[str]:
-    resume_text = _normalize(resume_text or "")
-    found: List[str] = []
-    for skills in ROLE_SKILLS.values():
-        for s in skills:
-            if s in resume_text and s not in found:
-                found.append(s)
-    return found
-
-def _canonical_role(target_role: str) -> str:
-    t = _normalize(target_role or "")
-    if not t:
-        return "software engineer"
-
-    # direct shortcuts
-    if t == "ai":
-        return "ai"
-    if "llm" in t:
-        return "llm engineer"
-    if "generative ai" in t and "engineer" not in t:
-        return "generative ai"
-    if "generative" in t and "ai" in t:
-        return "generative ai engineer"
-
-    candidates = list(ROLE_SKILLS.keys())
-    scores: List[Tuple[int, str]] = []
-    for r in candidates:
-        score = 0
-        for token in r.split():
-            if token in t:
-                score += 2
-        if "ai" in t and r in {"ai","ai engineer","ai researcher","ml engineer"}:
-            score += 3
-        if "nlp" in t and r == "nlp engineer":
-            score += 3
-        if "vision" in t and r == "computer vision engineer":
-            score += 3
-        scores.append((score, r))
-    scores.sort(reverse=True)
-    return scores[0][1] if scores and scores[0][0] > 0 else "software engineer"
+    matrix = knowledge_base.current().matrix
+    return matrix.skills_in(matrix.resume_bits(resume_text))
+
+def _canonical_role(target_role: str, kb=None) -> str:
+    kb = kb or knowledge_base.current()
+    return kb.resolver.resolve(target_role or "")
+
+def resolve_role(target_role: str) -> str:
+    """Canonical ROLE_SKILLS key for a free-text role / category name."""
+    return _canonical_role(target_role)
+
+def role_candidates(target_role: str, k: int = 3) -> List[Tuple[str, float]]:
+    """Top-k (role, score) matches for a free-text role name."""
+    return knowledge_base.current().resolver.candidates(target_role or "", k)
 
 # ==============================
 # Dynamic Courses & Certificates
 # ==============================
-COURSES = {
-    "python": "Complete Python Bootcamp (Udemy)",
-    "tensorflow": "DeepLearning.AI TensorFlow Developer (Coursera)",
-    "pytorch": "DeepLearning.AI PyTorch for Deep Learning (Coursera)",
-    "transformers": "Hugging Face Transformers Course",
-    "mlops": "MLOps Specialization (Coursera)",
-    "docker": "Docker Essentials (IBM Skills)",
-    "aws": "AWS Machine Learning Specialty",
-    "azure": "Azure AI Engineer Associate Path",
-    "generative ai": "Generative AI with Diffusion Models (Coursera)",
-    "nlp": "Natural Language Processing Specialization (Coursera)",
-}
-
-CERTIFICATES = {
-    "python": "PCAP – Certified Associate in Python Programming",
-    "tensorflow": "TensorFlow Developer Certificate",
-    "pytorch": "Meta AI PyTorch Certification",
-    "mlops": "Certified MLOps Professional",
-    "aws": "AWS Certified AI Practitioner",
-    "azure": "Microsoft Certified: Azure AI Engineer Associate",
-    "generative ai": "Generative AI by DeepLearning.AI",
-    "nlp": "Specialization in NLP by Stanford",
-}
+COURSES = dict(_KB_AT_IMPORT.courses)
+CERTIFICATES = dict(_KB_AT_IMPORT.certificates)
 
 # ==============================
 # Core Suggestion Logic
 # ==============================
-def suggest_from_resume(resume_text: str, target_role: str) -> SuggestionResult:
-    resume_skills = _extract_resume_skills(resume_text)
-    role = _canonical_role(target_role)
-    required = ROLE_SKILLS.get(role, [])
-    missing = [s for s in required if s not in resume_skills]
-
-    suggestions: List[Suggestion] = []
-    for s in missing:
-        project_title = f"Build a project demonstrating {s.title()} for a {role.title()} role"
-        course = COURSES.get(s, f"Take an advanced course in {s.title()}")
-        certificate = CERTIFICATES.get(s, f"Earn a certificate in {s.title()}")
-        suggestions.append(Suggestion(s, project_title, course, certificate))
+def _missing_for(resume_text: str, target_role: str, kb=None):
+    """(kb snapshot, canonical role, missing skills in the role's table order)."""
+    kb = kb or knowledge_base.current()
+    role = _canonical_role(target_role, kb)
+    return kb, role, kb.matrix.missing(role, kb.matrix.resume_bits(resume_text))
+
+# RL weights (rl_weights.json, written by train_rl_from_feedback) re-read only when the file changes
+RL_BLEND = 0.25
+BANDIT_PATH = os.environ.get("RESUME_BANDIT_PATH", "bandit_state.npz")  # see bandit_ranker.py
+POLICY_FILES = ("rl_policy.pth", "rl_policy_metadata.pkl")  # rl_policy.POLICY_PATH / METADATA_PATH
+_RL_CACHE = {"mtime": None, "weights": {}}
+
+def _rl_weights() -> Dict[str, float]:
+    try:
+        mtime = os.stat(RL_WEIGHTS_FILE).st_mtime_ns
+    except OSError:
+        return {}
+    if _RL_CACHE["mtime"] != mtime:
+        _RL_CACHE["weights"] = _load_rl_weights()
+        _RL_CACHE["mtime"] = mtime
+    return _RL_CACHE["weights"]
+
+def _evidence_for(resume_text: str, target_role: str, kb=None):
+    """(kb snapshot, canonical role, skill_evidence.Evidence) from one pass over the text."""
+    kb = kb or knowledge_base.current()
+    role = _canonical_role(target_role, kb)
+    return kb, role, skill_evidence.analyze(resume_text, kb.matrix)
+
+def _coverage(kb, role: str, evidence) -> float:
+    skills = kb.role_skills.get(role, ())
+    return sum(1 for s in skills if s in evidence.strength) / len(skills) if skills else 0.0
+
+def _policy_order(resume_text: str, role: str, skills: List[str], embedding=None):
+    """
+    Skills ordered by the trained ResumePolicyNet, or None when train_policy.py hasn't run.
+    The policy sees what train_policy.py trained it on: the resume's stored
+    embedding when there is one from the policy's backend, else its cleaned text.
+    """
+    if not all(os.path.exists(p) for p in POLICY_FILES):
+        return None
+    import rl_policy  # torch; only once a trained policy exists
+    try:
+        meta, policy, embedder = rl_policy.get_policy()
+    except FileNotFoundError:  # policy present but its embedder artifact is not
+        return None
+    from model import clean_resume
+    scores = dict(rl_policy.score_skills_with_policy(policy, embedder, meta, clean_resume(resume_text), role,
+                                                     embedding=embedding))
+    return sorted(skills, key=lambda s: scores.get(s, 0.0), reverse=True)
+
+def _rerank_allowed(resume_text: str) -> bool:
+    """False (and the degradation recorded) when a rerank would run but the budget says no."""
+    if not (os.path.exists(BANDIT_PATH) or all(os.path.exists(p) for p in POLICY_FILES)):
+        return True  # nothing to skip
+    budget = budgets.current()
+    if budget.allows("rerank_reserve_seconds", len(resume_text or ""), "rerank_chars"):
+        return True
+    budget.degrade("rerank_skipped", f"{len(resume_text or '')} chars, {max(0.0, budget.remaining()):.1f}s left")
+    return False
+
+def _rank_gaps(kb, role: str, skills: List[str], evidence, resume_text: str = "",
+               embedding=None) -> List[str]:
+    """
+    The trained policy's order when its files exist, otherwise the heuristic:
+    biggest gap first, (1 - strength) plus the learned RL weight, with table
+    order breaking ties. Once the LinUCB ranker has enough feedback it
+    re-ranks on top of that (keeping the base order on ties). Requests out
+    of budget get the heuristic order only. `embedding` is the resume's
+    stored vector (result store), when the caller has one.
+    """
+    strength = evidence.strength
+    base = None
+    rerank = _rerank_allowed(resume_text)
+    if rerank:
+        base = _policy_order(resume_text, role, skills, embedding)
+    if base is None:
+        w = _rl_weights()
+        def priority(s):
+            return (1.0 - strength.get(s, 0.0)) + RL_BLEND * float(w.get(s.lower(), 0.0))
+        base = sorted(skills, key=priority, reverse=True)
+    if rerank and os.path.exists(BANDIT_PATH):
+        import bandit_ranker  # numpy; only once a bandit state exists
+        # same context as record_skill_feedback (the /feedback route passes the same embedding)
+        ranked = bandit_ranker.rank(role, base, strength, _coverage(kb, role, evidence), embedding)
+        if ranked is not None:
+            return ranked
+    return base
+
+def record_skill_feedback(resume_text: str, target_role: str, skills: List[str], reward: int,
+                          embedding=None) -> int:
+    """Feed one reward for the suggested skills to the LinUCB ranker; returns its update count."""
+    import bandit_ranker
+    kb, role, ev = _evidence_for(resume_text, target_role)
+    return bandit_ranker.record_feedback(role, skills, ev.strength, _coverage(kb, role, ev),
+                                         reward, embedding)
+
+def skill_strengths(resume_text: str, target_role: str) -> Dict[str, float]:
+    """Strength (0..1) of every skill of the resolved role, in the role table's order."""
+    kb, role, ev = _evidence_for(resume_text, target_role)
+    skills = kb.role_skills.get(role, ())
+    return dict(zip(skills, ev.vector(skills)))
 
-    return SuggestionResult(missing, suggestions)
+def suggest_from_resume(resume_text: str, target_role: str) -> SuggestionResult:
+    kb, role, missing = _missing_for(resume_text, target_role)
+    return SuggestionResult(missing, [_suggestion(kb.catalog, role, s) for s in missing])
 
 # ==============================
 # Feedback Logging
@@ -274,33 +317,75 @@ def log_feedback(resume_id: str, target_role: str, suggestion: Suggestion, rewar
 # ==============================
 # Role Analysis Wrapper
 # ==============================
-def analyze_for_role(resume_text: str, target_role: str) -> dict:
+def analyze_for_role(resume_text: str, target_role: str, embedding=None) -> dict:
     """
     Analyze resume for a target role and return improvements, missing skills,
-    projects, courses, and certificates.
+    projects, courses, and certificates. Pass the resume's stored embedding
+    when there is one; the learned rankers then skip encoding the text.
     """
-    result = suggest_from_resume(resume_text, target_role)
-
-    improvements = []
-    if len(resume_text.split()) < 200:
-        improvements.append("Expand your resume with more details on projects, achievements, and skills.")
-    if not any(word in resume_text.lower() for word in ["experience", "project", "internship"]):
-        improvements.append("Add a section for Experience, Projects, or Internships.")
-    if not any(word in resume_text.lower() for word in ["education", "bachelor", "master", "degree"]):
-        improvements.append("Include your Education details.")
-
+    kb, role, ev = _evidence_for(resume_text, target_role)
+    result = {"improvements": _improvements(resume_text)}
+    ranked = _rank_gaps(kb, role, kb.matrix.missing(role, ev.bits), ev, resume_text, embedding)
+    result.update(kb.catalog.payload(role, ranked, ranked=True))
+    result.update(_evidence_fields(kb, role, ev))
+    return result
+
+def analyze_for_role_json(resume_text: str, target_role: str, embedding=None) -> bytes:
+    """analyze_for_role() as JSON bytes; the suggestion part comes pre-encoded from the catalog."""
+    kb, role, ev = _evidence_for(resume_text, target_role)
+    head = {"improvements": _improvements(resume_text)}
+    head.update(_evidence_fields(kb, role, ev))
+    head = json.dumps(head, ensure_ascii=False).encode("utf-8")
+    ranked = _rank_gaps(kb, role, kb.matrix.missing(role, ev.bits), ev, resume_text, embedding)
+    return head[:-1] + b", " + kb.catalog.payload_json(role, ranked, ranked=True)[1:]
+
+def analyze_compact(resume_text: str, target_role: str, embedding=None) -> CompactAnalysis:
+    """analyze_for_role() as a CompactAnalysis; .to_dict() gives the same dict."""
+    kb, role, ev = _evidence_for(resume_text, target_role)
+    ranked = _rank_gaps(kb, role, kb.matrix.missing(role, ev.bits), ev, resume_text, embedding)
+    return CompactAnalysis.build(kb, role, ranked, ev, improvement_flags(resume_text))
+
+def _evidence_fields(kb, role: str, ev) -> dict:
+    skills = kb.role_skills.get(role, ())
     return {
-        "improvements": improvements,
-        "missing_skills": result.missing_skills,
-        "projects": [s.project_title for s in result.suggestions],
-        "courses": [s.course for s in result.suggestions],
-        "certificates": [s.certificate for s in result.suggestions],
+        "weak_skills": ev.weak(skills),
+        "skill_strength": dict(zip(skills, ev.vector(skills))),
+        "kb_version": kb.version,
     }
 
+def _improvements(resume_text: str) -> List[str]:
+    return improvement_texts(improvement_flags(resume_text))
+
+def analyze_all_roles(resume_text: str) -> List[dict]:
+    """
+    Score the resume against every role in one pass over the skill vocabulary.
+    Returned best coverage first.
+    """
+    matrix = knowledge_base.current().matrix
+    bits = matrix.resume_bits(resume_text)
+    out = []
+    for role, coverage, _ in matrix.coverage_all(bits):
+        missing = matrix.missing(role, bits)
+        out.append({
+            "role": role,
+            "coverage": round(coverage * 100.0, 2),
+            "missing_skills": missing,
+        })
+    out.sort(key=lambda r: r["coverage"], reverse=True)
+    return out
+
+def role_coverage(resume_text: str, target_role: str) -> dict:
+    """Coverage % and missing skills of one resume for one (resolved) role."""
+    kb, role, missing = _missing_for(resume_text, target_role)
+    matrix = kb.matrix
+    size = matrix.role_sizes[matrix.role_index[role]] if role in matrix.role_index else 0
+    coverage = (size - len(missing)) / size * 100.0 if size else 100.0
+    return {"role": role, "coverage": round(coverage, 2), "missing_skills": missing}
+
 # ==============================
 # Export roles list
 # ==============================
 ALL_ROLES = list(ROLE_SKILLS.keys())
 def get_all_roles() -> List[str]:
-    """Return a sorted list of all available roles."""
-    return sorted(ALL_ROLES)
\ No newline at end of file
+    """Return a sorted list of all available roles (from the live knowledge base)."""
+    return sorted(knowledge_base.current().roles)
\ No newline at end of file
@@ -0,0 +1,89 @@
+# ==============================
+# suggestion_catalog.py
+# Precomputed per-(role, skill) suggestions + memoized payloads
+# ==============================
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, FrozenSet, Iterable, List, Tuple
+
+PAYLOAD_CACHE_SIZE = 4096
+
+
+class SuggestionCatalog:
+    """
+    Every (role, skill) suggestion string is rendered once at build time.
+    Whole payloads depend only on (role, missing-skill set), so they are
+    memoized with LRU eviction, both as a dict and as pre-encoded JSON bytes.
+    """
+
+    def __init__(self, role_skills: Dict[str, List[str]], courses: Dict[str, str],
+                 certificates: Dict[str, str], record_factory: Callable = None,
+                 maxsize: int = PAYLOAD_CACHE_SIZE):
+        self.role_skills = role_skills
+        self.maxsize = maxsize
+        self._rows = {}
+        self._records = {}
+        for role, skills in role_skills.items():
+            for s in skills:
+                project_title = f"Build a project demonstrating {s.title()} for a {role.title()} role"
+                course = courses.get(s, f"Take an advanced course in {s.title()}")
+                certificate = certificates.get(s, f"Earn a certificate in {s.title()}")
+                row = (s, project_title, course, certificate)
+                self._rows[(role, s)] = row
+                self._records[(role, s)] = record_factory(*row) if record_factory else row
+        self._payloads: "OrderedDict[Tuple[str, FrozenSet[str]], tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, role: str, skill: str):
+        return self._records[(role, skill)]
+
+    def records(self, role: str, missing: Iterable[str]) -> list:
+        return [self._records[(role, s)] for s in missing]
+
+    def _ordered(self, role: str, missing: FrozenSet[str]) -> List[str]:
+        # canonical order = the role table's order, so the set key is lossless
+        return [s for s in self.role_skills.get(role, []) if s in missing]
+
+    def _get(self, role: str, missing: Iterable[str], ranked: bool = False) -> tuple:
+        # ranked: keep the caller's order (it is part of the key); otherwise table order
+        key = (role, tuple(missing)) if ranked else (role, frozenset(missing))
+        with self._lock:
+            hit = self._payloads.get(key)
+            if hit is not None:
+                self._payloads.move_to_end(key)
+                self.hits += 1
+                return hit
+            self.misses += 1
+
+        skills = list(key[1]) if ranked else self._ordered(role, key[1])
+        rows = [self._rows[(role, s)] for s in skills]
+        payload = {
+            "missing_skills": tuple(skills),
+            "projects": tuple(r[1] for r in rows),
+            "courses": tuple(r[2] for r in rows),
+            "certificates": tuple(r[3] for r in rows),
+        }
+        encoded = json.dumps({k: list(v) for k, v in payload.items()}, ensure_ascii=False).encode("utf-8")
+        entry = (payload, encoded)
+        with self._lock:
+            self._payloads[key] = entry
+            if len(self._payloads) > self.maxsize:
+                self._payloads.popitem(last=False)
+        return entry
+
+    def payload(self, role: str, missing: Iterable[str], ranked: bool = False) -> dict:
+        """Fresh dict of lists (safe to mutate) for the suggestion part of an analysis."""
+        payload, _ = self._get(role, missing, ranked)
+        return {k: list(v) for k, v in payload.items()}
+
+    def payload_json(self, role: str, missing: Iterable[str], ranked: bool = False) -> bytes:
+        """Same payload, already JSON-encoded (a `{...}` object)."""
+        return self._get(role, missing, ranked)[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._payloads), "maxsize": self.maxsize,
+                    "hits": self.hits, "misses": self.misses}
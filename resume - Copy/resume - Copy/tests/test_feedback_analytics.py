@@ -0,0 +1,34 @@
+import csv
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import feedback_analytics  # noqa: E402
+
+
+def _write_log(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["timestamp", "resume_id", "role", "kind", "text", "reward", "comments"])
+        w.writerows(rows)
+
+
+def test_compact_with_tab_in_role_and_item(tmp_path):
+    log = str(tmp_path / "feedback_log.csv")
+    base = str(tmp_path / "analytics")
+    stats_path = str(tmp_path / "suggestion_stats.json")
+    _write_log(log, [
+        ["2025-01-02T10:00:00", "r1", "data\tscientist", "skill", "py\ttorch", "1", ""],
+        ["2025-01-02T10:01:00", "r2", "Data Scientist", "skill", "PyTorch", "-1", ""],
+    ])
+
+    res = feedback_analytics.compact([log], base, stats_path)
+
+    assert res["rows"] == 2
+    state = feedback_analytics.load_state(base)
+    assert set(state["rollups"]) == {"data scientist"}
+    with open(stats_path, encoding="utf-8") as f:
+        assert json.load(f) == {"data scientist": {"py torch": 1, "pytorch": -1}}
+    # a second run has nothing new and must not fail on the stored keys
+    assert feedback_analytics.compact([log], base, stats_path)["rows"] == 0
@@ -0,0 +1,146 @@
+# ==================================================
+# train_model.py - retrain the category classifier
+# per embedder backend and compare accuracy/latency
+# (plus a probability calibrator fitted on held-out resumes)
+# ==================================================
+import argparse
+import os
+import pickle
+import random
+import statistics
+import time
+
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+import calibration
+import embedders
+from model import clean_resume, ENCODER_PATH
+
+DATASET = "UpdatedResumeDataSet.csv"
+LATENCY_SAMPLES = 50
+
+
+def load_dataset(path: str = DATASET):
+    df = pd.read_csv(path)
+    df = df.dropna(subset=["Category", "Resume"])
+    texts = [clean_resume(t) for t in df["Resume"].astype(str)]
+    return texts, df["Category"].tolist()
+
+
+def _single_doc_latency_ms(embedder, clf, texts, calibrator=None):
+    """Median wall time for one resume: embed + predict_proba + calibration (what a request pays)."""
+    timings = []
+    for t in texts[:LATENCY_SAMPLES]:
+        start = time.perf_counter()
+        calibration.apply(calibrator, clf.predict_proba(embedder.encode([t])))
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(timings) if timings else 0.0
+
+
+def calibration_split(X, y, size: float, seed: int = 42):
+    """
+    Hold out about `size` of the distinct resumes for calibration. The
+    dataset repeats resumes verbatim (962 rows, 166 distinct texts), so a
+    row-level split would calibrate on copies of fitted resumes and learn
+    overconfidence; every copy of a held-out text leaves the fit set, and
+    each category keeps at least one distinct text to fit on.
+    """
+    label = {}
+    for t, c in zip(X, y):
+        label.setdefault(t, c)
+    texts = sorted(label)
+    random.Random(seed).shuffle(texts)
+    left = {}
+    for t in texts:
+        left[label[t]] = left.get(label[t], 0) + 1
+    held = set()
+    for t in texts:
+        if len(held) >= max(1, int(len(texts) * size)):
+            break
+        if left[label[t]] > 1:
+            held.add(t)
+            left[label[t]] -= 1
+    fit = [i for i, t in enumerate(X) if t not in held]
+    cal = sorted(held)
+    return [X[i] for i in fit], [y[i] for i in fit], cal, [label[t] for t in cal]
+
+
+def train_backend(backend, X_train, y_train, X_test, y_test, method="temperature", calibration_size=0.2):
+    """
+    Fit embedder + classifier, and unless method is "none" a calibrator on
+    the predictions of a classifier fitted without some distinct resumes of
+    the training split, for exactly those resumes.
+    """
+    calibrator = None
+    if method != "none":
+        X_fit, y_fit, X_cal, y_cal = calibration_split(X_train, y_train, calibration_size)
+        embedder = embedders.build_embedder(backend, texts=X_fit)
+        clf = LogisticRegression(max_iter=2000).fit(embedder.encode(X_fit), y_fit)
+        calibrator = calibration.build(method).fit(clf.predict_proba(embedder.encode(X_cal)), y_cal)
+    # the shipped classifier is refitted on the whole training split; the
+    # calibrator learned on the held-out texts carries over to it
+    embedder = embedders.build_embedder(backend, texts=X_train)
+    clf = LogisticRegression(max_iter=2000)
+    clf.fit(embedder.encode(X_train), y_train)
+
+    raw = clf.predict_proba(embedder.encode(X_test))
+    calibrated = calibration.apply(calibrator, raw)
+    acc = accuracy_score(y_test, clf.classes_[calibrated.argmax(axis=1)])
+    latency = _single_doc_latency_ms(embedder, clf, X_test, calibrator)
+
+    paths = embedders.artifact_paths(backend)
+    embedders.save_artifact(embedder, paths["embedder"])
+    embedders.save_artifact(clf, paths["model"])
+    if calibrator is not None:
+        embedders.save_artifact(calibrator, paths["calibrator"])
+    elif os.path.exists(paths["calibrator"]):
+        os.unlink(paths["calibrator"])  # a stale calibrator would not match the new classifier
+    return {"backend": backend, "accuracy": acc, "latency_ms": latency,
+            "calibration": calibrator.describe() if calibrator else {"method": "none"},
+            "ece_raw": calibration.expected_calibration_error(raw, y_test),
+            "ece": calibration.expected_calibration_error(calibrated, y_test)}
+
+
+def print_report(rows):
+    print(f"{'backend':<12} {'accuracy':>9} {'latency (ms/resume)':>20} {'ECE raw':>8} {'ECE cal':>8}  calibrator")
+    for r in rows:
+        print(f"{r['backend']:<12} {r['accuracy']:>9.4f} {r['latency_ms']:>20.2f} "
+              f"{r['ece_raw']:>8.4f} {r['ece']:>8.4f}  {r['calibration']}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Retrain the classifier for each embedder backend.")
+    ap.add_argument("--backends", default=",".join(embedders.BACKENDS),
+                    help="comma separated subset of: " + ", ".join(embedders.BACKENDS))
+    ap.add_argument("--test-size", type=float, default=0.2)
+    ap.add_argument("--calibration", default="temperature", choices=calibration.METHODS + ("none",),
+                    help="probability calibration fitted on held-out training resumes")
+    ap.add_argument("--calibration-size", type=float, default=0.2,
+                    help="fraction of the distinct training resumes held out to fit the calibrator")
+    args = ap.parse_args(argv)
+
+    texts, labels = load_dataset()
+    enc = LabelEncoder().fit(labels)
+    with open(ENCODER_PATH, "wb") as f:
+        pickle.dump(enc, f)
+    y = enc.transform(labels)
+    X_train, X_test, y_train, y_test = train_test_split(
+        texts, y, test_size=args.test_size, random_state=42, stratify=y
+    )
+
+    rows = []
+    # sbert first so sbert-int8 can quantize the freshly saved full model
+    for backend in [embedders.get_backend(b) for b in args.backends.split(",") if b.strip()]:
+        print(f"Training {backend} ...")
+        rows.append(train_backend(backend, X_train, y_train, X_test, y_test,
+                                  args.calibration, args.calibration_size))
+    print_report(rows)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
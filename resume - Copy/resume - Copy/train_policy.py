@@ -0,0 +1,268 @@
+# ==================================================
+# train_policy.py - offline training of rl_policy.ResumePolicyNet
+#
+#   python train_policy.py [--epochs 20] [--batch-size 64] [--resume]
+#
+# Reads the feedback logs (feedback_events), joins each event with the
+# resume embedding cached by the result store, and writes the joined
+# features once to memory-mapped arrays under policy_cache/. Training
+# streams mini-batches from those maps through a DataLoader on CPU,
+# checkpoints every epoch, and finally writes rl_policy.pth plus
+# rl_policy_metadata.pkl for rl_policy.load_policy().
+# ==================================================
+import argparse
+import glob
+import hashlib
+import json
+import os
+import pickle
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+import embedders
+import knowledge_base
+from feedback_events import iter_events
+from result_store import get_store
+from rl_policy import METADATA_PATH, POLICY_PATH, ResumePolicyNet
+
+CACHE_DIR = "policy_cache"
+CHECKPOINT_DIR = "checkpoints"
+KEEP_CHECKPOINTS = 3
+ROLE_EMBED_DIM = 16
+HIDDEN = 128
+
+
+# -------- Feature cache (memory-mapped) --------
+def _backend_of(ref: str) -> str:
+    # result_store saves embeddings as <EMBED_DIR>/<backend>/<hash>.npy
+    return os.path.basename(os.path.dirname(ref)) if ref else None
+
+
+def _join(events, store):
+    """Per event: (role, skill, reward, stored record or None)."""
+    kb = knowledge_base.current()
+    records = {}
+    rows = []
+    for ev in events:
+        role = kb.resolver.resolve(ev.role)
+        if ev.skill not in kb.matrix.skill_id:
+            continue
+        if ev.resume_id not in records:
+            records[ev.resume_id] = store.get(ev.resume_id) if ev.resume_id else None
+        rows.append((role, ev.skill, ev.reward, records[ev.resume_id]))
+    return kb, rows
+
+
+def _resume_vectors(rows, store, backend: str):
+    """Embedding per distinct resume: the stored .npy, else encode its stored text, else None."""
+    vectors, to_encode = {}, {}
+    for _, _, _, rec in rows:
+        if rec is None or rec["content_hash"] in vectors:
+            continue
+        ref = rec.get("embedding_ref")
+        if ref and _backend_of(ref) == backend:
+            vectors[rec["content_hash"]] = np.asarray(store.load_embedding(ref), dtype=np.float32)
+        elif rec.get("cleaned_text"):
+            to_encode[rec["content_hash"]] = rec["cleaned_text"]
+    if to_encode:
+        try:
+            embedder = embedders.load_embedder(backend)
+        except (OSError, ImportError) as e:
+            print(f"warning: {len(to_encode)} resumes left without embeddings ({e})")
+            return vectors
+        vecs = embedder.encode(list(to_encode.values()))
+        if hasattr(vecs, "toarray"):
+            vecs = vecs.toarray()
+        for key, v in zip(to_encode, np.asarray(vecs, dtype=np.float32)):
+            vectors[key] = v
+    return vectors
+
+
+def build_cache(events, backend: str = None, cache_dir: str = CACHE_DIR) -> dict:
+    """
+    Join events with embeddings and write X (float32, N x D), role/skill ids
+    and rewards as .npy files that training opens with mmap. Reused as long
+    as the events, the KB and the backend are unchanged.
+    """
+    store = get_store()
+    kb, rows = _join(events, store)
+    if not rows:
+        raise SystemExit("No per-skill feedback events found in the logs.")
+
+    # the backend most stored embeddings were made with, unless one is forced
+    if backend is None:
+        refs = Counter(_backend_of(rec.get("embedding_ref")) for *_, rec in rows
+                       if rec is not None and rec.get("embedding_ref"))
+        backend = refs.most_common(1)[0][0] if refs else embedders.get_backend()
+    key = hashlib.sha1(json.dumps(
+        [backend, kb.version, [(r, s, w, rec and rec["content_hash"]) for r, s, w, rec in rows]]
+    ).encode("utf-8")).hexdigest()[:16]
+
+    manifest_path = os.path.join(cache_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("key") == key:
+            return manifest
+
+    role_list = list(kb.roles)
+    skill_list = list(kb.matrix.vocab)
+    vectors = _resume_vectors(rows, store, backend)
+    embed_dim = len(next(iter(vectors.values()))) if vectors else 0
+
+    os.makedirs(cache_dir, exist_ok=True)
+    n = len(rows)
+    X = np.lib.format.open_memmap(os.path.join(cache_dir, "X.npy"), mode="w+",
+                                  dtype=np.float32, shape=(n, max(embed_dim, 1)))
+    roles = np.empty(n, dtype=np.int64)
+    skills = np.empty(n, dtype=np.int64)
+    rewards = np.empty(n, dtype=np.float32)
+    for i, (role, skill, reward, rec) in enumerate(rows):
+        vec = vectors.get(rec["content_hash"]) if rec is not None else None
+        X[i] = vec if vec is not None else 0.0  # unknown resume: role-only signal
+        roles[i] = role_list.index(role)
+        skills[i] = skill_list.index(skill)
+        rewards[i] = 1.0 if reward > 0 else -1.0
+    X.flush()
+    del X
+    np.save(os.path.join(cache_dir, "roles.npy"), roles)
+    np.save(os.path.join(cache_dir, "skills.npy"), skills)
+    np.save(os.path.join(cache_dir, "rewards.npy"), rewards)
+
+    manifest = {"key": key, "rows": n, "embed_dim": embed_dim, "embedder_backend": backend,
+                "role_list": role_list, "skill_list": skill_list,
+                "with_embedding": sum(1 for *_, rec in rows if rec is not None and rec["content_hash"] in vectors)}
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class FeedbackDataset(Dataset):
+    """Rows of the memory-mapped feature cache; pages are read as batches touch them."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.X = np.load(os.path.join(cache_dir, "X.npy"), mmap_mode="r")
+        self.roles = np.load(os.path.join(cache_dir, "roles.npy"), mmap_mode="r")
+        self.skills = np.load(os.path.join(cache_dir, "skills.npy"), mmap_mode="r")
+        self.rewards = np.load(os.path.join(cache_dir, "rewards.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.rewards)
+
+    def __getitem__(self, i):
+        return (torch.from_numpy(np.array(self.X[i])), int(self.roles[i]),
+                int(self.skills[i]), float(self.rewards[i]))
+
+
+# -------- Training --------
+def policy_loss(logits, skills, rewards):
+    """
+    Liked suggestions: cross-entropy towards the skill. Disliked ones:
+    unlikelihood, -log(1 - p(skill)), which pushes that skill down.
+    """
+    logp = torch.log_softmax(logits, dim=-1).gather(1, skills[:, None]).squeeze(1)
+    pos = -logp
+    neg = -torch.log1p(-logp.exp().clamp(max=1 - 1e-6))
+    return torch.where(rewards > 0, pos, neg).mean()
+
+
+def _latest_checkpoint(ckpt_dir: str):
+    paths = sorted(glob.glob(os.path.join(ckpt_dir, "policy_epoch*.pt")))
+    return paths[-1] if paths else None
+
+
+def _atomic_save(obj, path: str, saver):
+    tmp = path + ".tmp"
+    saver(obj, tmp)
+    os.replace(tmp, path)
+
+
+def train(manifest: dict, epochs: int, batch_size: int, lr: float, resume: bool,
+          cache_dir: str = CACHE_DIR, ckpt_dir: str = CHECKPOINT_DIR, seed: int = 42):
+    torch.manual_seed(seed)
+    embed_dim = manifest["embed_dim"]
+    policy = ResumePolicyNet(
+        resume_dim=embed_dim, role_count=len(manifest["role_list"]),
+        role_embed_dim=ROLE_EMBED_DIM, hidden=HIDDEN, action_count=len(manifest["skill_list"]),
+    )
+    opt = torch.optim.Adam(policy.parameters(), lr=lr)
+    start_epoch = 0
+    os.makedirs(ckpt_dir, exist_ok=True)
+    ckpt = _latest_checkpoint(ckpt_dir) if resume else None
+    if ckpt:
+        state = torch.load(ckpt, map_location="cpu")
+        if state.get("cache_key") == manifest["key"]:
+            policy.load_state_dict(state["model"])
+            opt.load_state_dict(state["optimizer"])
+            start_epoch = state["epoch"] + 1
+            print(f"Resumed from {ckpt} (epoch {state['epoch'] + 1})")
+        else:
+            print(f"Ignoring {ckpt}: built from different feedback/features")
+
+    loader = DataLoader(FeedbackDataset(cache_dir), batch_size=batch_size, shuffle=True,
+                        generator=torch.Generator().manual_seed(seed))
+    for epoch in range(start_epoch, epochs):
+        policy.train()
+        total, seen = 0.0, 0
+        for X, roles, skills, rewards in loader:
+            logits = policy(X if embed_dim > 0 else None, roles)
+            loss = policy_loss(logits, skills, rewards)
+            opt.zero_grad()
+            loss.backward()
+            opt.step()
+            total += loss.item() * len(rewards)
+            seen += len(rewards)
+        print(f"epoch {epoch + 1:>3}/{epochs}  loss {total / max(seen, 1):.4f}")
+        _atomic_save({"model": policy.state_dict(), "optimizer": opt.state_dict(),
+                      "epoch": epoch, "cache_key": manifest["key"]},
+                     os.path.join(ckpt_dir, f"policy_epoch{epoch + 1:04d}.pt"), torch.save)
+        for old in sorted(glob.glob(os.path.join(ckpt_dir, "policy_epoch*.pt")))[:-KEEP_CHECKPOINTS]:
+            os.unlink(old)
+    policy.eval()
+    return policy
+
+
+def save_policy(policy, manifest: dict, events: int):
+    _atomic_save(policy.state_dict(), POLICY_PATH, torch.save)
+    meta = {
+        "role_list": manifest["role_list"],
+        "skill_list": manifest["skill_list"],
+        "embed_dim": manifest["embed_dim"],
+        "role_embed_dim": ROLE_EMBED_DIM,
+        "hidden": HIDDEN,
+        "embedder_backend": manifest["embedder_backend"],
+        "events": events,
+        "trained_at": datetime.utcnow().isoformat(),
+    }
+
+    def dump(obj, path):
+        with open(path, "wb") as f:
+            pickle.dump(obj, f)
+    _atomic_save(meta, METADATA_PATH, dump)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Train ResumePolicyNet offline from the feedback logs.")
+    ap.add_argument("--epochs", type=int, default=20)
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--lr", type=float, default=1e-3)
+    ap.add_argument("--backend", default=None, help="embedder backend (default: most common in the store)")
+    ap.add_argument("--logs", nargs="*", default=None, help="feedback log files (default: the app's logs)")
+    ap.add_argument("--resume", action="store_true", help="continue from the latest checkpoint")
+    args = ap.parse_args(argv)
+
+    events = list(iter_events(args.logs) if args.logs else iter_events())
+    manifest = build_cache(events, args.backend)
+    print(f"{manifest['rows']} events, {manifest['with_embedding']} joined with a resume embedding "
+          f"(dim {manifest['embed_dim']}, backend {manifest['embedder_backend']})")
+    policy = train(manifest, args.epochs, args.batch_size, args.lr, args.resume)
+    save_policy(policy, manifest, len(events))
+    print(f"Saved {POLICY_PATH} and {METADATA_PATH}")
+
+
+if __name__ == "__main__":
+    main()
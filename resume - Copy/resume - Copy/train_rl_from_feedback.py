@@ -50,6 +50,23 @@ def train_incremental():
     _save_weights(weights)
     return True
 
+def apply_skill_evidence(strengths, reward: int, step: float = 0.2):
+    """
+    Nudge the weights of suggested skills by reward * step * (1 - strength):
+    feedback on a skill the resume already shows strongly says little about
+    the suggestion, feedback on a skill that is absent counts in full.
+    """
+    if not strengths:
+        return False
+    weights = _load_weights()
+    for skill, strength in strengths.items():
+        key = (skill or "").lower()
+        if key:
+            delta = reward * step * (1.0 - max(0.0, min(1.0, float(strength))))
+            weights[key] = round(weights.get(key, 0.0) + delta, 4)
+    _save_weights(weights)
+    return True
+
 if __name__ == "__main__":
     train_incremental()
     print("RL weights updated.")
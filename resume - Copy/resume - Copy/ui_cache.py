@@ -0,0 +1,171 @@
+# ===========================================
+# ui_cache.py - Streamlit caching for the pages
+# ===========================================
+import hashlib
+import pickle
+from collections import OrderedDict
+
+import streamlit as st
+
+# Per-session memo (download blobs etc.) is capped at this many bytes
+SESSION_BUDGET_BYTES = 32 * 1024 * 1024
+_SESSION_KEY = "_ui_cache_memo"
+
+
+def content_hash(data) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8", errors="ignore")
+    return hashlib.sha1(data).hexdigest()
+
+
+# -------- Models (shared by every session) --------
+@st.cache_resource(show_spinner=False)
+def warm_models():
+    """Load embedder/classifier pickles once per process."""
+    import embedders
+    from model import _load_artifacts, FAST_BACKEND
+    _load_artifacts()
+    if FAST_BACKEND in embedders.available_backends():
+        _load_artifacts(FAST_BACKEND)
+    return True
+
+
+# -------- Pipeline stages, keyed by content hash --------
+# Leading-underscore args are skipped by Streamlit's hasher; the hash key stands in for them.
+# Each stage runs under its own request budget (budgets.py) and returns
+# (value, degradations applied) so cached reruns still report them. Results
+# cut short for lack of time (budgets.TIMING_DEPENDENT) leave the cached
+# function as a _NotCached exception, which st.cache_data never stores;
+# call the stages through _run().
+class _NotCached(Exception):
+    def __init__(self, result):
+        super().__init__()
+        self.result = result
+
+
+def _cacheable(value, applied: dict):
+    from budgets import TIMING_DEPENDENT
+    if TIMING_DEPENDENT.intersection(applied):
+        raise _NotCached((value, applied))
+    return value, applied
+
+
+def _run(stage, *args):
+    try:
+        return stage(*args)
+    except _NotCached as e:
+        return e.result
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def _extract(upload_hash: str, name: str, _raw: bytes):
+    import budgets
+    import uploads
+    from extract_utils import extract_text_from_upload
+    with budgets.scope() as budget, uploads.from_bytes(name, _raw) as up:
+        return _cacheable(extract_text_from_upload(up), dict(budget.applied))
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _predict(text_hash: str, _text: str):
+    import budgets
+    warm_models()
+    from model import predict_top_k
+    with budgets.scope() as budget:
+        return _cacheable(predict_top_k(budget.clip_text(_text)), dict(budget.applied))
+
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def _analyze(text_hash: str, role: str, _text: str):
+    import budgets
+    from suggest import analyze_for_role
+    with budgets.scope() as budget:
+        return _cacheable(analyze_for_role(budget.clip_text(_text), role), dict(budget.applied))
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _contacts(text_hash: str, _text: str):
+    from contact_fields import extract_contact_info
+    return extract_contact_info(_text)
+
+
+def _shown(result):
+    """Unwrap a stage result, telling the user which cheaper paths it took."""
+    value, applied = result
+    if applied:
+        from budgets import DEGRADATIONS
+        st.caption("⚠️ Large input, reduced work: " + "; ".join(DEGRADATIONS.get(k, k) for k in applied))
+    return value
+
+
+def extract_text(uploaded_file) -> str:
+    raw = uploaded_file.getvalue()
+    return _shown(_run(_extract, content_hash(raw), uploaded_file.name, raw))
+
+
+def predict(text: str):
+    """(category, calibrated confidence %) of the best category."""
+    best = _shown(_run(_predict, content_hash(text), text))[0]
+    return best["category"], best["confidence"]
+
+
+def top_categories(text: str):
+    """model.predict_top_k for the text (same cache entry as predict)."""
+    return _run(_predict, content_hash(text), text)[0]
+
+
+def analyze(text: str, role: str) -> dict:
+    return _shown(_run(_analyze, content_hash(text), role, text))
+
+
+def contacts(text: str):
+    """contact_fields.ContactInfo for the text; reruns with unchanged text hit the cache."""
+    return _contacts(content_hash(text), text)
+
+
+# -------- Bounded per-session memo --------
+class _BoundedMemo:
+    """LRU over (key -> value) that evicts oldest entries past a byte budget."""
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.used = 0
+        self._items = OrderedDict()
+
+    @staticmethod
+    def _size(value) -> int:
+        if isinstance(value, (bytes, bytearray)):
+            return len(value)
+        if isinstance(value, str):
+            return len(value)
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def get(self, key):
+        if key in self._items:
+            self._items.move_to_end(key)
+            return self._items[key][0]
+        return None
+
+    def put(self, key, value):
+        size = self._size(value)
+        if key in self._items:
+            self.used -= self._items.pop(key)[1]
+        if size > self.budget:
+            return value
+        self._items[key] = (value, size)
+        self.used += size
+        while self.used > self.budget:
+            _, (_, s) = self._items.popitem(last=False)
+            self.used -= s
+        return value
+
+
+def session_memo(key, fn, *args):
+    """fn(*args) memoized in this browser session only, within SESSION_BUDGET_BYTES."""
+    memo = st.session_state.get(_SESSION_KEY)
+    if memo is None:
+        memo = st.session_state[_SESSION_KEY] = _BoundedMemo(SESSION_BUDGET_BYTES)
+    hit = memo.get(key)
+    if hit is not None:
+        return hit
+    return memo.put(key, fn(*args))
@@ -0,0 +1,172 @@
+# ==================================================
+# uploads.py - size-bounded upload spooling
+#   small uploads stay in memory, large ones are spooled
+#   to a temp file and memory-mapped; parsers get a file
+#   object / memoryview instead of another bytes copy.
+# ==================================================
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+import threading
+
+MB = 1024 * 1024
+MAX_UPLOAD_BYTES = int(float(os.environ.get("RESUME_MAX_UPLOAD_MB", "20")) * MB)
+GLOBAL_UPLOAD_BUDGET = int(float(os.environ.get("RESUME_UPLOAD_BUDGET_MB", "256")) * MB)
+# no single upload (an /ingest archive, say) may hold more than this share of the global budget
+MAX_BUDGET_SHARE = float(os.environ.get("RESUME_UPLOAD_MAX_SHARE", "0.5"))
+SPOOL_THRESHOLD = 1 * MB
+MULTIPART_OVERHEAD = 1 * MB  # boundaries, part headers and small form fields around the file
+CHUNK = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the per-request or the global budget (HTTP 413)."""
+    status_code = 413
+
+
+class _Budget:
+    """Bytes currently held by in-flight uploads, across all requests of this process."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, n: int):
+        with self._lock:
+            if self.used + n > self.limit:
+                raise UploadTooLarge("Server is busy with other uploads; retry shortly.")
+            self.used += n
+
+    def release(self, n: int):
+        with self._lock:
+            self.used = max(0, self.used - n)
+
+
+_GLOBAL = _Budget(GLOBAL_UPLOAD_BUDGET)
+
+
+def global_usage() -> dict:
+    return {"used_bytes": _GLOBAL.used, "limit_bytes": _GLOBAL.limit}
+
+
+def capped(limit: int) -> int:
+    """`limit`, lowered to the most of the global budget one upload may reserve."""
+    return min(limit, int(GLOBAL_UPLOAD_BUDGET * MAX_BUDGET_SHARE))
+
+
+def check_size(size: int, limit: int = None):
+    limit = MAX_UPLOAD_BYTES if limit is None else limit
+    if size is not None and size > limit:
+        raise UploadTooLarge(f"Upload is {size / MB:.1f} MB; the limit is {limit / MB:.0f} MB.")
+
+
+class Upload:
+    """
+    One spooled upload. Use as a context manager so the temp file, the
+    mapping and the budget reservation are released together.
+    """
+
+    def __init__(self, name: str, data: bytes = None, path: str = None, size: int = 0,
+                 content_hash: str = None):
+        self.name = name or ""
+        self.size = size
+        self.content_hash = content_hash  # sha1 hex of the body, computed while spooling
+        self.path = path
+        self._data = data
+        self._mmap = None
+        self._reserved = size
+
+    @property
+    def spooled(self) -> bool:
+        return self.path is not None
+
+    def view(self) -> memoryview:
+        """Zero-copy view of the content (bytes buffer or a read-only mmap)."""
+        if self.path is None:
+            return memoryview(self._data)
+        if self._mmap is None:
+            if self.size == 0:
+                return memoryview(b"")
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)
+
+    def open(self):
+        """Seekable binary file object for parsers (pdfplumber, python-docx)."""
+        if self.path is None:
+            return io.BytesIO(self._data)  # shares the bytes object until written
+        return open(self.path, "rb")
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # a caller still holds a memoryview; the OS reclaims it on exit
+            self._mmap = None
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+        self._data = None
+        _GLOBAL.release(self._reserved)
+        self._reserved = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def spool(stream, name: str, content_length: int = None, limit: int = None) -> Upload:
+    """
+    Read `stream` in chunks into an Upload, switching to a temp file past
+    SPOOL_THRESHOLD. Raises UploadTooLarge as soon as a budget is exceeded.
+    `content_length` is the whole request's: it only rejects bodies past the
+    limit plus MULTIPART_OVERHEAD up front; the file itself is held to
+    `limit` by the bytes actually read.
+    """
+    limit = capped(MAX_UPLOAD_BYTES if limit is None else limit)
+    if content_length is not None and content_length > limit + MULTIPART_OVERHEAD:
+        raise UploadTooLarge(f"Upload is {content_length / MB:.1f} MB; the limit is {limit / MB:.0f} MB.")
+
+    chunks, size, tmp, reserved = [], 0, None, 0
+    digest = hashlib.sha1()
+    try:
+        while True:
+            chunk = stream.read(CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            check_size(size, limit)
+            _GLOBAL.reserve(len(chunk))
+            reserved += len(chunk)
+            if tmp is None and size > SPOOL_THRESHOLD:
+                tmp = tempfile.NamedTemporaryFile(prefix="resume_upload_", delete=False)
+                tmp.writelines(chunks)
+                chunks = []
+            if tmp is not None:
+                tmp.write(chunk)
+            else:
+                chunks.append(chunk)
+    except BaseException:
+        _GLOBAL.release(reserved)
+        if tmp is not None:
+            tmp.close()
+            os.unlink(tmp.name)
+        raise
+
+    if tmp is not None:
+        tmp.close()
+        return Upload(name, path=tmp.name, size=size, content_hash=digest.hexdigest())
+    return Upload(name, data=b"".join(chunks), size=size, content_hash=digest.hexdigest())
+
+
+def from_bytes(name: str, data, limit: int = None) -> Upload:
+    """Wrap an upload that is already in memory (e.g. a Streamlit UploadedFile buffer)."""
+    check_size(len(data), limit)
+    _GLOBAL.reserve(len(data))
+    return Upload(name, data=data, size=len(data), content_hash=hashlib.sha1(data).hexdigest())